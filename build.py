@@ -0,0 +1,554 @@
+"""
+Travel Site Build
+
+This script builds an optimized copy of the travel showcase site into dist/:
+page stylesheets are merged, minified and fingerprinted, the CSS needed for
+the first screen of each page is inlined, local images get responsive size
+and format derivatives, <img> tags are rewritten with srcset, dimensions and
+lazy loading, and text assets are precompressed.
+
+Usage:
+    python build.py [--out dist] [--vendor-images] [--widths 480,960,1600]
+"""
+
+import os
+import re
+import sys
+import gzip
+import shutil
+import hashlib
+import logging
+import argparse
+import urllib.request
+from html.parser import HTMLParser
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional; without it images are only tagged, not resized
+    Image = None
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; .gz variants are always produced
+    brotli = None
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Pages that belong to the travel site (the Flask app in youtube-blog-generator/ is built separately)
+PAGE_PATTERN = re.compile(r'^[\w-]+\.html$')
+
+LINK_TAG_RE = re.compile(r'<link\b[^>]*>', re.IGNORECASE)
+IMG_TAG_RE = re.compile(r'<img\b[^>]*?/?>', re.IGNORECASE)
+ATTR_RE = re.compile(r'([\w:-]+)(?:\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s"\'>/]+)))?')
+
+UNSPLASH_HOSTS = ('images.unsplash.com', 'plus.unsplash.com')
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.gif')
+PRECOMPRESS_EXTENSIONS = ('.html', '.css', '.js', '.svg', '.json', '.txt')
+
+# Roughly the first TCP congestion window; inlined CSS beyond this delays first paint
+DEFAULT_CRITICAL_BUDGET = 14 * 1024
+DEFAULT_WIDTHS = (480, 960, 1600)
+DEFAULT_SIZES = '(max-width: 600px) 100vw, (max-width: 1200px) 50vw, 33vw'
+
+def parse_attributes(tag):
+    """
+    Parse the attributes of a single HTML start tag.
+    
+    Args:
+        tag (str): The raw tag, e.g. '<img src="a.jpg" alt="A">'.
+    
+    Returns:
+        dict: Attribute names (lower-cased) mapped to their values.
+    """
+    inner = re.sub(r'^<\w+|/?>$', '', tag.strip())
+    attributes = {}
+    for match in ATTR_RE.finditer(inner):
+        name = match.group(1).lower()
+        value = next((g for g in match.groups()[1:] if g is not None), '')
+        attributes[name] = value
+    return attributes
+
+def render_tag(name, attributes, self_closing=False):
+    """
+    Render an HTML start tag from an attribute dictionary.
+    
+    Args:
+        name (str): The tag name.
+        attributes (dict): Attributes to render; None values render as boolean attributes.
+        self_closing (bool): Whether to close the tag with ' />'.
+    
+    Returns:
+        str: The rendered tag.
+    """
+    parts = [name]
+    for key, value in attributes.items():
+        if value is None:
+            parts.append(key)
+        else:
+            parts.append(f'{key}="{value.replace(chr(34), "&quot;")}"')
+    return f"<{' '.join(parts)}{' /' if self_closing else ''}>"
+
+def content_hash(data, length=10):
+    """Return a short hex digest of some bytes."""
+    return hashlib.sha256(data).hexdigest()[:length]
+
+def minify_css(css):
+    """
+    Minify a stylesheet by removing comments and redundant whitespace.
+    
+    Args:
+        css (str): The stylesheet source.
+    
+    Returns:
+        str: The minified stylesheet.
+    """
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.DOTALL)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};,>])\s*', r'\1', css)
+    css = re.sub(r':\s+', ':', css)
+    css = css.replace(';}', '}')
+    return css.strip()
+
+def split_css_rules(css):
+    """
+    Split minified CSS into top-level blocks.
+    
+    Args:
+        css (str): A minified stylesheet.
+    
+    Returns:
+        list: (prelude, body) tuples; body is the text between the outer braces.
+    """
+    rules = []
+    depth = 0
+    start = 0
+    prelude = ''
+    for index, char in enumerate(css):
+        if char == '{':
+            if depth == 0:
+                prelude = css[start:index].strip()
+                start = index + 1
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                rules.append((prelude, css[start:index]))
+                start = index + 1
+    return rules
+
+def selector_tokens(selector):
+    """
+    Extract the tag, class and id tokens a selector depends on.
+    
+    Args:
+        selector (str): A single CSS selector (no commas).
+    
+    Returns:
+        set: Tokens such as 'nav', '.intro' or '#main'.
+    """
+    # Pseudo-classes, pseudo-elements and attribute selectors do not affect whether
+    # an element exists above the fold
+    selector = re.sub(r'::?[\w-]+(\([^)]*\))?|\[[^\]]*\]', '', selector)
+    tokens = set(re.findall(r'[.#][\w-]+', selector))
+    tokens.update(tag.lower() for tag in re.findall(r'(?:^|[\s>+~])([a-zA-Z][\w-]*)', selector))
+    tokens.discard('*')
+    return tokens
+
+class FoldCollector(HTMLParser):
+    """Collect the tags, classes and ids rendered in the first screen of a page."""
+    
+    def __init__(self):
+        super().__init__()
+        self.tokens = {'html', 'body'}
+        self.in_main = False
+        self.section_depth = 0
+        self.done = False
+    
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        self.tokens.add(tag)
+        for name, value in attrs:
+            if name == 'class' and value:
+                self.tokens.update(f'.{cls}' for cls in value.split())
+            elif name == 'id' and value:
+                self.tokens.add(f'#{value}')
+        if tag == 'main':
+            self.in_main = True
+        elif tag == 'section' and self.in_main:
+            self.section_depth += 1
+    
+    def handle_endtag(self, tag):
+        # The fold ends after the first section of <main> (header, nav and hero/intro)
+        if tag == 'section' and self.in_main and not self.done:
+            self.section_depth -= 1
+            if self.section_depth <= 0:
+                self.done = True
+
+class SiteBuilder:
+    """Class to build the optimized travel site into an output directory."""
+    
+    def __init__(self, src_dir, out_dir, widths=DEFAULT_WIDTHS, vendor_images=False,
+                 critical_budget=DEFAULT_CRITICAL_BUDGET):
+        """
+        Initialize the SiteBuilder.
+        
+        Args:
+            src_dir (str): Directory containing the site's HTML and CSS.
+            out_dir (str): Output directory (recreated on every build).
+            widths (tuple): Target widths for responsive image derivatives.
+            vendor_images (bool): Download remote images so derivatives can be generated.
+            critical_budget (int): Maximum bytes of CSS to inline per page.
+        """
+        self.src_dir = src_dir
+        self.out_dir = out_dir
+        self.assets_dir = os.path.join(out_dir, 'assets')
+        self.widths = tuple(sorted(widths))
+        self.vendor_images = vendor_images
+        self.critical_budget = critical_budget
+        self._css_bundles = {}
+        self._images = {}
+    
+    def build(self):
+        """
+        Build every page of the site.
+        
+        Returns:
+            list: Paths of the generated HTML pages.
+        """
+        if os.path.isdir(self.out_dir):
+            shutil.rmtree(self.out_dir)
+        os.makedirs(self.assets_dir)
+        
+        pages = sorted(name for name in os.listdir(self.src_dir) if PAGE_PATTERN.match(name))
+        built = []
+        for name in pages:
+            with open(os.path.join(self.src_dir, name), encoding='utf-8') as f:
+                html = f.read()
+            
+            html = self.process_stylesheets(html)
+            html = self.process_images(html)
+            html = self.minify_html(html)
+            
+            path = os.path.join(self.out_dir, name)
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(html)
+            built.append(path)
+            logger.info(f"Built {name}")
+        
+        self.precompress()
+        return built
+    
+    def process_stylesheets(self, html):
+        """
+        Replace a page's local stylesheets with an inlined critical block and
+        a deferred, fingerprinted bundle.
+        
+        Args:
+            html (str): The page source.
+        
+        Returns:
+            str: The page with rewritten stylesheet references.
+        """
+        stylesheets = []
+        for match in LINK_TAG_RE.finditer(html):
+            attributes = parse_attributes(match.group(0))
+            href = attributes.get('href', '')
+            if attributes.get('rel', '').lower() == 'stylesheet' and not re.match(r'^[a-z]+:|^//', href):
+                stylesheets.append((match.group(0), href))
+        
+        if not stylesheets:
+            return html
+        
+        # Merge in document order so the cascade is unchanged
+        sources = []
+        for _, href in stylesheets:
+            with open(os.path.join(self.src_dir, href), encoding='utf-8') as f:
+                sources.append(f.read())
+        bundle = minify_css('\n'.join(sources))
+        bundle_href = self._write_css_bundle(bundle)
+        
+        critical = self.extract_critical_css(html, bundle)
+        if critical == bundle:
+            replacement = f'<style>{critical}</style>'
+        else:
+            replacement = (
+                f'<style>{critical}</style>'
+                f'<link rel="preload" href="{bundle_href}" as="style" onload="this.onload=null;this.rel=\'stylesheet\'">'
+                f'<noscript><link rel="stylesheet" href="{bundle_href}"></noscript>'
+            )
+        
+        for tag, _ in stylesheets[1:]:
+            html = html.replace(tag, '', 1)
+        return html.replace(stylesheets[0][0], replacement, 1)
+    
+    def _write_css_bundle(self, bundle):
+        """Write a fingerprinted CSS bundle (once per unique content) and return its URL."""
+        data = bundle.encode('utf-8')
+        digest = content_hash(data)
+        if digest not in self._css_bundles:
+            name = f'styles.{digest}.css'
+            with open(os.path.join(self.assets_dir, name), 'wb') as f:
+                f.write(data)
+            self._css_bundles[digest] = f'assets/{name}'
+        return self._css_bundles[digest]
+    
+    def extract_critical_css(self, html, bundle):
+        """
+        Select the rules of a bundle that style the first screen of a page.
+        
+        Args:
+            html (str): The page source.
+            bundle (str): The page's minified CSS bundle.
+        
+        Returns:
+            str: Minified critical CSS (the whole bundle if it fits the budget
+                 and every rule is needed above the fold).
+        """
+        collector = FoldCollector()
+        collector.feed(html)
+        fold_tokens = collector.tokens
+        
+        def is_critical(prelude):
+            return any(selector_tokens(sel) <= fold_tokens for sel in prelude.split(',') if sel.strip())
+        
+        critical = []
+        for prelude, body in split_css_rules(bundle):
+            if prelude.startswith('@media') or prelude.startswith('@supports'):
+                inner = [f'{p}{{{b}}}' for p, b in split_css_rules(body) if is_critical(p)]
+                if inner:
+                    critical.append(f"{prelude}{{{''.join(inner)}}}")
+            elif prelude.startswith('@'):
+                critical.append(f'{prelude}{{{body}}}')
+            elif is_critical(prelude):
+                critical.append(f'{prelude}{{{body}}}')
+        
+        css = ''.join(critical)
+        if len(css.encode('utf-8')) > self.critical_budget:
+            logger.warning(f"Critical CSS ({len(css)} bytes) exceeds the inline budget; truncating to whole rules")
+            kept = []
+            size = 0
+            for rule in critical:
+                size += len(rule.encode('utf-8'))
+                if size > self.critical_budget:
+                    break
+                kept.append(rule)
+            css = ''.join(kept)
+        return css
+    
+    def process_images(self, html):
+        """
+        Rewrite <img> tags with responsive sources, dimensions and lazy loading.
+        
+        The first image of a page is loaded eagerly with high priority since it
+        is the most likely to be visible on the first screen.
+        
+        Args:
+            html (str): The page source.
+        
+        Returns:
+            str: The page with rewritten image tags.
+        """
+        first = [True]
+        
+        def rewrite(match):
+            attributes = parse_attributes(match.group(0))
+            src = attributes.get('src', '')
+            if not src:
+                return match.group(0)
+            
+            eager = first[0]
+            first[0] = False
+            
+            picture_sources = []
+            local_path = self._local_image_path(src)
+            if local_path:
+                derivatives = self._image_derivatives(local_path)
+                if derivatives:
+                    attributes['src'] = derivatives['fallback'][-1][0]
+                    attributes['srcset'] = ', '.join(f'{url} {w}w' for url, w in derivatives['fallback'])
+                    attributes['sizes'] = DEFAULT_SIZES
+                    attributes['width'] = str(derivatives['width'])
+                    attributes['height'] = str(derivatives['height'])
+                    if derivatives['webp']:
+                        srcset = ', '.join(f'{url} {w}w' for url, w in derivatives['webp'])
+                        picture_sources.append(f'<source type="image/webp" srcset="{srcset}" sizes="{DEFAULT_SIZES}">')
+            elif any(host in src for host in UNSPLASH_HOSTS):
+                # Unsplash resizes and picks a modern format on the fly from URL parameters
+                attributes['src'] = self._unsplash_url(src, self.widths[-1])
+                attributes['srcset'] = ', '.join(f'{self._unsplash_url(src, w)} {w}w' for w in self.widths)
+                attributes['sizes'] = DEFAULT_SIZES
+            
+            if eager:
+                attributes['fetchpriority'] = 'high'
+                attributes.pop('loading', None)
+            else:
+                attributes['loading'] = 'lazy'
+            attributes['decoding'] = 'async'
+            
+            img = render_tag('img', attributes, self_closing=True)
+            if picture_sources:
+                return f"<picture>{''.join(picture_sources)}{img}</picture>"
+            return img
+        
+        return IMG_TAG_RE.sub(rewrite, html)
+    
+    @staticmethod
+    def _unsplash_url(src, width):
+        """Return an Unsplash image URL resized to the given width with automatic format selection."""
+        src = src.replace('&amp;', '&')
+        src = re.sub(r'([?&])(w|auto)=[^&]*&?', r'\1', src).rstrip('&?')
+        separator = '&' if '?' in src else '?'
+        return f'{src}{separator}w={width}&auto=format'.replace('&', '&amp;')
+    
+    def _local_image_path(self, src):
+        """
+        Resolve an image reference to a local file, vendoring remote images if enabled.
+        
+        Args:
+            src (str): The <img> src attribute.
+        
+        Returns:
+            str: Path to the local image, or None if it is not available locally.
+        """
+        if re.match(r'^https?://', src):
+            if not self.vendor_images:
+                return None
+            return self._vendor_image(src)
+        
+        path = os.path.normpath(os.path.join(self.src_dir, src.split('?')[0]))
+        return path if os.path.isfile(path) else None
+    
+    def _vendor_image(self, url):
+        """Download a remote image into images/vendor/ (cached by URL) and return its path."""
+        vendor_dir = os.path.join(self.src_dir, 'images', 'vendor')
+        name = content_hash(url.encode('utf-8'), 16)
+        for ext in IMAGE_EXTENSIONS:
+            path = os.path.join(vendor_dir, name + ext)
+            if os.path.isfile(path):
+                return path
+        
+        try:
+            request = urllib.request.Request(url.replace('&amp;', '&'), headers={'User-Agent': 'Mozilla/5.0'})
+            with urllib.request.urlopen(request, timeout=30) as response:
+                data = response.read()
+                content_type = response.headers.get_content_type()
+        except Exception as e:
+            logger.warning(f"Could not vendor {url[:80]}: {str(e)}")
+            return None
+        
+        ext = {'image/png': '.png', 'image/webp': '.webp', 'image/gif': '.gif'}.get(content_type, '.jpg')
+        os.makedirs(vendor_dir, exist_ok=True)
+        path = os.path.join(vendor_dir, name + ext)
+        with open(path, 'wb') as f:
+            f.write(data)
+        logger.info(f"Vendored {url[:80]} -> {os.path.relpath(path, self.src_dir)}")
+        return path
+    
+    def _image_derivatives(self, path):
+        """
+        Generate resized JPEG/PNG and WebP derivatives of a local image.
+        
+        Args:
+            path (str): Path to the source image.
+        
+        Returns:
+            dict: 'fallback' and 'webp' lists of (url, width) tuples plus the
+                  intrinsic 'width' and 'height', or None if Pillow is unavailable.
+        """
+        if path in self._images:
+            return self._images[path]
+        
+        if Image is None:
+            logger.warning("Pillow is not installed; skipping image derivatives")
+            self._images[path] = None
+            return None
+        
+        with open(path, 'rb') as f:
+            source_hash = content_hash(f.read())
+        
+        with Image.open(path) as image:
+            image.load()
+            width, height = image.size
+            has_alpha = image.mode in ('RGBA', 'LA', 'P')
+            fallback_format = 'PNG' if has_alpha else 'JPEG'
+            fallback_ext = '.png' if has_alpha else '.jpg'
+            stem = re.sub(r'[^\w-]+', '-', os.path.splitext(os.path.basename(path))[0])
+            
+            targets = [w for w in self.widths if w < width] + [min(width, self.widths[-1])]
+            derivatives = {'fallback': [], 'webp': [], 'width': width, 'height': height}
+            
+            for target in sorted(set(targets)):
+                resized = image if target == width else image.resize(
+                    (target, round(height * target / width)), Image.LANCZOS)
+                if not has_alpha:
+                    resized = resized.convert('RGB')
+                
+                for fmt, ext, key, options in (
+                    (fallback_format, fallback_ext, 'fallback', {'optimize': True, 'quality': 80}),
+                    ('WEBP', '.webp', 'webp', {'quality': 75, 'method': 6})
+                ):
+                    name = f'{stem}-{target}.{source_hash}{ext}'
+                    resized.save(os.path.join(self.assets_dir, name), fmt, **options)
+                    derivatives[key].append((f'assets/{name}', target))
+        
+        # Report the dimensions of the largest derivative so the browser can reserve space
+        largest = derivatives['fallback'][-1][1]
+        derivatives['height'] = round(height * largest / width)
+        derivatives['width'] = largest
+        self._images[path] = derivatives
+        return derivatives
+    
+    @staticmethod
+    def minify_html(html):
+        """Strip comments and collapse whitespace between tags."""
+        html = re.sub(r'<!--(?!\[if).*?-->', '', html, flags=re.DOTALL)
+        html = re.sub(r'>\s+<', '> <', html)
+        html = re.sub(r'\n\s*\n+', '\n', html)
+        return html.strip() + '\n'
+    
+    def precompress(self):
+        """Write .gz (and .br, if brotli is installed) variants of text assets."""
+        for root, _, files in os.walk(self.out_dir):
+            for name in files:
+                if not name.endswith(PRECOMPRESS_EXTENSIONS):
+                    continue
+                path = os.path.join(root, name)
+                with open(path, 'rb') as f:
+                    data = f.read()
+                with open(path + '.gz', 'wb') as f:
+                    f.write(gzip.compress(data, compresslevel=9))
+                if brotli is not None:
+                    with open(path + '.br', 'wb') as f:
+                        f.write(brotli.compress(data, quality=11))
+
+def main(argv=None):
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description='Build the optimized travel site into an output directory.')
+    parser.add_argument('--src', default=ROOT_DIR, help='Source directory (default: repository root)')
+    parser.add_argument('--out', default=os.path.join(ROOT_DIR, 'dist'), help='Output directory (default: dist/)')
+    parser.add_argument('--widths', default=','.join(str(w) for w in DEFAULT_WIDTHS),
+                        help='Comma-separated responsive image widths')
+    parser.add_argument('--vendor-images', action='store_true',
+                        help='Download remote images into images/vendor/ and generate derivatives for them')
+    parser.add_argument('--critical-budget', type=int, default=DEFAULT_CRITICAL_BUDGET,
+                        help='Maximum bytes of CSS to inline per page')
+    args = parser.parse_args(argv)
+    
+    builder = SiteBuilder(
+        src_dir=args.src,
+        out_dir=args.out,
+        widths=[int(w) for w in args.widths.split(',') if w.strip()],
+        vendor_images=args.vendor_images,
+        critical_budget=args.critical_budget
+    )
+    pages = builder.build()
+    logger.info(f"Built {len(pages)} pages into {args.out}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
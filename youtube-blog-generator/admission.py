@@ -0,0 +1,211 @@
+"""
+Admission Control
+
+This module bounds how much blog generation work runs at once. Requests
+beyond the concurrency limit wait in per-session queues that are served
+round-robin, so one session cannot starve the others, and requests are
+rejected quickly (with a Retry-After estimate) once the queues are full.
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from dotenv import load_dotenv
+from metrics import register_collector
+from profiling import stage
+
+# Load environment variables
+load_dotenv()
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be admitted."""
+    
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class _Waiter:
+    """A queued request waiting for a slot."""
+    
+    def __init__(self, session_id):
+        self.session_id = session_id
+        self.event = threading.Event()
+        self.granted = False
+
+class AdmissionController:
+    """Bounded, per-session fair admission controller."""
+    
+    def __init__(self, max_concurrent=4, max_queue=32, max_per_session=2, queue_timeout=30.0):
+        """
+        Initialize the AdmissionController.
+        
+        Args:
+            max_concurrent (int): Requests allowed to run at the same time.
+            max_queue (int): Requests allowed to wait across all sessions.
+            max_per_session (int): Requests one session may have running or queued.
+            queue_timeout (float): Seconds a request may wait before it is rejected.
+        """
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_per_session = max_per_session
+        self.queue_timeout = queue_timeout
+        
+        self._lock = threading.Lock()
+        self._queues = OrderedDict()  # session_id -> deque of waiters, in round-robin order
+        self._queued = 0
+        self._running = 0
+        self._per_session = {}
+        self._avg_service_time = 30.0
+        self.stats = {'admitted': 0, 'rejected': 0, 'timed_out': 0}
+    
+    def _estimate_wait(self, position):
+        """Estimate seconds until a request at the given queue position would start."""
+        rounds = position // max(1, self.max_concurrent) + 1
+        return max(1.0, rounds * self._avg_service_time)
+    
+    def _reject(self, message, retry_after):
+        self.stats['rejected'] += 1
+        logger.warning(f"Admission rejected: {message}")
+        return AdmissionRejected(message, retry_after)
+    
+    def acquire(self, session_id):
+        """
+        Wait for a slot for a session.
+        
+        Args:
+            session_id (str): Identifier of the requesting session.
+        
+        Raises:
+            AdmissionRejected: If the session or global queue is full, or the wait times out.
+        """
+        with self._lock:
+            if self._per_session.get(session_id, 0) >= self.max_per_session:
+                raise self._reject(
+                    'Too many generation requests from this session are already in progress.',
+                    self._estimate_wait(0)
+                )
+            
+            if self._running < self.max_concurrent and not self._queued:
+                self._running += 1
+                self._per_session[session_id] = self._per_session.get(session_id, 0) + 1
+                self.stats['admitted'] += 1
+                return
+            
+            if self._queued >= self.max_queue:
+                raise self._reject('The server is busy. Please try again shortly.', self._estimate_wait(self._queued))
+            
+            waiter = _Waiter(session_id)
+            self._queues.setdefault(session_id, deque()).append(waiter)
+            self._queued += 1
+            self._per_session[session_id] = self._per_session.get(session_id, 0) + 1
+            position = self._queued
+        
+        if waiter.event.wait(self.queue_timeout):
+            return
+        
+        with self._lock:
+            if waiter.granted:
+                return
+            # Timed out while still queued: withdraw the request
+            queue = self._queues.get(session_id)
+            if queue and waiter in queue:
+                queue.remove(waiter)
+                if not queue:
+                    del self._queues[session_id]
+            self._queued -= 1
+            self._release_session(session_id)
+            self.stats['timed_out'] += 1
+            raise self._reject('Timed out waiting for a free generation slot.', self._estimate_wait(position))
+    
+    def release(self, session_id, service_time=None):
+        """
+        Release a slot and hand it to the next session in round-robin order.
+        
+        Args:
+            session_id (str): The session that held the slot.
+            service_time (float, optional): How long the request ran, used for Retry-After estimates.
+        """
+        with self._lock:
+            self._running -= 1
+            self._release_session(session_id)
+            if service_time is not None:
+                self._avg_service_time = 0.8 * self._avg_service_time + 0.2 * service_time
+            
+            while self._queues and self._running < self.max_concurrent:
+                next_session, queue = next(iter(self._queues.items()))
+                waiter = queue.popleft()
+                if queue:
+                    self._queues.move_to_end(next_session)
+                else:
+                    del self._queues[next_session]
+                
+                self._queued -= 1
+                self._running += 1
+                self.stats['admitted'] += 1
+                waiter.granted = True
+                waiter.event.set()
+    
+    def _release_session(self, session_id):
+        """Decrement a session's in-flight count (lock must be held)."""
+        count = self._per_session.get(session_id, 0) - 1
+        if count > 0:
+            self._per_session[session_id] = count
+        else:
+            self._per_session.pop(session_id, None)
+    
+    @contextmanager
+    def admit(self, session_id):
+        """
+        Context manager holding a slot for the duration of the block.
+        
+        Args:
+            session_id (str): Identifier of the requesting session.
+        """
+        with stage('admission_wait'):
+            self.acquire(session_id)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(session_id, time.monotonic() - started)
+    
+    def snapshot(self):
+        """Get current queue and concurrency figures for metrics."""
+        with self._lock:
+            return dict(self.stats, running=self._running, queued=self._queued, sessions=len(self._queues))
+
+def build_controller_from_env():
+    """
+    Build an AdmissionController from ADMISSION_* environment variables.
+    
+    Returns:
+        AdmissionController: The configured controller (also registered for /metrics).
+    """
+    controller = AdmissionController(
+        max_concurrent=int(os.getenv('ADMISSION_MAX_CONCURRENT', '4')),
+        max_queue=int(os.getenv('ADMISSION_MAX_QUEUE', '32')),
+        max_per_session=int(os.getenv('ADMISSION_MAX_PER_SESSION', '2')),
+        queue_timeout=float(os.getenv('ADMISSION_QUEUE_TIMEOUT', '30'))
+    )
+    
+    @register_collector
+    def _collect_admission_metrics():
+        snapshot = controller.snapshot()
+        return [
+            ('admission_running', 'gauge', 'Generation requests currently running', [({}, snapshot['running'])]),
+            ('admission_queued', 'gauge', 'Generation requests waiting for a slot', [({}, snapshot['queued'])]),
+            ('admission_queued_sessions', 'gauge', 'Sessions with queued requests', [({}, snapshot['sessions'])]),
+            ('admission_admitted_total', 'counter', 'Generation requests admitted', [({}, snapshot['admitted'])]),
+            ('admission_rejected_total', 'counter', 'Generation requests rejected', [({}, snapshot['rejected'])]),
+            ('admission_timed_out_total', 'counter', 'Generation requests that timed out in the queue',
+             [({}, snapshot['timed_out'])])
+        ]
+    
+    return controller
@@ -7,13 +7,23 @@ well-structured blog posts using the DeepSeek API.
 
 from flask import Flask, render_template, request, jsonify, redirect, url_for, session
 import os
-import json
 import logging
 import uuid
-from datetime import timedelta
+import hashlib
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from transcript_extractor import TranscriptExtractor
-from blog_generator import BlogGenerator
+from blog_generator import BlogGenerator, extractive_digest, MAX_TRANSCRIPT_CHARS
+from blog_store import BlogStore
+from compression import ResponseCompression
+from static_assets import StaticAssets
+from metrics import register_collector, render_metrics
+from admission import build_controller_from_env, AdmissionRejected
+from profiling import RequestProfiler, stage, submit_with_context
+from channel_watcher import build_watcher_from_env
+from exporter import EXPORT_FORMATS, stream_zip, stream_ndjson
+import click
 import markdown
 from flask_wtf.csrf import CSRFProtect
 
@@ -32,9 +42,74 @@ app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(hours=1)
 # Initialize CSRF protection
 csrf = CSRFProtect(app)
 
+# Compress responses and serve fingerprinted, precompressed static files
+app.config['COMPRESS_MIN_SIZE'] = int(os.getenv('COMPRESS_MIN_SIZE', '500'))
+compression = ResponseCompression(app)
+static_assets = StaticAssets(app)
+
+# Profile requests that carry the admin header or are picked by the sampling rate
+profiler = RequestProfiler(app)
+
 # Initialize components
-transcript_extractor = TranscriptExtractor()
+blog_store = BlogStore()
+transcript_extractor = TranscriptExtractor(store=blog_store)
 blog_generator = BlogGenerator()
+admission = build_controller_from_env()
+
+# Pre-warm transcripts and drafts for new uploads of the watched channels
+channel_watcher = build_watcher_from_env(transcript_extractor, blog_generator, blog_store, admission)
+if channel_watcher and os.getenv('WATCH_IN_APP', 'False').lower() == 'true':
+    channel_watcher.start()
+
+@register_collector
+def _collect_llm_metrics():
+    """Expose LLM request, hedge, fallback, token and response repair counters as metrics."""
+    stats = dict(blog_generator.llm.stats)
+    families = [
+        (f'llm_{key}_total', 'counter', f'LLM client {key.replace("_", " ")}', [({}, value)])
+        for key, value in stats.items()
+    ]
+    
+    # Token usage per backend; cached prompt tokens over prompt tokens is the prefix cache hit ratio
+    backends = blog_generator.llm.backends
+    for key in ('prompt_tokens', 'cached_prompt_tokens', 'completion_tokens'):
+        families.append((f'llm_{key}_total', 'counter', f'LLM {key.replace("_", " ")} reported by the provider',
+                         [({'backend': backend.name}, backend.usage[key]) for backend in backends]))
+    
+    # Responses whose JSON had to be repaired or completed with a continuation request
+    for key, value in dict(blog_generator.stats).items():
+        families.append((f'blog_responses_{key}_total', 'counter', f'Blog responses {key}', [({}, value)]))
+    return families
+
+def error_response(result):
+    """
+    Build the JSON error response for a failed component result.
+    
+    Results carrying 'retry_after' come from an open circuit breaker and are
+    returned as 503 with a Retry-After header so clients back off.
+    """
+    response = jsonify({
+        'success': False,
+        'error': result['error']
+    })
+    
+    if result.get('retry_after') is not None:
+        response.status_code = 503
+        response.headers['Retry-After'] = str(int(result['retry_after']) + 1)
+    else:
+        response.status_code = 400
+    
+    return response
+
+def rejected_response(error):
+    """Build the 429 response for a request the admission controller turned away."""
+    response = jsonify({
+        'success': False,
+        'error': str(error)
+    })
+    response.status_code = 429
+    response.headers['Retry-After'] = str(int(error.retry_after) + 1)
+    return response
 
 @app.route('/')
 def index():
@@ -71,9 +146,15 @@ def extract_transcript():
         result = transcript_extractor.get_transcript(youtube_url, language)
         
         if result['success']:
-            # Store transcript and video details in session for later use
-            session['transcript'] = result['transcript']
+            # Keep a reference to the stored transcript in the session; only a transcript
+            # that could not be stored is kept in the session itself
+            if result['stored']:
+                session.pop('transcript', None)
+            else:
+                session['transcript'] = result['transcript']
             session['video_id'] = result['video_id']
+            session['language'] = result.get('language', '')
+            session.pop('video_details', None)
             
             # Store video details if available
             if 'video_details' in result:
@@ -83,8 +164,7 @@ def extract_transcript():
             session.modified = True
             
             # Return success response with preview
-            preview_length = min(500, len(result['transcript']))
-            preview = result['transcript'][:preview_length] + ('...' if len(result['transcript']) > preview_length else '')
+            preview = result['preview'] + ('...' if result['length'] > len(result['preview']) else '')
             
             response_data = {
                 'success': True,
@@ -102,10 +182,7 @@ def extract_transcript():
         else:
             # Return error response
             logger.warning(f"Transcript extraction failed: {result['error']}")
-            return jsonify({
-                'success': False,
-                'error': result['error']
-            }), 400
+            return error_response(result)
     except Exception as e:
         logger.error(f"Error in extract_transcript: {str(e)}", exc_info=True)
         return jsonify({
@@ -113,6 +190,75 @@ def extract_transcript():
             'error': f'An unexpected error occurred: {str(e)}'
         }), 500
 
+def load_transcript(video_id, language):
+    """
+    Read the part of a stored transcript that blog generation uses.
+    
+    Args:
+        video_id (str): The YouTube video ID.
+        language (str): The transcript language code.
+    
+    Returns:
+        str: The transcript, cut one character past MAX_TRANSCRIPT_CHARS so
+             generate_blog still marks it as truncated, or None if not stored.
+    """
+    stored = blog_store.get_transcript(video_id, language or None, max_chars=MAX_TRANSCRIPT_CHARS + 1)
+    return stored['transcript'] if stored else None
+
+def get_session_transcript():
+    """Get the transcript of the current session, from the session or the store."""
+    if session.get('transcript'):
+        return session['transcript']
+    if not session.get('video_id'):
+        return None
+    return load_transcript(session['video_id'], session.get('language'))
+
+def parse_keywords(keywords):
+    """
+    Read keywords given as a list or a comma-separated string.
+    
+    Raises:
+        ValueError: If the keywords are neither.
+    """
+    if not keywords:
+        return []
+    if isinstance(keywords, str):
+        keywords = keywords.split(',')
+    if not isinstance(keywords, list) or not all(isinstance(k, str) for k in keywords):
+        raise ValueError('Keywords must be a list of strings or a comma-separated string.')
+    return [k.strip() for k in keywords if k.strip()]
+
+def parse_title(title):
+    """
+    Read a custom title.
+    
+    Raises:
+        ValueError: If the title is not a string.
+    """
+    if title is None:
+        return ''
+    if not isinstance(title, str):
+        raise ValueError('Title must be a string.')
+    return title.strip()
+
+def parse_blog_options(data):
+    """
+    Read the blog generation options from a request's JSON body.
+    
+    Raises:
+        ValueError: If the keywords or title are malformed.
+    """
+    return {
+        'length': data.get('length', 'medium'),
+        'style': data.get('style', 'professional'),
+        'keywords': parse_keywords(data.get('keywords')),
+        'title': parse_title(data.get('title'))
+    }
+
+def edit_owner(session_id):
+    """Get the opaque owner key under which a session's edited blogs are stored."""
+    return hashlib.sha256(session_id.encode('utf-8')).hexdigest()[:16]
+
 @app.route('/generate-blog', methods=['POST'])
 def generate_blog():
     """
@@ -123,17 +269,18 @@ def generate_blog():
     """
     try:
         data = request.get_json()
-        options = {
-            'length': data.get('length', 'medium'),
-            'style': data.get('style', 'professional'),
-            'keywords': [k.strip() for k in data.get('keywords', '').split(',')] if data.get('keywords') else [],
-            'title': data.get('title', '').strip()
-        }
+        try:
+            options = parse_blog_options(data)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
         
         logger.info(f"Generating blog with options: {options}")
         
-        # Get transcript from session
-        transcript = session.get('transcript')
+        # Get the transcript referenced by the session
+        transcript = get_session_transcript()
         
         if not transcript:
             return jsonify({
@@ -141,33 +288,371 @@ def generate_blog():
                 'error': 'No transcript found. Please extract a transcript first.'
             }), 400
         
+        video_id = session.get('video_id')
+        language = session.get('language', '')
+        
+        # Serve a previously generated blog for the same video and options
+        with stage('store_lookup'):
+            stored_blog = blog_store.find_blog(video_id, language, options) if video_id else None
+        if stored_blog:
+            logger.info(f"Serving stored blog {stored_blog['id']} for video {video_id}")
+            session['blog_content'] = stored_blog['blog_content']
+            session['blog_id'] = stored_blog['id']
+            session.modified = True
+            
+            return jsonify({
+                'success': True,
+                'redirect': url_for('result'),
+                'blog_id': stored_blog['id'],
+                'cached': True
+            })
+        
         # Add video details to options if available
         if 'video_details' in session:
             options['video_details'] = session['video_details']
             logger.info(f"Added video details to blog generation options")
         
-        # Generate blog
-        result = blog_generator.generate_blog(transcript, options)
+        # Generate blog, waiting for a fair share of the generation slots
+        session_id = session.get('session_id') or request.remote_addr
+        try:
+            with admission.admit(session_id):
+                result = blog_generator.generate_blog(transcript, options)
+        except AdmissionRejected as e:
+            return rejected_response(e)
         
         if result['success']:
+            # Persist the blog so it can be found and served again later
+            blog_id = None
+            if video_id:
+                try:
+                    with stage('store_save'):
+                        blog_id = blog_store.save_blog(video_id, language, options, result['blog_content'])
+                except Exception as e:
+                    logger.error(f"Failed to store blog for video {video_id}: {str(e)}", exc_info=True)
+            
             # Store blog content in session
             session['blog_content'] = result['blog_content']
+            session['blog_id'] = blog_id
             session.modified = True
             
             # Return success response
             return jsonify({
                 'success': True,
-                'redirect': url_for('result')
+                'redirect': url_for('result'),
+                'blog_id': blog_id
             })
         else:
             # Return error response
             logger.warning(f"Blog generation failed: {result['error']}")
+            return error_response(result)
+    except Exception as e:
+        logger.error(f"Error in generate_blog: {str(e)}", exc_info=True)
+        return jsonify({
+            'success': False,
+            'error': f'An unexpected error occurred: {str(e)}'
+        }), 500
+
+def get_transcript_digest(video_id, language, transcript=None):
+    """
+    Get the cached transcript digest for a video, building and storing it on first use.
+    
+    The digest is built from at most TRANSCRIPT_DIGEST_SOURCE_CHARS characters of the
+    transcript, so a multi-hour transcript is never loaded as a whole.
+    
+    Args:
+        video_id (str): The YouTube video ID.
+        language (str): The transcript language code.
+        transcript (str, optional): Transcript to fall back on if none is stored.
+    
+    Returns:
+        str: The digest, or None if no transcript is available.
+    """
+    digest = blog_store.get_digest(video_id, language)
+    if digest:
+        return digest
+    
+    source_chars = int(os.getenv('TRANSCRIPT_DIGEST_SOURCE_CHARS', '100000'))
+    stored_transcript = blog_store.get_transcript(video_id, language or None, max_chars=source_chars)
+    if stored_transcript:
+        transcript = stored_transcript['transcript']
+    if not transcript:
+        return None
+    transcript = transcript[:source_chars]
+    
+    digest = extractive_digest(transcript, int(os.getenv('TRANSCRIPT_DIGEST_CHARS', '3000')))
+    blog_store.save_digest(video_id, language, digest)
+    return digest
+
+def generate_variant(video_id, language, transcript, options, video_details, session_id):
+    """
+    Generate (or fetch from the store) the blog for one language of a fan-out request.
+    
+    Args:
+        video_id (str): The YouTube video ID.
+        language (str): The language code of the transcript and blog.
+        transcript (str): The transcript in that language, or None to read it from the store.
+        options (dict): Blog generation options.
+        video_details (dict): Video details shared by all languages.
+        session_id (str): Session used for admission control.
+    
+    Returns:
+        dict: The per-language result.
+    """
+    stored_blog = blog_store.find_blog(video_id, language, options)
+    if stored_blog:
+        return {
+            'success': True,
+            'blog_id': stored_blog['id'],
+            'blog_content': stored_blog['blog_content'],
+            'cached': True
+        }
+    
+    generation_transcript = transcript or load_transcript(video_id, language)
+    if not generation_transcript:
+        return {
+            'success': False,
+            'error': 'No transcript found. Please extract the transcript again.'
+        }
+    
+    variant_options = dict(options, language=language)
+    if video_details:
+        variant_options['video_details'] = video_details
+    
+    try:
+        with admission.admit(session_id):
+            result = blog_generator.generate_blog(generation_transcript, variant_options)
+    except AdmissionRejected as e:
+        return {
+            'success': False,
+            'error': str(e),
+            'retry_after': e.retry_after
+        }
+    
+    if not result['success']:
+        return result
+    
+    blog_id = None
+    try:
+        blog_id = blog_store.save_blog(video_id, language, options, result['blog_content'])
+    except Exception as e:
+        logger.error(f"Failed to store {language} blog for video {video_id}: {str(e)}", exc_info=True)
+    
+    return {
+        'success': True,
+        'blog_id': blog_id,
+        'blog_content': result['blog_content']
+    }
+
+@app.route('/generate-blogs', methods=['POST'])
+def generate_blogs():
+    """
+    Generate blog posts for one video in several languages.
+    
+    The transcripts are listed once and fetched or translated concurrently,
+    and the posts are generated on a bounded pool, sharing the video details.
+    
+    Request JSON:
+        youtube_url: The YouTube video URL.
+        languages: Language codes, as a list or a comma-separated string.
+        length, style, keywords, title: Blog generation options, as for /generate-blog.
+    
+    Returns:
+        JSON response with the blog for each language or error message.
+    """
+    try:
+        data = request.get_json()
+        youtube_url = data.get('youtube_url', '').strip()
+        languages = data.get('languages') or []
+        if isinstance(languages, str):
+            languages = languages.split(',')
+        languages = list(dict.fromkeys(l.strip() for l in languages if l and l.strip()))
+        try:
+            options = parse_blog_options(data)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+        
+        if not youtube_url or not languages:
+            return jsonify({
+                'success': False,
+                'error': 'A YouTube URL and at least one language are required.'
+            }), 400
+        
+        max_languages = int(os.getenv('FANOUT_MAX_LANGUAGES', '5'))
+        if len(languages) > max_languages:
             return jsonify({
                 'success': False,
-                'error': result['error']
+                'error': f'At most {max_languages} languages can be generated at once.'
             }), 400
+        
+        logger.info(f"Generating blogs in {', '.join(languages)} with options: {options}")
+        
+        extracted = transcript_extractor.get_transcripts(youtube_url, languages)
+        if not extracted['success']:
+            logger.warning(f"Transcript extraction failed: {extracted['error']}")
+            return error_response(extracted)
+        
+        video_id = extracted['video_id']
+        video_details = extracted.get('video_details')
+        session_id = session.get('session_id') or request.remote_addr
+        variants = {}
+        
+        # Generate on a pool no wider than the session's admission allowance
+        ready = [l for l in languages if extracted['transcripts'][l]['success']]
+        workers = max(1, min(len(ready), int(os.getenv('FANOUT_MAX_WORKERS', '3')), admission.max_per_session))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='fanout') as executor:
+            futures = {
+                language: submit_with_context(
+                    executor, generate_variant, video_id, language, extracted['transcripts'][language].get('transcript'),
+                    options, video_details, session_id
+                )
+                for language in ready
+            }
+            with stage('generate_variants'):
+                for language in languages:
+                    if language in futures:
+                        variants[language] = futures[language].result()
+                    else:
+                        variants[language] = extracted['transcripts'][language]
+        
+        succeeded = [l for l in languages if variants[l]['success']]
+        if succeeded:
+            # Show the first successful language on the result page
+            first = succeeded[0]
+            if extracted['transcripts'][first].get('transcript'):
+                session['transcript'] = extracted['transcripts'][first]['transcript']
+            else:
+                session.pop('transcript', None)
+            session['video_id'] = video_id
+            session['language'] = first
+            session['blog_content'] = variants[first]['blog_content']
+            session['blog_id'] = variants[first]['blog_id']
+            session.pop('video_details', None)
+            if video_details:
+                session['video_details'] = video_details
+            session.modified = True
+        
+        return jsonify({
+            'success': bool(succeeded),
+            'video_id': video_id,
+            'redirect': url_for('result') if succeeded else None,
+            'variants': {
+                language: {
+                    key: value for key, value in variants[language].items()
+                    if key in ('success', 'error', 'blog_id', 'blog_content', 'cached', 'retry_after')
+                }
+                for language in languages
+            }
+        })
     except Exception as e:
-        logger.error(f"Error in generate_blog: {str(e)}", exc_info=True)
+        logger.error(f"Error in generate_blogs: {str(e)}", exc_info=True)
+        return jsonify({
+            'success': False,
+            'error': f'An unexpected error occurred: {str(e)}'
+        }), 500
+
+@app.route('/regenerate', methods=['POST'])
+def regenerate():
+    """
+    Regenerate one element of a stored blog and merge it into the document.
+    
+    Request JSON:
+        blog_id: Blog to edit (defaults to the blog in the session).
+        element: 'section', 'faq', 'title', 'meta_description' or 'tags'.
+        index: Section index when element is 'section'.
+        keywords, title: Optional replacements for the stored generation options.
+    
+    The edited blog is stored as the session's own copy, keyed by the updated
+    options, so the shared blog served to other requests is never modified.
+    
+    Returns:
+        JSON response with the new element value and the edited blog's ID, or error message.
+    """
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({
+                'success': False,
+                'error': 'Request body must be a JSON object.'
+            }), 400
+        
+        blog_id = data.get('blog_id') or session.get('blog_id')
+        element = data.get('element', '')
+        index = data.get('index')
+        if not isinstance(element, str) or (index is not None and (not isinstance(index, int) or isinstance(index, bool))):
+            return jsonify({
+                'success': False,
+                'error': 'Element must be a string and index an integer.'
+            }), 400
+        
+        options_update = {}
+        try:
+            if 'keywords' in data:
+                options_update['keywords'] = parse_keywords(data['keywords'])
+            if 'title' in data:
+                options_update['title'] = parse_title(data['title'])
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+        
+        stored_blog = blog_store.get_blog(blog_id) if blog_id else None
+        if not stored_blog:
+            return jsonify({
+                'success': False,
+                'error': 'Blog not found. Please generate a blog first.'
+            }), 404
+        
+        session_id = session.get('session_id') or request.remote_addr
+        options = dict(stored_blog['options'], **options_update)
+        options['edited_by'] = edit_owner(session_id)
+        
+        digest = get_transcript_digest(
+            stored_blog['video_id'], stored_blog['language'],
+            session.get('transcript') if session.get('video_id') == stored_blog['video_id'] else None
+        )
+        if not digest:
+            return jsonify({
+                'success': False,
+                'error': 'No transcript found for this blog. Please extract the transcript again.'
+            }), 400
+        
+        logger.info(f"Regenerating {element} of blog {stored_blog['id']}")
+        
+        try:
+            with admission.admit(session_id):
+                result = blog_generator.regenerate_element(
+                    stored_blog['blog_content'], element, digest, options, index
+                )
+        except AdmissionRejected as e:
+            return rejected_response(e)
+        
+        if not result['success']:
+            logger.warning(f"Blog regeneration failed: {result['error']}")
+            return error_response(result)
+        
+        # Replaces the session's earlier copy with the same options, if any
+        edited_blog_id = blog_store.save_blog(
+            stored_blog['video_id'], stored_blog['language'], options, result['blog_content']
+        )
+        
+        if session.get('blog_id') == stored_blog['id']:
+            session['blog_id'] = edited_blog_id
+            session['blog_content'] = result['blog_content']
+            session.modified = True
+        
+        return jsonify({
+            'success': True,
+            'blog_id': edited_blog_id,
+            'element': element,
+            'index': index,
+            'value': result['value']
+        })
+    except Exception as e:
+        logger.error(f"Error in regenerate: {str(e)}", exc_info=True)
         return jsonify({
             'success': False,
             'error': f'An unexpected error occurred: {str(e)}'
@@ -189,15 +674,82 @@ def result():
         if isinstance(blog_content, dict) and 'content' in blog_content:
             # Check if content is in markdown format
             if blog_content['content'] and not blog_content['content'].startswith('<'):
-                blog_content['html_content'] = markdown.markdown(blog_content['content'], extensions=['extra'])
+                with stage('markdown'):
+                    blog_content['html_content'] = markdown.markdown(blog_content['content'], extensions=['extra'])
             else:
                 blog_content['html_content'] = blog_content['content']
         
-        return render_template('result.html', blog=blog_content, video_id=video_id)
+        with stage('render_template'):
+            return render_template('result.html', blog=blog_content, video_id=video_id)
     except Exception as e:
         logger.error(f"Error rendering result page: {str(e)}", exc_info=True)
         return render_template('error.html', error=f"An error occurred while rendering the blog: {str(e)}")
 
+@app.route('/blogs')
+def list_blogs():
+    """
+    List or search stored blogs.
+    
+    Query parameters:
+        q: Optional full-text search query.
+        video_id: Optional video ID filter.
+        page: Page number (default 1).
+        per_page: Results per page (default 20, max 100).
+    
+    Returns:
+        JSON response with a page of blog summaries.
+    """
+    try:
+        page = request.args.get('page', 1, type=int)
+        per_page = request.args.get('per_page', 20, type=int)
+        results = blog_store.list_blogs(
+            query=request.args.get('q', '').strip() or None,
+            video_id=request.args.get('video_id', '').strip() or None,
+            page=page,
+            per_page=per_page
+        )
+        
+        return jsonify(dict(results, success=True))
+    except Exception as e:
+        logger.error(f"Error in list_blogs: {str(e)}", exc_info=True)
+        return jsonify({
+            'success': False,
+            'error': f'An error occurred while listing blogs: {str(e)}'
+        }), 500
+
+@app.route('/blogs/<int:blog_id>')
+def get_blog(blog_id):
+    """
+    Fetch a stored blog by ID.
+    
+    Returns:
+        JSON response with the stored blog or error message.
+    """
+    stored_blog = blog_store.get_blog(blog_id)
+    
+    if not stored_blog:
+        return jsonify({
+            'success': False,
+            'error': f'Blog {blog_id} not found.'
+        }), 404
+    
+    return jsonify(dict(stored_blog, success=True))
+
+@app.route('/blogs/<int:blog_id>/view')
+def view_blog(blog_id):
+    """Load a stored blog into the session and show it on the result page."""
+    stored_blog = blog_store.get_blog(blog_id)
+    
+    if not stored_blog:
+        return render_template('error.html', error=f"Blog {blog_id} not found"), 404
+    
+    session['blog_content'] = stored_blog['blog_content']
+    session['blog_id'] = stored_blog['id']
+    session['video_id'] = stored_blog['video_id']
+    session.modified = True
+    
+    return redirect(url_for('result'))
+
 @app.route('/export', methods=['POST'])
 def export_blog():
     """
@@ -222,7 +774,7 @@ def export_blog():
         if export_format == 'json':
             return jsonify({
                 'success': True,
-                'content': json.dumps(blog_content, indent=2)
+                'content': blog_content
             })
         elif export_format == 'markdown':
             # Return markdown content
@@ -267,6 +819,74 @@ def export_blog():
             'error': f'An error occurred during export: {str(e)}'
         }), 500
 
+@app.route('/export/bulk')
+def export_bulk():
+    """
+    Stream many stored blogs as a ZIP or NDJSON archive.
+    
+    The archive is generated lazily, one post at a time, and sent with
+    chunked transfer encoding, so memory use does not grow with the export.
+    
+    Query parameters:
+        format: 'zip' (default; Markdown, HTML and JSON per post) or 'ndjson'.
+        ids: Optional comma-separated blog IDs, e.g. from /generate-blogs.
+        q: Optional full-text search query.
+        video_id: Optional video ID filter.
+    
+    Returns:
+        The streamed archive or a JSON error message.
+    """
+    export_format = request.args.get('format', 'zip')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({
+            'success': False,
+            'error': f'Unsupported export format: {export_format}'
+        }), 400
+    
+    ids = None
+    if request.args.get('ids'):
+        try:
+            ids = [int(i) for i in request.args['ids'].split(',') if i.strip()]
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'error': 'ids must be a comma-separated list of blog IDs.'
+            }), 400
+    
+    blogs = blog_store.iter_blogs(
+        ids=ids,
+        query=request.args.get('q', '').strip() or None,
+        video_id=request.args.get('video_id', '').strip() or None
+    )
+    stream = stream_zip(blogs) if export_format == 'zip' else stream_ndjson(blogs)
+    
+    response = app.response_class(stream, mimetype=EXPORT_FORMATS[export_format])
+    filename = f"blogs-{datetime.now().strftime('%Y%m%d-%H%M%S')}.{export_format}"
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+@app.route('/metrics')
+def metrics():
+    """Expose runtime metrics in the Prometheus text format."""
+    return app.response_class(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+@app.cli.command('watch-channels')
+@click.option('--once', is_flag=True, help='Poll the channels once and exit.')
+def watch_channels_command(once):
+    """Poll the channels in WATCH_CHANNEL_IDS and pre-warm new uploads."""
+    if not channel_watcher:
+        raise click.ClickException('Set WATCH_CHANNEL_IDS and YOUTUBE_API_KEY to watch channels.')
+    
+    if once:
+        result = channel_watcher.poll_once()
+        click.echo(f"Fetched {result['transcripts']} transcripts and generated {result['drafts']} drafts")
+        return
+    
+    try:
+        channel_watcher.run()
+    except KeyboardInterrupt:
+        channel_watcher.stop()
+
 @app.errorhandler(404)
 def page_not_found(e):
     """Handle 404 errors."""
@@ -5,11 +5,18 @@ This module handles the generation of blog posts from YouTube transcripts
 using the DeepSeek API for text processing and formatting.
 """
 
-import os
 import requests
+import re
+import copy
 import json
 import logging
+import threading
+from collections import Counter
 from dotenv import load_dotenv
+from llm_backends import build_client_from_env
+from circuit_breaker import CircuitOpenError
+from profiling import stage
+from partial_json import parse_partial_json
 
 # Load environment variables
 load_dotenv()
@@ -18,16 +25,179 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Fixed instructions and output schema. Keep this byte-stable: anything that
+# varies per request belongs in the user message built by _create_prompt,
+# otherwise the provider's prompt prefix cache stops matching.
+SYSTEM_PROMPT = """You are an expert content writer specializing in converting video transcripts into engaging, SEO-optimized blog posts that sound natural and human-written.
+
+Transform the YouTube video transcript in the user message into a well-structured, reader-friendly blog post. The user message lists the request details (video information when available, target length, writing style, keywords and an optional title suggestion) followed by the transcript.
+
+WRITING STYLE AND TONE:
+- Write in the requested writing style, in a way that sounds natural and human-written
+- Avoid overly formal academic language or robotic phrasing
+- Use conversational transitions between paragraphs
+- Vary sentence structure and length for better readability
+- Include occasional rhetorical questions to engage readers
+- Use active voice predominantly
+- Aim for the requested target length
+- When video information is given, use it to make the blog post more contextually relevant
+
+SEO OPTIMIZATION:
+- Include the requested keywords naturally throughout the text
+- Create an SEO-friendly title, building on the title suggestion if one is given
+- Include semantic variations of keywords
+- Optimize heading structure with relevant keywords
+- Create a meta description that includes primary keywords
+
+CONTENT STRUCTURE:
+1. An attention-grabbing title that includes primary keywords
+2. A compelling introduction that hooks the reader (150-200 words)
+3. Main content with proper H2 and H3 headings (organized by topics from the transcript)
+4. Use bullet points or numbered lists where appropriate
+5. Include 2-3 relevant examples or case studies from the transcript
+6. A conclusion with a clear call-to-action
+7. A FAQ section with 3-5 relevant questions and answers
+
+ADDITIONAL ELEMENTS:
+- Meta description (150-160 characters)
+- SEO title (50-60 characters)
+- 5 relevant tags
+- Suggested image descriptions for 2-3 places in the article
+
+Format the output as JSON with the following structure:
+{
+    "title": "SEO-Optimized Blog Title",
+    "meta_description": "Compelling meta description with keywords",
+    "seo_title": "Shorter SEO Title with Primary Keyword",
+    "tags": ["tag1", "tag2", "tag3", "tag4", "tag5"],
+    "content": "Full blog content with HTML formatting",
+    "sections": [
+        {"type": "introduction", "content": "Intro text"},
+        {"type": "heading", "level": 2, "content": "First H2 Heading"},
+        {"type": "paragraph", "content": "Paragraph text"},
+        {"type": "list", "style": "bullet", "items": ["Item 1", "Item 2", "Item 3"]},
+        {"type": "image_suggestion", "description": "Suggested image description", "placement": "after paragraph X"}
+    ],
+    "faq": [
+        {"question": "First question?", "answer": "Answer to first question"},
+        {"question": "Second question?", "answer": "Answer to second question"}
+    ]
+}"""
+
+REGENERATE_SYSTEM_PROMPT = """You are an expert content writer revising one element of an existing SEO-optimized blog post that was written from a YouTube video transcript.
+
+The user message lists the request details (target length, writing style, keywords and an optional title suggestion), the outline of the current blog post, the element to rewrite with its current value and surrounding context, and a digest of the most informative parts of the transcript.
+
+Rewrite only the requested element. Keep it consistent with the rest of the post, stay faithful to the transcript digest, write in the requested style, and include the requested keywords naturally where they fit.
+
+Return only JSON, using the structure for the requested element:
+- section: {"section": {"type": "<same type as the current section>", ...same fields as the current section}}
+- faq: {"faq": [{"question": "Question?", "answer": "Answer"}, ...]} with 3-5 entries
+- title: {"title": "SEO-Optimized Blog Title"}
+- meta_description: {"meta_description": "Compelling meta description with keywords (150-160 characters)"}
+- tags: {"tags": ["tag1", "tag2", "tag3", "tag4", "tag5"]}"""
+
+CONTINUATION_SYSTEM_PROMPT = """You are finishing an SEO-optimized blog post, written from a YouTube video transcript, whose JSON output was cut off before it was complete.
+
+The user message lists the request details, the keys that are missing, an outline of what was already written (including the end of the content and the last complete section where relevant) and a digest of the most informative parts of the transcript.
+
+Write only what is missing, consistent with what was already written. Do not repeat anything that is already there.
+
+Return only JSON containing the missing keys, using these structures:
+- content_continuation: "text that continues the content exactly where it stops, in the same format"
+- sections: [only the sections that come after the last complete section, each like {"type": "paragraph", "content": "..."}, {"type": "heading", "level": 2, "content": "..."} or {"type": "list", "style": "bullet", "items": ["..."]}]
+- faq: [{"question": "Question?", "answer": "Answer"}, ...] with the remaining entries for 3-5 in total
+- tags: ["tag", ...] with the remaining tags for 5 in total
+- title, seo_title, meta_description: the complete value as a string"""
+
+# Characters of transcript sent to the model; longer transcripts are truncated (adjust based on API limitations)
+MAX_TRANSCRIPT_CHARS = 10000
+
+# Keys of the blog JSON, in the order the model writes them
+BLOG_FIELDS = ['title', 'meta_description', 'seo_title', 'tags', 'content', 'sections', 'faq']
+
+# Output budget for the request that completes a truncated blog
+CONTINUATION_MAX_TOKENS = 1500
+
+# Elements that can be regenerated on their own, with the output budget for each
+REGENERATION_MAX_TOKENS = {
+    'section': 1000,
+    'faq': 1200,
+    'title': 100,
+    'meta_description': 150,
+    'tags': 100
+}
+
+_DIGEST_STOPWORDS = frozenset("""
+a about after all also an and any are as at be because been but by can could did do does for from get
+go going got had has have he her here him his how i if in into is it its just know like me more my no not
+now of on one or our out really right so some that the their them then there these they thing things
+this to up us very was we well were what when where which who will with would yeah you your
+""".split())
+
+def extractive_digest(transcript, max_chars=3000):
+    """
+    Condense a transcript to its most informative passages without an LLM call.
+    
+    The transcript is split into sentences (or fixed-size word windows when the
+    captions have no punctuation), each passage is scored by the frequency of
+    its content words across the whole transcript, and the best passages are
+    kept in their original order until max_chars is reached.
+    
+    Args:
+        transcript (str): The transcript text.
+        max_chars (int): Maximum length of the digest.
+    
+    Returns:
+        str: The digest.
+    """
+    if len(transcript) <= max_chars:
+        return transcript
+    
+    passages = [p.strip() for p in re.split(r'(?<=[.!?])\s+', transcript) if p.strip()]
+    if len(passages) < 5 or max(len(p) for p in passages) > 600:
+        words = transcript.split()
+        passages = [' '.join(words[i:i + 40]) for i in range(0, len(words), 40)]
+    
+    def content_words(text):
+        return [w for w in re.findall(r"[\w']+", text.lower()) if w not in _DIGEST_STOPWORDS and len(w) > 2]
+    
+    frequencies = Counter(content_words(transcript))
+    scores = []
+    for position, passage in enumerate(passages):
+        terms = content_words(passage)
+        score = sum(frequencies[t] for t in set(terms)) / (len(terms) + 5) if terms else 0
+        scores.append((score, position))
+    
+    # Always keep the opening passage, which usually frames the topic
+    selected = {0}
+    length = len(passages[0])
+    for score, position in sorted(scores, reverse=True):
+        if position in selected:
+            continue
+        if length + len(passages[position]) + 1 > max_chars:
+            continue
+        selected.add(position)
+        length += len(passages[position]) + 1
+    
+    return ' '.join(passages[position] for position in sorted(selected))[:max_chars]
+
 class BlogGenerator:
     """Class to handle blog generation using DeepSeek API."""
     
-    def __init__(self):
-        """Initialize the BlogGenerator with API credentials."""
-        self.api_key = os.getenv('DEEPSEEK_API_KEY')
-        # Updated with the correct DeepSeek API endpoint
-        self.api_url = os.getenv('DEEPSEEK_API_URL', 'https://api.deepseek.ai/v1/chat/completions')
+    def __init__(self, llm_client=None):
+        """
+        Initialize the BlogGenerator with API credentials.
+        
+        Args:
+            llm_client (HedgedLLMClient, optional): Client for the LLM backends.
+                                                    Defaults to one configured from environment variables.
+        """
+        self.llm = llm_client or build_client_from_env()
+        self.stats = {'repaired': 0, 'continuations': 0, 'unparseable': 0}
+        self._stats_lock = threading.Lock()
         
-        if not self.api_key:
+        if not self.llm.backends:
             logger.warning("DEEPSEEK_API_KEY not found in environment variables.")
     
     def generate_blog(self, transcript, options):
@@ -42,6 +212,7 @@ class BlogGenerator:
                 - 'keywords': List of keywords to include
                 - 'title': Optional custom title
                 - 'video_details': Optional video details from YouTube API
+                - 'language': Optional language code the blog should be written in
         
         Returns:
             dict: A dictionary containing:
@@ -69,6 +240,7 @@ class BlogGenerator:
             keywords = options.get('keywords', [])
             custom_title = options.get('title', '')
             video_details = options.get('video_details', None)
+            language = options.get('language')
             
             # Map length to word count
             word_count_map = {
@@ -79,20 +251,30 @@ class BlogGenerator:
             target_word_count = word_count_map.get(length, 800)
             
             # Handle large transcripts by truncating if necessary
-            max_transcript_length = 10000  # Adjust based on API limitations
-            if len(transcript) > max_transcript_length:
-                logger.warning(f"Transcript exceeds {max_transcript_length} characters. Truncating.")
-                transcript = transcript[:max_transcript_length] + "... (truncated)"
+            if len(transcript) > MAX_TRANSCRIPT_CHARS:
+                logger.warning(f"Transcript exceeds {MAX_TRANSCRIPT_CHARS} characters. Truncating.")
+                transcript = transcript[:MAX_TRANSCRIPT_CHARS] + "... (truncated)"
             
             # Create prompt for DeepSeek API
-            prompt = self._create_prompt(transcript, target_word_count, style, keywords, custom_title, video_details)
+            with stage('build_prompt'):
+                prompt = self._create_prompt(transcript, target_word_count, style, keywords, custom_title, video_details,
+                                             language)
             
             # Call DeepSeek API
-            response = self._call_deepseek_api(prompt)
+            with stage('llm_call'):
+                response = self._call_deepseek_api(prompt)
             
             # Process the response
             if response and 'choices' in response:
-                blog_content = self._process_api_response(response)
+                with stage('parse_response'):
+                    blog_content, missing = self._process_api_response(response)
+                
+                # Output cut off at the token limit: request only what is missing
+                if missing:
+                    with stage('continuation'):
+                        request_details = prompt.split("\n\nTRANSCRIPT:")[0]
+                        blog_content = self._complete_blog(blog_content, missing, transcript, request_details)
+                blog_content = self._finalize_blog(blog_content)
                 
                 # Add video details to blog content if available
                 if video_details and isinstance(blog_content, dict):
@@ -113,7 +295,14 @@ class BlogGenerator:
                     'success': False,
                     'error': 'Failed to generate blog content from API response.'
                 }
-                
+        
+        except CircuitOpenError as e:
+            logger.warning(f"Blog generation rejected: {str(e)}")
+            return {
+                'success': False,
+                'error': 'The AI service is temporarily unavailable. Please try again shortly.',
+                'retry_after': e.retry_after
+            }
         except requests.exceptions.Timeout:
             logger.error("API request timed out")
             return {
@@ -133,9 +322,13 @@ class BlogGenerator:
                 'error': f'An error occurred during blog generation: {str(e)}'
             }
     
-    def _create_prompt(self, transcript, word_count, style, keywords, custom_title, video_details=None):
+    def _create_prompt(self, transcript, word_count, style, keywords, custom_title, video_details=None, language=None):
         """
-        Create a prompt for the DeepSeek API based on the transcript and options.
+        Create the per-request part of the prompt.
+        
+        The fixed instructions and output schema live in SYSTEM_PROMPT, so every
+        request starts with the same bytes and the provider can serve that prefix
+        from its prompt cache. Only the request details and transcript vary.
         
         Args:
             transcript (str): The YouTube video transcript.
@@ -144,151 +337,296 @@ class BlogGenerator:
             keywords (list): Keywords to include.
             custom_title (str): Optional custom title.
             video_details (dict): Optional video details from YouTube API.
-            
+            language (str): Optional language code the blog should be written in.
+        
         Returns:
-            str: The formatted prompt for the API.
+            str: The user message for the API.
         """
-        keywords_str = ", ".join(keywords) if keywords else "relevant keywords"
-        
-        # Add video details to the prompt if available
-        video_context = ""
+        # Per-video context first, so requests for the same video share it too
+        lines = ["REQUEST DETAILS:"]
         if video_details:
-            video_context = f"""
-            This blog is based on a YouTube video titled: "{video_details.get('title', '')}"
-            Channel: {video_details.get('channel_title', '')}
-            Published: {video_details.get('published_at', '').split('T')[0] if video_details.get('published_at') else ''}
-            
-            Video tags: {', '.join(video_details.get('tags', [])[:10]) if video_details.get('tags') else 'None'}
-            Category: {video_details.get('category_id', '')}
-            
-            Use this information to create a more contextually relevant blog post.
-            """
-        
-        prompt = f"""
-        You are an expert content writer specializing in creating engaging, SEO-optimized blog posts from video transcripts.
-        
-        Transform the following YouTube video transcript into a well-structured, reader-friendly blog post of approximately {word_count} words.
-        
-        {video_context}
-        
-        WRITING STYLE AND TONE:
-        - Write in a {style} style that sounds natural and human-written
-        - Avoid overly formal academic language or robotic phrasing
-        - Use conversational transitions between paragraphs
-        - Vary sentence structure and length for better readability
-        - Include occasional rhetorical questions to engage readers
-        - Use active voice predominantly
-        
-        SEO OPTIMIZATION:
-        - Include the following keywords naturally throughout the text: {keywords_str}
-        - Create an SEO-friendly title {f'(using the suggestion: {custom_title})' if custom_title else ''}
-        - Include semantic variations of keywords
-        - Optimize heading structure with relevant keywords
-        - Create a meta description that includes primary keywords
-        
-        CONTENT STRUCTURE:
-        1. An attention-grabbing title that includes primary keywords
-        2. A compelling introduction that hooks the reader (150-200 words)
-        3. Main content with proper H2 and H3 headings (organized by topics from the transcript)
-        4. Use bullet points or numbered lists where appropriate
-        5. Include 2-3 relevant examples or case studies from the transcript
-        6. A conclusion with a clear call-to-action
-        7. A FAQ section with 3-5 relevant questions and answers
-        
-        ADDITIONAL ELEMENTS:
-        - Meta description (150-160 characters)
-        - SEO title (50-60 characters)
-        - 5 relevant tags
-        - Suggested image descriptions for 2-3 places in the article
-        
-        Format the output as JSON with the following structure:
-        {{
-            "title": "SEO-Optimized Blog Title",
-            "meta_description": "Compelling meta description with keywords",
-            "seo_title": "Shorter SEO Title with Primary Keyword",
-            "tags": ["tag1", "tag2", "tag3", "tag4", "tag5"],
-            "content": "Full blog content with HTML formatting",
-            "sections": [
-                {{"type": "introduction", "content": "Intro text"}},
-                {{"type": "heading", "level": 2, "content": "First H2 Heading"}},
-                {{"type": "paragraph", "content": "Paragraph text"}},
-                {{"type": "list", "style": "bullet", "items": ["Item 1", "Item 2", "Item 3"]}},
-                {{"type": "image_suggestion", "description": "Suggested image description", "placement": "after paragraph X"}}
-            ],
-            "faq": [
-                {{"question": "First question?", "answer": "Answer to first question"}},
-                {{"question": "Second question?", "answer": "Answer to second question"}}
+            published_at = video_details.get('published_at', '')
+            tags = video_details.get('tags', [])[:10]
+            lines += [
+                f"- Video title: \"{video_details.get('title', '')}\"",
+                f"- Channel: {video_details.get('channel_title', '')}",
+                f"- Published: {published_at.split('T')[0] if published_at else ''}",
+                f"- Video tags: {', '.join(tags) if tags else 'None'}",
+                f"- Category: {video_details.get('category_id', '')}"
             ]
-        }}
         
-        Here's the transcript:
-        {transcript}
-        """
+        lines += [
+            f"- Target length: approximately {word_count} words",
+            f"- Writing style: {style}",
+            f"- Keywords: {', '.join(keywords) if keywords else 'choose relevant keywords'}",
+            f"- Title suggestion: {custom_title if custom_title else 'none'}"
+        ]
+        if language:
+            lines.append(f"- Output language: {language} (write the whole blog post in this language)")
+        
+        lines += [
+            "",
+            "TRANSCRIPT:",
+            transcript
+        ]
+        prompt = "\n".join(lines)
         
         return prompt
     
-    def _call_deepseek_api(self, prompt):
+    def regenerate_element(self, blog_content, element, digest, options, index=None):
         """
-        Call the DeepSeek API with the given prompt.
+        Regenerate a single element of an existing blog post and merge it back in.
+        
+        Only the element, an outline of the post and a transcript digest are sent,
+        so an edit costs a small fraction of the tokens and latency of a full run.
         
         Args:
-            prompt (str): The prompt for the API.
-            
+            blog_content (dict): The current blog content.
+            element (str): One of 'section', 'faq', 'title', 'meta_description' or 'tags'.
+            digest (str): Condensed transcript (see extractive_digest).
+            options (dict): Generation options ('length', 'style', 'keywords', 'title').
+            index (int, optional): Index into 'sections' when element is 'section'.
+        
         Returns:
-            dict: The API response.
+            dict: A dictionary containing:
+                - 'success' (bool): Whether the regeneration was successful
+                - 'blog_content' (dict): The merged blog content if successful
+                - 'value': The new value of the element if successful
+                - 'error' (str): Error message if not successful
         """
-        if not self.api_key:
-            raise ValueError("DeepSeek API key is not set. Please set the DEEPSEEK_API_KEY environment variable.")
-        
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.api_key}"
-        }
-        
-        # Updated with the correct model name and parameters
-        data = {
-            "model": os.getenv('DEEPSEEK_MODEL', 'deepseek-chat'),
-            "messages": [
-                {"role": "system", "content": "You are an expert content writer specializing in converting video transcripts into engaging, SEO-optimized blog posts that sound natural and human-written."},
-                {"role": "user", "content": prompt}
-            ],
-            "temperature": 0.7,
-            "max_tokens": 4000,
-            "top_p": 1,
-            "frequency_penalty": 0.2,
-            "presence_penalty": 0.1
-        }
-        
         try:
-            # Added timeout parameter
-            response = requests.post(
-                self.api_url, 
-                headers=headers, 
-                data=json.dumps(data),
-                timeout=60  # 60 second timeout
-            )
+            if element not in REGENERATION_MAX_TOKENS:
+                return {
+                    'success': False,
+                    'error': f"Unsupported element: {element}. Choose one of: {', '.join(REGENERATION_MAX_TOKENS)}."
+                }
+            
+            sections = blog_content.get('sections') or []
+            if element == 'section':
+                if not isinstance(index, int) or not 0 <= index < len(sections):
+                    return {
+                        'success': False,
+                        'error': f'Section index must be between 0 and {len(sections) - 1}.'
+                    }
+                if sections[index].get('type') == 'image_suggestion':
+                    return {
+                        'success': False,
+                        'error': 'Image suggestions cannot be regenerated.'
+                    }
             
-            response.raise_for_status()  # Raise exception for 4XX/5XX responses
+            with stage('build_prompt'):
+                prompt = self._create_regeneration_prompt(blog_content, element, index, digest, options)
             
-            return response.json()
-        except requests.exceptions.HTTPError as e:
-            status_code = e.response.status_code
-            error_message = f"API request failed with status code {status_code}"
+            with stage('llm_call'):
+                response = self._call_deepseek_api(
+                    prompt,
+                    system_prompt=REGENERATE_SYSTEM_PROMPT,
+                    max_tokens=REGENERATION_MAX_TOKENS[element]
+                )
             
-            try:
-                error_data = e.response.json()
-                if 'error' in error_data:
-                    error_message += f": {error_data['error']}"
-            except:
-                error_message += f": {e.response.text}"
+            with stage('parse_response'):
+                value = self._parse_regenerated_element(response, element, sections[index] if element == 'section' else None)
             
-            logger.error(error_message)
-            raise Exception(error_message)
+            if value is None:
+                logger.error(f"Unexpected regeneration response for {element}: {response}")
+                return {
+                    'success': False,
+                    'error': f'Failed to regenerate the {element.replace("_", " ")} from the API response.'
+                }
+            
+            return {
+                'success': True,
+                'blog_content': self._merge_element(blog_content, element, index, value),
+                'value': value
+            }
+        
+        except CircuitOpenError as e:
+            logger.warning(f"Blog regeneration rejected: {str(e)}")
+            return {
+                'success': False,
+                'error': 'The AI service is temporarily unavailable. Please try again shortly.',
+                'retry_after': e.retry_after
+            }
         except requests.exceptions.Timeout:
             logger.error("API request timed out")
-            raise requests.exceptions.Timeout("Request to DeepSeek API timed out")
+            return {
+                'success': False,
+                'error': 'The request to the DeepSeek API timed out. Please try again later.'
+            }
         except requests.exceptions.ConnectionError:
-            logger.error("Connection error")
+            logger.error("Connection error when calling API")
+            return {
+                'success': False,
+                'error': 'Could not connect to the DeepSeek API. Please check your internet connection and try again.'
+            }
+        except Exception as e:
+            logger.error(f"Error during blog regeneration: {str(e)}", exc_info=True)
+            return {
+                'success': False,
+                'error': f'An error occurred during blog regeneration: {str(e)}'
+            }
+    
+    def _create_regeneration_prompt(self, blog_content, element, index, digest, options):
+        """
+        Create the user message for regenerating one element.
+        
+        Args:
+            blog_content (dict): The current blog content.
+            element (str): The element to regenerate.
+            index (int): Section index when element is 'section'.
+            digest (str): Condensed transcript.
+            options (dict): Generation options.
+        
+        Returns:
+            str: The user message for the API.
+        """
+        keywords = options.get('keywords') or []
+        sections = blog_content.get('sections') or []
+        headings = [s.get('content', '') for s in sections if s.get('type') == 'heading']
+        
+        lines = [
+            "REQUEST DETAILS:",
+            f"- Target length of the whole post: {options.get('length', 'medium')}",
+            f"- Writing style: {options.get('style', 'professional')}",
+            f"- Keywords: {', '.join(keywords) if keywords else 'choose relevant keywords'}",
+            f"- Title suggestion: {options.get('title') or 'none'}",
+            "",
+            "CURRENT BLOG OUTLINE:",
+            f"- Title: {blog_content.get('title', '')}",
+        ]
+        lines += [f"- Heading: {heading}" for heading in headings]
+        lines += ["", f"ELEMENT TO REWRITE: {element}"]
+        
+        if element == 'section':
+            for label, neighbour in (('Previous section', index - 1), ('Next section', index + 1)):
+                if 0 <= neighbour < len(sections):
+                    lines.append(f"{label}: {json.dumps(sections[neighbour], ensure_ascii=False)[:600]}")
+            lines.append(f"Current value: {json.dumps(sections[index], ensure_ascii=False)}")
+        else:
+            lines.append(f"Current value: {json.dumps(blog_content.get(element), ensure_ascii=False)}")
+            introduction = next((s.get('content', '') for s in sections if s.get('type') == 'introduction'), '')
+            if introduction and element != 'faq':
+                lines.append(f"Introduction: {introduction[:800]}")
+        
+        lines += ["", "TRANSCRIPT DIGEST:", digest]
+        return "\n".join(lines)
+    
+    def _parse_regenerated_element(self, response, element, current_section=None):
+        """
+        Extract and validate the regenerated element from an API response.
+        
+        Args:
+            response (dict): The API response.
+            element (str): The element that was regenerated.
+            current_section (dict, optional): The section being replaced.
+        
+        Returns:
+            The new value, or None if the response does not contain a valid one.
+        """
+        try:
+            data, complete, _ = parse_partial_json(response['choices'][0]['message']['content'])
+        except (KeyError, IndexError, TypeError, ValueError):
+            return None
+        if not complete:
+            # A cut-off element would replace a complete one with less
+            return None
+        
+        value = data.get(element) if isinstance(data, dict) else None
+        
+        if element == 'section':
+            if not isinstance(value, dict):
+                return None
+            # Keep the section's type and layout fields; only the text changes
+            value = dict(current_section, **{k: v for k, v in value.items() if k not in ('type', 'level', 'style')})
+            return value
+        if element == 'faq':
+            if not isinstance(value, list):
+                return None
+            value = [item for item in value if isinstance(item, dict) and item.get('question') and item.get('answer')]
+            return value or None
+        if element == 'tags':
+            if not isinstance(value, list):
+                return None
+            value = [str(tag).strip() for tag in value if str(tag).strip()]
+            return value or None
+        
+        return value.strip() if isinstance(value, str) and value.strip() else None
+    
+    def _merge_element(self, blog_content, element, index, value):
+        """
+        Merge a regenerated element into a copy of the blog content.
+        
+        The structured field is replaced, and the old text is swapped for the new
+        text in the rendered 'content' so both stay in sync.
+        
+        Args:
+            blog_content (dict): The current blog content.
+            element (str): The regenerated element.
+            index (int): Section index when element is 'section'.
+            value: The new value.
+        
+        Returns:
+            dict: The merged blog content.
+        """
+        merged = copy.deepcopy(blog_content)
+        replacements = []
+        
+        if element == 'section':
+            old = merged['sections'][index]
+            merged['sections'][index] = value
+            replacements.append((old.get('content'), value.get('content')))
+            replacements.extend(zip(old.get('items') or [], value.get('items') or []))
+        elif element == 'faq':
+            for old, new in zip(merged.get('faq') or [], value):
+                replacements.append((old.get('question'), new['question']))
+                replacements.append((old.get('answer'), new['answer']))
+            merged['faq'] = value
+        else:
+            if element == 'title':
+                replacements.append((merged.get('title'), value))
+            merged[element] = value
+        
+        content = merged.get('content')
+        if isinstance(content, str):
+            for old, new in replacements:
+                if isinstance(old, str) and isinstance(new, str) and old and old in content:
+                    content = content.replace(old, new, 1)
+            merged['content'] = content
+        
+        return merged
+    
+    def _call_deepseek_api(self, prompt, system_prompt=SYSTEM_PROMPT, max_tokens=4000):
+        """
+        Call the configured LLM backends (DeepSeek by default) with the given prompt.
+        
+        Slow requests are hedged to the fallback backend, if one is configured.
+        
+        Args:
+            prompt (str): The prompt for the API.
+            system_prompt (str): The byte-stable system message.
+            max_tokens (int): Maximum number of tokens to generate.
+        
+        Returns:
+            dict: The API response.
+        """
+        if not self.llm.backends:
+            raise ValueError("DeepSeek API key is not set. Please set the DEEPSEEK_API_KEY environment variable.")
+        
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": prompt}
+        ]
+        
+        try:
+            return self.llm.complete(
+                messages,
+                temperature=0.7,
+                max_tokens=max_tokens,
+                top_p=1,
+                frequency_penalty=0.2,
+                presence_penalty=0.1
+            )
+        except (requests.exceptions.Timeout, requests.exceptions.ConnectionError, CircuitOpenError):
             raise
         except Exception as e:
             logger.error(f"Error calling DeepSeek API: {str(e)}", exc_info=True)
@@ -298,53 +636,143 @@ class BlogGenerator:
         """
         Process the API response to extract the blog content.
         
+        The JSON is parsed with a tolerant parser, so small defects (trailing
+        commas, raw newlines in strings) are repaired, and output cut off at
+        the token limit keeps every complete field and section.
+        
         Args:
             response (dict): The API response.
-            
+        
         Returns:
-            dict: The processed blog content.
+            tuple: The processed blog content and the list of BLOG_FIELDS that
+                   are missing or were cut off and should be completed.
         """
         # Extract the content from the API response
         content = response['choices'][0]['message']['content']
         
-        # Try to parse the JSON content
         try:
-            # Find JSON in the response (in case there's additional text)
-            json_start = content.find('{')
-            json_end = content.rfind('}') + 1
-            
-            if json_start >= 0 and json_end > json_start:
-                json_content = content[json_start:json_end]
-                blog_data = json.loads(json_content)
-                
-                # Validate the blog data structure
-                required_fields = ['title', 'content']
-                for field in required_fields:
-                    if field not in blog_data:
-                        logger.warning(f"Required field '{field}' missing from API response")
-                        blog_data[field] = f"Generated {field.capitalize()}"
-                
-                return blog_data
-            else:
-                # If no JSON found, return the raw content
-                logger.warning("No JSON structure found in API response")
-                return {
-                    "title": "Generated Blog Post",
-                    "content": content,
-                    "sections": [{
-                        "type": "paragraph", 
-                        "content": content
-                    }]
-                }
-                
-        except json.JSONDecodeError as e:
-            # If JSON parsing fails, return the raw content
+            blog_data, complete, partial_keys = parse_partial_json(content)
+        except ValueError as e:
             logger.error(f"Failed to parse JSON from API response: {str(e)}")
+            blog_data = None
+        
+        if not blog_data:
+            # If no usable JSON was found, return the raw content
+            logger.warning("No JSON structure found in API response")
+            self._count('unparseable')
             return {
                 "title": "Generated Blog Post",
                 "content": content,
                 "sections": [{
-                    "type": "paragraph", 
+                    "type": "paragraph",
                     "content": content
                 }]
-            }
+            }, []
+        
+        missing = []
+        if not complete:
+            finish_reason = response['choices'][0].get('finish_reason')
+            logger.warning(f"Blog JSON was cut off (finish_reason={finish_reason}); "
+                           f"recovered fields: {', '.join(blog_data)}")
+            self._count('repaired')
+            
+            for key in partial_keys:
+                value = blog_data.get(key)
+                # A cut-off content string or list is kept and continued; anything else is redone
+                if not (key == 'content' and isinstance(value, str)) and not isinstance(value, list):
+                    blog_data.pop(key, None)
+            missing = [key for key in BLOG_FIELDS if key not in blog_data or key in partial_keys]
+        
+        return blog_data, missing
+    
+    def _complete_blog(self, blog_data, missing, transcript, request_details):
+        """
+        Ask for only the missing parts of a truncated blog and merge them in.
+        
+        If the continuation request fails, the recovered content is kept as is.
+        
+        Args:
+            blog_data (dict): The recovered blog content.
+            missing (list): Keys that are missing or were cut off.
+            transcript (str): The transcript the blog was written from.
+            request_details (str): The request details part of the original prompt.
+        
+        Returns:
+            dict: The completed blog content.
+        """
+        self._count('continuations')
+        sections = blog_data.get('sections') or []
+        headings = [s.get('content', '') for s in sections if s.get('type') == 'heading']
+        
+        lines = [
+            request_details,
+            "",
+            f"MISSING KEYS: {', '.join('content_continuation' if k == 'content' and blog_data.get('content') else k for k in missing)}",
+            "",
+            "ALREADY WRITTEN:",
+            f"- Title: {blog_data.get('title', '')}"
+        ]
+        lines += [f"- Heading: {heading}" for heading in headings]
+        if 'content' in missing and blog_data.get('content'):
+            lines.append(f"- Content ends with: {blog_data['content'][-600:]}")
+        if 'sections' in missing and sections:
+            lines.append(f"- Last complete section: {json.dumps(sections[-1], ensure_ascii=False)[:600]}")
+        for key in ('faq', 'tags'):
+            if key in missing and blog_data.get(key):
+                lines.append(f"- {key}: {json.dumps(blog_data[key], ensure_ascii=False)}")
+        lines += ["", "TRANSCRIPT DIGEST:", extractive_digest(transcript)]
+        
+        try:
+            response = self._call_deepseek_api(
+                "\n".join(lines),
+                system_prompt=CONTINUATION_SYSTEM_PROMPT,
+                max_tokens=CONTINUATION_MAX_TOKENS
+            )
+            continuation, _, _ = parse_partial_json(response['choices'][0]['message']['content'])
+        except Exception as e:
+            logger.warning(f"Continuation request failed, keeping the recovered blog: {str(e)}")
+            return blog_data
+        
+        if not isinstance(continuation, dict):
+            logger.warning("Continuation response contained no JSON, keeping the recovered blog")
+            return blog_data
+        
+        for key in missing:
+            if key == 'content' and isinstance(continuation.get('content_continuation'), str):
+                blog_data['content'] = blog_data.get('content', '') + continuation['content_continuation']
+            elif key == 'content' and isinstance(continuation.get('content'), str):
+                blog_data['content'] = blog_data.get('content', '') + continuation['content']
+            elif isinstance(blog_data.get(key), list) and isinstance(continuation.get(key), list):
+                blog_data[key] = blog_data[key] + continuation[key]
+            elif continuation.get(key):
+                blog_data[key] = continuation[key]
+        
+        logger.info(f"Completed truncated blog with: {', '.join(k for k in missing if k in blog_data)}")
+        return blog_data
+    
+    def _finalize_blog(self, blog_data):
+        """Fill in required fields that are still missing after parsing and continuation."""
+        if not blog_data.get('content') and blog_data.get('sections'):
+            # Rebuild the body from the structured sections
+            parts = []
+            for section in blog_data['sections']:
+                if section.get('type') == 'heading':
+                    parts.append(f"{'#' * int(section.get('level', 2))} {section.get('content', '')}")
+                elif section.get('type') == 'list':
+                    parts.append('\n'.join(f"- {item}" for item in section.get('items', [])))
+                elif section.get('content'):
+                    parts.append(section['content'])
+            blog_data['content'] = '\n\n'.join(parts)
+        
+        # Validate the blog data structure
+        required_fields = ['title', 'content']
+        for field in required_fields:
+            if field not in blog_data:
+                logger.warning(f"Required field '{field}' missing from API response")
+                blog_data[field] = f"Generated {field.capitalize()}"
+        
+        return blog_data
+    
+    def _count(self, key):
+        with self._stats_lock:
+            self.stats[key] += 1
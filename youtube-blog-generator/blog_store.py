@@ -0,0 +1,611 @@
+"""
+Blog Store
+
+This module provides a persistent local repository of extracted transcripts
+and generated blog posts, backed by SQLite with an FTS5 full-text index.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from dotenv import load_dotenv
+from transcript_buffer import TranscriptBuffer
+
+# Load environment variables
+load_dotenv()
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transcripts (
+    video_id TEXT NOT NULL,
+    language TEXT NOT NULL,
+    transcript TEXT NOT NULL,
+    video_details TEXT,
+    created_at REAL NOT NULL,
+    source_language TEXT,
+    PRIMARY KEY (video_id, language)
+);
+
+CREATE TABLE IF NOT EXISTS blogs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    video_id TEXT NOT NULL,
+    language TEXT NOT NULL,
+    options_key TEXT NOT NULL,
+    options TEXT NOT NULL,
+    title TEXT NOT NULL,
+    blog_content TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    UNIQUE (video_id, language, options_key)
+);
+
+CREATE TABLE IF NOT EXISTS transcript_digests (
+    video_id TEXT NOT NULL,
+    language TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (video_id, language)
+);
+
+CREATE TABLE IF NOT EXISTS watched_channels (
+    channel_id TEXT PRIMARY KEY,
+    watermark TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS watch_failures (
+    video_id TEXT PRIMARY KEY,
+    attempts INTEGER NOT NULL,
+    last_error TEXT,
+    updated_at REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_blogs_video_id ON blogs (video_id);
+CREATE INDEX IF NOT EXISTS idx_blogs_created_at ON blogs (created_at);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS blogs_fts USING fts5 (
+    title, content, tags,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+
+-- Transcripts are indexed once per video and language, without a second copy of the text
+CREATE VIRTUAL TABLE IF NOT EXISTS transcripts_fts USING fts5 (
+    transcript,
+    content = 'transcripts',
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+
+CREATE TRIGGER IF NOT EXISTS transcripts_fts_insert AFTER INSERT ON transcripts BEGIN
+    INSERT INTO transcripts_fts (rowid, transcript) VALUES (new.rowid, new.transcript);
+END;
+
+CREATE TRIGGER IF NOT EXISTS transcripts_fts_delete AFTER DELETE ON transcripts BEGIN
+    INSERT INTO transcripts_fts (transcripts_fts, rowid, transcript) VALUES ('delete', old.rowid, old.transcript);
+END;
+
+CREATE TRIGGER IF NOT EXISTS transcripts_fts_update AFTER UPDATE OF transcript ON transcripts BEGIN
+    INSERT INTO transcripts_fts (transcripts_fts, rowid, transcript) VALUES ('delete', old.rowid, old.transcript);
+    INSERT INTO transcripts_fts (rowid, transcript) VALUES (new.rowid, new.transcript);
+END;
+"""
+
+# Fills blogs_fts from the stored blogs, for databases that indexed transcripts per blog
+REINDEX_BLOGS = """
+INSERT INTO blogs_fts (rowid, title, content, tags)
+SELECT id, title,
+       COALESCE(json_extract(blog_content, '$.content'), ''),
+       COALESCE((SELECT group_concat(value, ' ') FROM json_each(blog_content, '$.tags')), '')
+FROM blogs
+"""
+
+# IDs bound per query; SQLite before 3.32 allows at most 999 variables
+ID_CHUNK_SIZE = 500
+
+class BlogStore:
+    """Class to persist and search transcripts and generated blogs."""
+    
+    def __init__(self, db_path=None):
+        """
+        Initialize the BlogStore and create the schema if needed.
+        
+        Args:
+            db_path (str, optional): Path to the SQLite database file.
+                                     Defaults to the BLOG_STORE_PATH environment variable.
+        """
+        self.db_path = db_path or os.getenv('BLOG_STORE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'blog_store.db'))
+        self._local = threading.local()
+        
+        with self._connect() as conn:
+            existing_tables = {row['name'] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            conn.executescript(SCHEMA)
+            self._migrate(conn, existing_tables)
+        logger.info(f"Blog store initialized at {self.db_path}")
+    
+    @staticmethod
+    def _migrate(conn, existing_tables):
+        """
+        Bring a database created by an earlier version up to the current schema.
+        
+        Args:
+            conn (sqlite3.Connection): The connection, with the current schema applied.
+            existing_tables (set): Tables that existed before the schema was applied.
+        """
+        columns = {row['name'] for row in conn.execute('PRAGMA table_info(transcripts)')}
+        if 'source_language' not in columns:
+            # Rows from before translations were marked are treated as originals
+            conn.execute('ALTER TABLE transcripts ADD COLUMN source_language TEXT')
+        
+        if 'transcripts_fts' not in existing_tables and 'transcripts' in existing_tables:
+            logger.info("Indexing stored transcripts")
+            conn.execute("INSERT INTO transcripts_fts (transcripts_fts) VALUES ('rebuild')")
+        
+        fts_columns = {row['name'] for row in conn.execute('PRAGMA table_info(blogs_fts)')}
+        if 'transcript' in fts_columns:
+            # Earlier versions copied the transcript into the index of every blog
+            logger.info("Rebuilding the blog index without per-blog transcript copies")
+            conn.execute('DROP TABLE blogs_fts')
+            conn.executescript(SCHEMA)
+            conn.execute(REINDEX_BLOGS)
+    
+    def _connect(self):
+        """
+        Get the SQLite connection for the current thread.
+        
+        Returns:
+            sqlite3.Connection: A per-thread connection in WAL mode.
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+    
+    @staticmethod
+    def options_key(options):
+        """
+        Build a canonical key for the generation options that affect the output.
+        
+        Blogs edited through /regenerate carry an 'edited_by' owner, which keeps
+        them apart from the shared blog generated with the same options.
+        
+        Args:
+            options (dict): Blog generation options.
+        
+        Returns:
+            str: A stable JSON string identifying the options.
+        """
+        keywords = sorted({k.strip().lower() for k in options.get('keywords', []) if k and k.strip()})
+        key = {
+            'length': options.get('length', 'medium'),
+            'style': options.get('style', 'professional'),
+            'keywords': keywords,
+            'title': (options.get('title') or '').strip()
+        }
+        if options.get('edited_by'):
+            key['edited_by'] = options['edited_by']
+        return json.dumps(key, sort_keys=True)
+    
+    def save_transcript(self, video_id, language, transcript, video_details=None, source_language=None):
+        """
+        Store (or replace) the transcript of a video.
+        
+        Args:
+            video_id (str): The YouTube video ID.
+            language (str): The transcript language code.
+            transcript (str or TranscriptBuffer): The processed transcript text.
+            video_details (dict, optional): Video details from the YouTube API.
+            source_language (str, optional): For a machine translation, the language code of the
+                                             transcript it was translated from; None for originals.
+        """
+        # A buffer's encoded text is bound directly, so it is never built as a Python string
+        view = transcript.view() if isinstance(transcript, TranscriptBuffer) else None
+        try:
+            with self._connect() as conn:
+                # Delete explicitly: REPLACE does not fire the trigger that unindexes the old text
+                conn.execute('DELETE FROM transcripts WHERE video_id = ? AND language = ?', (video_id, language or ''))
+                conn.execute(
+                    'INSERT INTO transcripts '
+                    '(video_id, language, transcript, video_details, created_at, source_language) '
+                    'VALUES (?, ?, CAST(? AS TEXT), ?, ?, ?)',
+                    (video_id, language or '', transcript if view is None else view,
+                     json.dumps(video_details) if video_details else None, time.time(), source_language)
+                )
+        finally:
+            if view is not None:
+                view.release()
+    
+    def get_transcript(self, video_id, language=None, max_chars=None):
+        """
+        Fetch a stored transcript.
+        
+        Args:
+            video_id (str): The YouTube video ID.
+            language (str, optional): Language code. If None, the most recent original (untranslated)
+                                      transcript is returned; translations are only returned by language.
+            max_chars (int, optional): Only read this many characters of the transcript, so
+                                       long transcripts are not loaded just for a preview.
+        
+        Returns:
+            dict: The stored transcript record, including the full 'length' of the
+                  transcript and its 'source_language', or None if not found.
+        """
+        transcript_column = 'transcript' if max_chars is None else 'substr(transcript, 1, :max_chars)'
+        columns = (f'video_id, language, {transcript_column} AS transcript, length(transcript) AS length, '
+                   'video_details, created_at, source_language')
+        params = {'video_id': video_id, 'language': language, 'max_chars': max_chars}
+        
+        conn = self._connect()
+        if language:
+            row = conn.execute(
+                f'SELECT {columns} FROM transcripts WHERE video_id = :video_id AND language = :language', params
+            ).fetchone()
+        else:
+            row = conn.execute(
+                f'SELECT {columns} FROM transcripts WHERE video_id = :video_id AND source_language IS NULL '
+                'ORDER BY created_at DESC LIMIT 1', params
+            ).fetchone()
+        
+        if not row:
+            return None
+        
+        return {
+            'video_id': row['video_id'],
+            'language': row['language'],
+            'transcript': row['transcript'],
+            'length': row['length'],
+            'video_details': json.loads(row['video_details']) if row['video_details'] else None,
+            'created_at': row['created_at'],
+            'source_language': row['source_language']
+        }
+    
+    def save_digest(self, video_id, language, digest):
+        """
+        Store (or replace) the condensed transcript digest of a video.
+        
+        Args:
+            video_id (str): The YouTube video ID.
+            language (str): The transcript language code.
+            digest (str): The transcript digest.
+        """
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO transcript_digests (video_id, language, digest, created_at) VALUES (?, ?, ?, ?)',
+                (video_id, language or '', digest, time.time())
+            )
+    
+    def get_digest(self, video_id, language):
+        """
+        Fetch a stored transcript digest.
+        
+        Args:
+            video_id (str): The YouTube video ID.
+            language (str): The transcript language code.
+        
+        Returns:
+            str: The digest, or None if not found.
+        """
+        row = self._connect().execute(
+            'SELECT digest FROM transcript_digests WHERE video_id = ? AND language = ?', (video_id, language or '')
+        ).fetchone()
+        return row['digest'] if row else None
+    
+    def get_channel_watermark(self, channel_id):
+        """
+        Fetch the publish time up to which a watched channel's uploads are handled.
+        
+        Args:
+            channel_id (str): The YouTube channel ID.
+        
+        Returns:
+            str: The RFC 3339 publish time, or None if the channel has not been polled yet.
+        """
+        row = self._connect().execute(
+            'SELECT watermark FROM watched_channels WHERE channel_id = ?', (channel_id,)
+        ).fetchone()
+        return row['watermark'] if row else None
+    
+    def save_channel_watermark(self, channel_id, watermark):
+        """
+        Store the publish time up to which a watched channel's uploads are handled.
+        
+        Args:
+            channel_id (str): The YouTube channel ID.
+            watermark (str): The RFC 3339 publish time.
+        """
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO watched_channels (channel_id, watermark, updated_at) VALUES (?, ?, ?)',
+                (channel_id, watermark, time.time())
+            )
+    
+    def get_watch_failures(self, video_id):
+        """
+        Get how many times pre-warming a video has failed.
+        
+        Args:
+            video_id (str): The YouTube video ID.
+        
+        Returns:
+            int: The number of failed attempts.
+        """
+        row = self._connect().execute(
+            'SELECT attempts FROM watch_failures WHERE video_id = ?', (video_id,)
+        ).fetchone()
+        return row['attempts'] if row else 0
+    
+    def record_watch_failure(self, video_id, error):
+        """
+        Count a failed attempt to pre-warm a video.
+        
+        Args:
+            video_id (str): The YouTube video ID.
+            error (str): The error of this attempt.
+        
+        Returns:
+            int: The number of failed attempts, including this one.
+        """
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT INTO watch_failures (video_id, attempts, last_error, updated_at) VALUES (?, 1, ?, ?) '
+                'ON CONFLICT (video_id) DO UPDATE SET attempts = attempts + 1, '
+                'last_error = excluded.last_error, updated_at = excluded.updated_at',
+                (video_id, error, time.time())
+            )
+        return self.get_watch_failures(video_id)
+    
+    def save_blog(self, video_id, language, options, blog_content):
+        """
+        Store (or replace) a generated blog post and update the full-text index.
+        
+        The index only holds the blog's own text; its transcript is indexed once
+        per video and language when the transcript is saved.
+        
+        Args:
+            video_id (str): The YouTube video ID.
+            language (str): The transcript language code.
+            options (dict): The generation options used.
+            blog_content (dict): The generated blog content.
+        
+        Returns:
+            int: The ID of the stored blog.
+        """
+        options_key = self.options_key(options)
+        stored_options = {k: v for k, v in options.items() if k != 'video_details'}
+        title = blog_content.get('title', '') if isinstance(blog_content, dict) else ''
+        content = blog_content.get('content', '') if isinstance(blog_content, dict) else ''
+        tags = ' '.join(blog_content.get('tags', []) or []) if isinstance(blog_content, dict) else ''
+        
+        with self._connect() as conn:
+            existing = conn.execute(
+                'SELECT id FROM blogs WHERE video_id = ? AND language = ? AND options_key = ?',
+                (video_id, language or '', options_key)
+            ).fetchone()
+            
+            if existing:
+                blog_id = existing['id']
+                conn.execute(
+                    'UPDATE blogs SET options = ?, title = ?, blog_content = ?, created_at = ? WHERE id = ?',
+                    (json.dumps(stored_options), title, json.dumps(blog_content), time.time(), blog_id)
+                )
+                conn.execute('DELETE FROM blogs_fts WHERE rowid = ?', (blog_id,))
+            else:
+                cursor = conn.execute(
+                    'INSERT INTO blogs (video_id, language, options_key, options, title, blog_content, created_at) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    (video_id, language or '', options_key, json.dumps(stored_options), title,
+                     json.dumps(blog_content), time.time())
+                )
+                blog_id = cursor.lastrowid
+            
+            conn.execute(
+                'INSERT INTO blogs_fts (rowid, title, content, tags) VALUES (?, ?, ?, ?)',
+                (blog_id, title, content, tags)
+            )
+        
+        return blog_id
+    
+    def find_blog(self, video_id, language, options):
+        """
+        Find a previously generated blog for the same video and options.
+        
+        Args:
+            video_id (str): The YouTube video ID.
+            language (str): The transcript language code.
+            options (dict): The generation options.
+        
+        Returns:
+            dict: The stored blog record, or None if not found.
+        """
+        row = self._connect().execute(
+            'SELECT * FROM blogs WHERE video_id = ? AND language = ? AND options_key = ?',
+            (video_id, language or '', self.options_key(options))
+        ).fetchone()
+        return self._row_to_blog(row) if row else None
+    
+    def get_blog(self, blog_id):
+        """
+        Fetch a stored blog by ID.
+        
+        Args:
+            blog_id (int): The blog ID.
+        
+        Returns:
+            dict: The stored blog record, or None if not found.
+        """
+        row = self._connect().execute('SELECT * FROM blogs WHERE id = ?', (blog_id,)).fetchone()
+        return self._row_to_blog(row) if row else None
+    
+    def list_blogs(self, query=None, video_id=None, page=1, per_page=20):
+        """
+        List stored blogs, optionally filtered by full-text query or video ID.
+        
+        Args:
+            query (str, optional): Search terms; blogs whose own text or whose transcript contains
+                                   all of them match. Terms are matched literally, so FTS5
+                                   operators are not supported.
+            video_id (str, optional): Only return blogs generated from this video.
+            page (int): 1-based page number.
+            per_page (int): Number of results per page.
+        
+        Returns:
+            dict: A dictionary containing:
+                - 'items' (list): Blog summaries for the requested page
+                - 'total' (int): Total number of matching blogs
+                - 'page' (int): The page number
+                - 'per_page' (int): The page size
+        """
+        page = max(1, int(page))
+        per_page = max(1, min(100, int(per_page)))
+        
+        conditions = []
+        params = []
+        joins = ''
+        order = 'b.created_at DESC'
+        
+        fts_query = self._fts_query(query) if query else ''
+        if fts_query:
+            joins, condition, rank = self._search_joins()
+            conditions.append(condition)
+            params.extend([fts_query, fts_query])
+            order = f'{rank}, b.created_at DESC'
+        if video_id:
+            conditions.append('b.video_id = ?')
+            params.append(video_id)
+        
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        conn = self._connect()
+        
+        total = conn.execute(f'SELECT COUNT(*) FROM blogs b {joins} {where}', params).fetchone()[0]
+        rows = conn.execute(
+            f'SELECT b.id, b.video_id, b.language, b.options, b.title, b.created_at '
+            f'FROM blogs b {joins} {where} ORDER BY {order} LIMIT ? OFFSET ?',
+            params + [per_page, (page - 1) * per_page]
+        ).fetchall()
+        
+        return {
+            'items': [{
+                'id': row['id'],
+                'video_id': row['video_id'],
+                'language': row['language'],
+                'options': json.loads(row['options']),
+                'title': row['title'],
+                'created_at': row['created_at']
+            } for row in rows],
+            'total': total,
+            'page': page,
+            'per_page': per_page
+        }
+    
+    def iter_blogs(self, ids=None, query=None, video_id=None, batch_size=100):
+        """
+        Iterate over stored blogs in ID order, a batch at a time.
+        
+        Batches are fetched with keyset pagination, so memory use stays constant
+        however many blogs match. Explicit IDs are queried ID_CHUNK_SIZE at a time
+        to stay under SQLite's limit on bound variables.
+        
+        Args:
+            ids (list, optional): Only return blogs with these IDs.
+            query (str, optional): Full-text search query.
+            video_id (str, optional): Only return blogs generated from this video.
+            batch_size (int): Number of rows fetched per query.
+        
+        Yields:
+            dict: Stored blog records.
+        """
+        conditions = ['b.id > ?']
+        params = []
+        
+        fts_query = self._fts_query(query) if query else ''
+        if fts_query:
+            conditions.append(
+                '(b.id IN (SELECT rowid FROM blogs_fts WHERE blogs_fts MATCH ?) OR EXISTS ('
+                'SELECT 1 FROM transcripts_fts JOIN transcripts t ON t.rowid = transcripts_fts.rowid '
+                'WHERE transcripts_fts MATCH ? AND t.video_id = b.video_id AND t.language = b.language))'
+            )
+            params.extend([fts_query, fts_query])
+        if video_id:
+            conditions.append('b.video_id = ?')
+            params.append(video_id)
+        
+        if ids is None:
+            sql = f"SELECT b.* FROM blogs b WHERE {' AND '.join(conditions)} ORDER BY b.id LIMIT ?"
+            yield from self._iter_batches(sql, params, batch_size)
+            return
+        
+        # Sorted chunks keep the overall ID order
+        ids = sorted({int(i) for i in ids})
+        for start in range(0, len(ids), ID_CHUNK_SIZE):
+            chunk = ids[start:start + ID_CHUNK_SIZE]
+            chunk_conditions = conditions + [f"b.id IN ({', '.join('?' * len(chunk))})"]
+            sql = f"SELECT b.* FROM blogs b WHERE {' AND '.join(chunk_conditions)} ORDER BY b.id LIMIT ?"
+            yield from self._iter_batches(sql, params + chunk, batch_size)
+    
+    def _iter_batches(self, sql, params, batch_size):
+        """Run a keyset-paginated blogs query whose first parameter is the last ID seen."""
+        last_id = 0
+        while True:
+            rows = self._connect().execute(sql, [last_id] + params + [batch_size]).fetchall()
+            for row in rows:
+                yield self._row_to_blog(row)
+            if len(rows) < batch_size:
+                return
+            last_id = rows[-1]['id']
+    
+    @staticmethod
+    def _search_joins():
+        """
+        Build the joins that match blogs on their own text or on their transcript.
+        
+        Both joins take the FTS5 query as a parameter, in order.
+        
+        Returns:
+            tuple: The join clauses, the condition keeping matched blogs and a rank
+                   expression (lower is better) for ordering.
+        """
+        joins = (
+            'LEFT JOIN (SELECT rowid AS id, bm25(blogs_fts) AS rank FROM blogs_fts WHERE blogs_fts MATCH ?) bm '
+            'ON bm.id = b.id '
+            'LEFT JOIN (SELECT t.video_id, t.language, bm25(transcripts_fts) AS rank FROM transcripts_fts '
+            'JOIN transcripts t ON t.rowid = transcripts_fts.rowid WHERE transcripts_fts MATCH ?) tm '
+            'ON tm.video_id = b.video_id AND tm.language = b.language'
+        )
+        condition = '(bm.id IS NOT NULL OR tm.video_id IS NOT NULL)'
+        # bm25 is negative; blogs matching in both their text and their transcript rank first
+        rank = 'COALESCE(bm.rank, 0) + COALESCE(tm.rank, 0)'
+        return joins, condition, rank
+    
+    @staticmethod
+    def _fts_query(query):
+        """
+        Quote each term of a user query so punctuation cannot break FTS5 syntax.
+        
+        Args:
+            query (str): The raw search query.
+        
+        Returns:
+            str: An FTS5 query matching all terms.
+        """
+        terms = [term.replace('"', '""') for term in query.split() if term]
+        return ' '.join(f'"{term}"' for term in terms)
+    
+    @staticmethod
+    def _row_to_blog(row):
+        """Convert a blogs row into a dictionary."""
+        return {
+            'id': row['id'],
+            'video_id': row['video_id'],
+            'language': row['language'],
+            'options': json.loads(row['options']),
+            'title': row['title'],
+            'blog_content': json.loads(row['blog_content']),
+            'created_at': row['created_at']
+        }
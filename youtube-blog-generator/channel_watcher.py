@@ -0,0 +1,340 @@
+"""
+Channel Watcher
+
+This module polls the upload playlists of a configured set of YouTube
+channels and pre-warms the blog store for new videos: transcripts are
+fetched as soon as a video appears, and default-option drafts can be
+generated during off-peak hours, so the first interactive request for a
+new video is served from the store.
+
+Each channel's progress is kept in the store as a publish-time watermark,
+set to the newest upload on the first poll, so only videos published after
+the watcher started are pre-warmed. Failure counts are stored too, so
+max_attempts also holds across separate `--once` runs.
+"""
+
+import os
+import time
+import logging
+import threading
+from datetime import datetime
+from dotenv import load_dotenv
+from admission import AdmissionRejected
+from blog_generator import MAX_TRANSCRIPT_CHARS
+
+# Load environment variables
+load_dotenv()
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# The options /generate-blog uses when the form is left at its defaults
+DEFAULT_DRAFT_OPTIONS = {
+    'length': 'medium',
+    'style': 'professional',
+    'keywords': [],
+    'title': ''
+}
+
+# Session ID the watcher uses with the admission controller
+WATCHER_SESSION_ID = 'channel-watcher'
+
+def parse_hour_range(value):
+    """
+    Parse an hour range such as '1-6' or '22-5' (wrapping past midnight).
+    
+    Args:
+        value (str): The range, in local hours 0-23; the end hour is exclusive.
+    
+    Returns:
+        tuple: (start hour, end hour), or None if value is empty.
+    """
+    if not value or not value.strip():
+        return None
+    start, _, end = value.partition('-')
+    start, end = int(start), int(end)
+    if not (0 <= start <= 23 and 0 <= end <= 24):
+        raise ValueError(f"Invalid hour range: {value}")
+    return start, end
+
+class ChannelWatcher:
+    """Polls channel uploads and pre-warms transcripts and drafts."""
+    
+    def __init__(self, transcript_extractor, blog_generator, store, channel_ids, interval=900,
+                 pregenerate=False, offpeak_hours=None, max_drafts_per_poll=5, max_attempts=3,
+                 admission=None):
+        """
+        Initialize the ChannelWatcher.
+        
+        Args:
+            transcript_extractor (TranscriptExtractor): Extractor that saves transcripts to the store.
+            blog_generator (BlogGenerator): Generator used for drafts.
+            store (BlogStore): The blog store to pre-warm.
+            channel_ids (list): YouTube channel IDs to watch.
+            interval (float): Seconds between polls.
+            pregenerate (bool): Whether to generate default-option drafts.
+            offpeak_hours (tuple, optional): (start, end) local hours during which drafts
+                                             are generated; None means any time.
+            max_drafts_per_poll (int): Upper bound on drafts generated per poll.
+            max_attempts (int): Failed attempts after which a video is skipped, counted in the store.
+            admission (AdmissionController, optional): Controller drafts go through, so they
+                                                       never take more than a fair share of slots.
+        """
+        self.transcript_extractor = transcript_extractor
+        self.youtube_api = transcript_extractor.youtube_api
+        self.blog_generator = blog_generator
+        self.store = store
+        self.channel_ids = list(channel_ids)
+        self.interval = interval
+        self.pregenerate = pregenerate
+        self.offpeak_hours = offpeak_hours
+        self.max_drafts_per_poll = max_drafts_per_poll
+        self.max_attempts = max_attempts
+        self.admission = admission
+        
+        self._uploads_playlists = {}
+        self._stop = threading.Event()
+        self._thread = None
+        self.stats = {'polls': 0, 'transcripts': 0, 'drafts': 0, 'failures': 0}
+    
+    def is_offpeak(self, now=None):
+        """Check whether drafts may be generated at the given (or current) local time."""
+        if not self.offpeak_hours:
+            return True
+        start, end = self.offpeak_hours
+        hour = (now or datetime.now()).hour
+        if start <= end:
+            return start <= hour < end
+        return hour >= start or hour < end
+    
+    def _uploads_playlist(self, channel_id):
+        """Get (and remember) the uploads playlist of a channel."""
+        if channel_id not in self._uploads_playlists:
+            result = self.youtube_api.get_uploads_playlist_id(channel_id)
+            if not result['success']:
+                logger.warning(f"Cannot watch channel {channel_id}: {result['error']}")
+                return None
+            self._uploads_playlists[channel_id] = result['playlist_id']
+        return self._uploads_playlists[channel_id]
+    
+    def _record_failure(self, video_id, error):
+        attempts = self.store.record_watch_failure(video_id, error)
+        self.stats['failures'] += 1
+        logger.warning(f"Pre-warming video {video_id} failed (attempt {attempts}/{self.max_attempts}): {error}")
+    
+    def poll_once(self):
+        """
+        Poll every channel once and pre-warm its new uploads.
+        
+        Returns:
+            dict: Number of transcripts fetched and drafts generated in this poll.
+        """
+        self.stats['polls'] += 1
+        fetched = 0
+        drafted = 0
+        draft_budget = self.max_drafts_per_poll if self.pregenerate and self.is_offpeak() else 0
+        
+        for channel_id in self.channel_ids:
+            if self._stop.is_set():
+                break
+            
+            playlist_id = self._uploads_playlist(channel_id)
+            if not playlist_id:
+                continue
+            
+            result = self.youtube_api.get_playlist_videos(playlist_id)
+            if not result['success']:
+                logger.warning(f"Cannot list uploads of channel {channel_id}: {result['error']}")
+                continue
+            
+            watermark = self.store.get_channel_watermark(channel_id)
+            if watermark is None:
+                # First poll: only uploads published from now on are new
+                watermark = max((v['published_at'] for v in result['videos']), default='')
+                self.store.save_channel_watermark(channel_id, watermark)
+                logger.info(f"Started watching channel {channel_id}; skipping {len(result['videos'])} existing uploads")
+                continue
+            
+            # Oldest first, so the watermark only moves past videos that are done
+            new_videos = sorted((v for v in result['videos'] if v['published_at'] > watermark),
+                                key=lambda v: v['published_at'])
+            advancing = True
+            
+            for video in new_videos:
+                if self._stop.is_set():
+                    break
+                
+                video_id = video['video_id']
+                done = self.store.get_watch_failures(video_id) >= self.max_attempts
+                if not done:
+                    outcome = self._prewarm(video, draft_budget > drafted)
+                    if outcome is None:
+                        # The transcript service is down; try again next poll
+                        self._advance_watermark(channel_id, watermark)
+                        return {'transcripts': fetched, 'drafts': drafted}
+                    done, new_transcript, new_draft, drafts_deferred = outcome
+                    fetched += new_transcript
+                    drafted += new_draft
+                    if drafts_deferred:
+                        draft_budget = 0
+                
+                if advancing and done:
+                    watermark = video['published_at']
+                else:
+                    advancing = False
+            
+            self._advance_watermark(channel_id, watermark)
+        
+        return {'transcripts': fetched, 'drafts': drafted}
+    
+    def _advance_watermark(self, channel_id, watermark):
+        if watermark != self.store.get_channel_watermark(channel_id):
+            self.store.save_channel_watermark(channel_id, watermark)
+    
+    def _prewarm(self, video, draft_allowed):
+        """
+        Fetch the transcript of a new video and, if allowed, generate its draft.
+        
+        Args:
+            video (dict): The upload, as listed by get_playlist_videos.
+            draft_allowed (bool): Whether the poll's draft budget allows another draft.
+        
+        Returns:
+            tuple: (done, transcripts fetched, drafts generated, drafts deferred), where done
+                   means nothing is left to do for the video; or None if the transcript
+                   service is unavailable and the poll should stop.
+        """
+        video_id = video['video_id']
+        fetched = 0
+        
+        # Read only what a draft needs, so long transcripts are not loaded on every poll
+        stored = self.store.get_transcript(video_id, max_chars=MAX_TRANSCRIPT_CHARS + 1)
+        if not stored:
+            extracted = self.transcript_extractor.get_transcript(f"https://www.youtube.com/watch?v={video_id}")
+            if not extracted['success']:
+                if extracted.get('retry_after') is not None:
+                    logger.warning(f"Stopping channel poll: {extracted['error']}")
+                    return None
+                self._record_failure(video_id, extracted['error'])
+                return self.store.get_watch_failures(video_id) >= self.max_attempts, 0, 0, False
+            fetched = 1
+            self.stats['transcripts'] += 1
+            logger.info(f"Pre-fetched transcript for new video {video_id}: {video['title']}")
+            stored = self.store.get_transcript(video_id, max_chars=MAX_TRANSCRIPT_CHARS + 1)
+        
+        if not self.pregenerate or not stored:
+            return True, fetched, 0, False
+        if not draft_allowed:
+            # Keep the video above the watermark until its draft is generated
+            return False, fetched, 0, False
+        
+        outcome = self._pregenerate(stored)
+        if outcome is None:
+            return False, fetched, 0, True
+        if outcome:
+            return True, fetched, 1, False
+        done = (self.store.find_blog(video_id, stored['language'], DEFAULT_DRAFT_OPTIONS) is not None
+                or self.store.get_watch_failures(video_id) >= self.max_attempts)
+        return done, fetched, 0, False
+    
+    def _pregenerate(self, stored):
+        """
+        Generate and store the default-option draft for a stored transcript.
+        
+        Args:
+            stored (dict): The stored transcript record, read up to MAX_TRANSCRIPT_CHARS + 1 characters.
+        
+        Returns:
+            bool: True if a draft was generated, False if none was needed or it failed,
+                  or None if drafting should stop for this poll.
+        """
+        video_id = stored['video_id']
+        language = stored['language']
+        if self.store.find_blog(video_id, language, DEFAULT_DRAFT_OPTIONS):
+            return False
+        
+        options = dict(DEFAULT_DRAFT_OPTIONS)
+        if stored['video_details']:
+            options['video_details'] = stored['video_details']
+        
+        try:
+            if self.admission:
+                with self.admission.admit(WATCHER_SESSION_ID):
+                    result = self.blog_generator.generate_blog(stored['transcript'], options)
+            else:
+                result = self.blog_generator.generate_blog(stored['transcript'], options)
+        except AdmissionRejected as e:
+            logger.info(f"Deferring drafts: {str(e)}")
+            return None
+        
+        if not result['success']:
+            if result.get('retry_after') is not None:
+                logger.info(f"Deferring drafts: {result['error']}")
+                return None
+            self._record_failure(video_id, result['error'])
+            return False
+        
+        self.store.save_blog(video_id, language, options, result['blog_content'])
+        self.stats['drafts'] += 1
+        logger.info(f"Pre-generated draft for video {video_id}")
+        return True
+    
+    def run(self):
+        """Poll until stop() is called."""
+        logger.info(f"Watching {len(self.channel_ids)} channels every {self.interval:.0f}s")
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                result = self.poll_once()
+                logger.info(f"Channel poll done: {result['transcripts']} transcripts, {result['drafts']} drafts")
+            except Exception as e:
+                logger.error(f"Channel poll failed: {str(e)}", exc_info=True)
+            self._stop.wait(max(0.0, self.interval - (time.monotonic() - started)))
+    
+    def start(self):
+        """Start polling in a background thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name='channel-watcher', daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Stop polling and wait for the current poll to finish."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+def build_watcher_from_env(transcript_extractor, blog_generator, store, admission=None):
+    """
+    Build a ChannelWatcher from WATCH_* environment variables.
+    
+    Args:
+        transcript_extractor (TranscriptExtractor): The app's transcript extractor.
+        blog_generator (BlogGenerator): The app's blog generator.
+        store (BlogStore): The app's blog store.
+        admission (AdmissionController, optional): The app's admission controller.
+    
+    Returns:
+        ChannelWatcher: The configured watcher, or None if no channels are configured.
+    """
+    channel_ids = [c.strip() for c in os.getenv('WATCH_CHANNEL_IDS', '').split(',') if c.strip()]
+    if not channel_ids:
+        return None
+    
+    if not transcript_extractor.youtube_api.youtube:
+        logger.warning("WATCH_CHANNEL_IDS is set but YOUTUBE_API_KEY is not; channel watcher disabled.")
+        return None
+    
+    return ChannelWatcher(
+        transcript_extractor,
+        blog_generator,
+        store,
+        channel_ids,
+        interval=float(os.getenv('WATCH_INTERVAL', '900')),
+        pregenerate=os.getenv('WATCH_PREGENERATE', 'False').lower() == 'true',
+        offpeak_hours=parse_hour_range(os.getenv('WATCH_OFFPEAK_HOURS', '')),
+        max_drafts_per_poll=int(os.getenv('WATCH_MAX_DRAFTS_PER_POLL', '5')),
+        admission=admission
+    )
@@ -0,0 +1,220 @@
+"""
+Circuit Breaker
+
+This module provides per-dependency circuit breakers so that requests fail
+fast while a backend (YouTube, DeepSeek) is unhealthy, instead of each one
+waiting for its full timeout.
+"""
+
+import os
+import time
+import logging
+import threading
+from dotenv import load_dotenv
+from metrics import register_collector
+
+# Load environment variables
+load_dotenv()
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because its circuit is open."""
+    
+    def __init__(self, name, retry_after):
+        super().__init__(f"Circuit '{name}' is open; retry in {int(retry_after) + 1} seconds")
+        self.name = name
+        self.retry_after = retry_after
+
+class CircuitBreaker:
+    """
+    Circuit breaker with half-open probing.
+    
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    calls are rejected for ``reset_timeout`` seconds. It then lets up to
+    ``half_open_max_calls`` probe calls through; a successful probe closes the
+    circuit, a failed one opens it again.
+    """
+    
+    def __init__(self, name, failure_threshold=5, reset_timeout=30.0, half_open_max_calls=1):
+        """
+        Initialize the CircuitBreaker.
+        
+        Args:
+            name (str): Name of the protected dependency.
+            failure_threshold (int): Consecutive failures that open the circuit.
+            reset_timeout (float): Seconds to stay open before probing.
+            half_open_max_calls (int): Concurrent probe calls allowed while half-open.
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.half_open_calls = 0
+        self.stats = {'successes': 0, 'failures': 0, 'rejections': 0, 'opened': 0}
+        self._lock = threading.Lock()
+    
+    def retry_after(self):
+        """Get the number of seconds until the circuit will allow a probe."""
+        with self._lock:
+            if self.state != OPEN:
+                return 0.0
+            return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+    
+    def is_open(self):
+        """Check, without side effects, whether calls would currently be rejected."""
+        with self._lock:
+            if self.state == OPEN:
+                return time.monotonic() < self.opened_at + self.reset_timeout
+            if self.state == HALF_OPEN:
+                return self.half_open_calls >= self.half_open_max_calls
+            return False
+    
+    def allow_request(self):
+        """
+        Check whether a call may proceed, moving an expired open circuit to half-open.
+        
+        Callers that get True must report the outcome with record_success()
+        or record_failure().
+        
+        Returns:
+            bool: True if the call may proceed.
+        """
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() < self.opened_at + self.reset_timeout:
+                    self.stats['rejections'] += 1
+                    return False
+                self.state = HALF_OPEN
+                self.half_open_calls = 0
+                logger.info(f"Circuit '{self.name}' half-open; probing")
+            
+            if self.state == HALF_OPEN:
+                if self.half_open_calls >= self.half_open_max_calls:
+                    self.stats['rejections'] += 1
+                    return False
+                self.half_open_calls += 1
+            
+            return True
+    
+    def record_rejection(self):
+        """Count a call that the caller skipped because is_open() was True."""
+        with self._lock:
+            self.stats['rejections'] += 1
+    
+    def record_success(self):
+        """Record a successful call."""
+        with self._lock:
+            self.stats['successes'] += 1
+            self.consecutive_failures = 0
+            if self.state == HALF_OPEN:
+                logger.info(f"Circuit '{self.name}' closed")
+            self.state = CLOSED
+            self.half_open_calls = 0
+    
+    def record_failure(self):
+        """Record a failed call, opening the circuit if needed."""
+        with self._lock:
+            self.stats['failures'] += 1
+            self.consecutive_failures += 1
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.stats['opened'] += 1
+                    logger.warning(f"Circuit '{self.name}' opened after {self.consecutive_failures} consecutive failures")
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+                self.half_open_calls = 0
+    
+    def call(self, func, *args, is_failure=None, **kwargs):
+        """
+        Call a function through the circuit breaker.
+        
+        Args:
+            func (callable): The function to call.
+            *args: Positional arguments for the function.
+            is_failure (callable, optional): Predicate deciding whether an exception
+                                             counts as a dependency failure. Defaults to all exceptions.
+            **kwargs: Keyword arguments for the function.
+        
+        Returns:
+            The function's return value.
+        
+        Raises:
+            CircuitOpenError: If the circuit is open.
+        """
+        if not self.allow_request():
+            raise CircuitOpenError(self.name, self.retry_after())
+        
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            if is_failure is None or is_failure(e):
+                self.record_failure()
+            else:
+                self.record_success()
+            raise
+        
+        self.record_success()
+        return result
+    
+    def snapshot(self):
+        """Get the breaker state and counters for metrics."""
+        with self._lock:
+            return dict(self.stats, name=self.name, state=self.state)
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+def get_breaker(name):
+    """
+    Get (or create) the shared circuit breaker for a dependency.
+    
+    Thresholds are read from CIRCUIT_FAILURE_THRESHOLD and CIRCUIT_RESET_TIMEOUT.
+    
+    Args:
+        name (str): Name of the dependency.
+    
+    Returns:
+        CircuitBreaker: The breaker for that dependency.
+    """
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(
+                name,
+                failure_threshold=int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', '5')),
+                reset_timeout=float(os.getenv('CIRCUIT_RESET_TIMEOUT', '30'))
+            )
+        return _breakers[name]
+
+@register_collector
+def _collect_breaker_metrics():
+    """Expose breaker states and counters as metrics."""
+    with _breakers_lock:
+        snapshots = [breaker.snapshot() for breaker in _breakers.values()]
+    
+    counters = {
+        'successes': 'Calls that succeeded through the circuit breaker',
+        'failures': 'Calls that failed through the circuit breaker',
+        'rejections': 'Calls rejected because the circuit was open',
+        'opened': 'Number of times the circuit opened'
+    }
+    families = [
+        ('circuit_breaker_state', 'gauge', 'Circuit state (0=closed, 1=half-open, 2=open)',
+         [({'name': s['name']}, STATE_VALUES[s['state']]) for s in snapshots])
+    ]
+    for key, help_text in counters.items():
+        families.append((f'circuit_breaker_{key}_total', 'counter', help_text,
+                         [({'name': s['name']}, s[key]) for s in snapshots]))
+    return families
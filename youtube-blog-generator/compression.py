@@ -0,0 +1,167 @@
+"""
+Response Compression
+
+This module compresses dynamic Flask responses (rendered pages and JSON)
+with brotli or gzip, depending on what the client accepts.
+"""
+
+import gzip
+import logging
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_MIMETYPES = {
+    'text/html',
+    'text/css',
+    'text/plain',
+    'text/markdown',
+    'text/xml',
+    'application/json',
+    'application/javascript',
+    'text/javascript',
+    'application/xml',
+    'image/svg+xml'
+}
+
+def accepted_encodings(accept_encoding):
+    """
+    Parse an Accept-Encoding header into the set of acceptable encodings.
+    
+    Args:
+        accept_encoding (str): The raw Accept-Encoding header value.
+    
+    Returns:
+        set: Lower-cased encodings the client accepts (q > 0).
+    """
+    encodings = set()
+    for part in (accept_encoding or '').split(','):
+        pieces = part.strip().split(';')
+        name = pieces[0].strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in pieces[1:]:
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            encodings.add(name)
+    return encodings
+
+def add_vary_accept_encoding(response):
+    """Add Accept-Encoding to the Vary header of a response."""
+    vary = {v.strip().lower() for v in response.headers.get('Vary', '').split(',') if v.strip()}
+    if 'accept-encoding' not in vary:
+        response.headers.add('Vary', 'Accept-Encoding')
+
+class ResponseCompression:
+    """Flask extension that compresses eligible responses on the way out."""
+    
+    def __init__(self, app=None):
+        """
+        Initialize the extension, optionally binding it to an app.
+        
+        Args:
+            app (Flask, optional): The Flask application.
+        """
+        self.min_size = 500
+        self.gzip_level = 6
+        self.brotli_quality = 5
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        """
+        Register the compression hook on a Flask application.
+        
+        Configuration keys:
+            COMPRESS_MIN_SIZE: Minimum body size in bytes worth compressing (default 500).
+            COMPRESS_GZIP_LEVEL: gzip compression level (default 6).
+            COMPRESS_BROTLI_QUALITY: brotli quality (default 5).
+        """
+        self.min_size = app.config.get('COMPRESS_MIN_SIZE', self.min_size)
+        self.gzip_level = app.config.get('COMPRESS_GZIP_LEVEL', self.gzip_level)
+        self.brotli_quality = app.config.get('COMPRESS_BROTLI_QUALITY', self.brotli_quality)
+        app.after_request(self.compress_response)
+        
+        if brotli is None:
+            logger.info("brotli not installed; responses will be gzip-compressed only")
+    
+    def choose_encoding(self, accept_encoding):
+        """
+        Pick the best supported encoding for a client.
+        
+        Args:
+            accept_encoding (str): The raw Accept-Encoding header value.
+        
+        Returns:
+            str: 'br', 'gzip' or None.
+        """
+        encodings = accepted_encodings(accept_encoding)
+        if brotli is not None and 'br' in encodings:
+            return 'br'
+        if 'gzip' in encodings:
+            return 'gzip'
+        return None
+    
+    def compress(self, data, encoding):
+        """
+        Compress a body with the given encoding.
+        
+        Args:
+            data (bytes): The uncompressed body.
+            encoding (str): 'br' or 'gzip'.
+        
+        Returns:
+            bytes: The compressed body.
+        """
+        if encoding == 'br':
+            return brotli.compress(data, quality=self.brotli_quality)
+        return gzip.compress(data, compresslevel=self.gzip_level)
+    
+    def compress_response(self, response):
+        """
+        Compress a response in place if it is eligible.
+        
+        Streamed and passthrough (file) responses, bodiless responses, already
+        encoded bodies and small bodies are left untouched.
+        """
+        if (response.direct_passthrough
+                or response.is_streamed
+                or response.status_code < 200
+                or response.status_code in (204, 304)
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+            return response
+        
+        encoding = self.choose_encoding(request.headers.get('Accept-Encoding', ''))
+        add_vary_accept_encoding(response)
+        if not encoding:
+            return response
+        
+        data = response.get_data()
+        if len(data) < self.min_size:
+            return response
+        
+        compressed = self.compress(data, encoding)
+        if len(compressed) >= len(data):
+            return response
+        
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+        if response.headers.get('ETag'):
+            # The representation changed, so a strong validator would be wrong
+            etag, weak = response.get_etag()
+            response.set_etag(etag, weak=True)
+        return response
@@ -0,0 +1,153 @@
+"""
+Blog Exporter
+
+This module renders blog posts as Markdown, HTML and JSON and streams many
+of them as a ZIP or NDJSON archive. Archives are produced lazily, one post
+at a time, so exports of thousands of posts use constant memory and start
+downloading immediately.
+"""
+
+import re
+import json
+import html
+import time
+import logging
+import zipfile
+import markdown
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = {
+    'zip': 'application/zip',
+    'ndjson': 'application/x-ndjson'
+}
+
+def render_markdown(blog_content):
+    """
+    Get the Markdown export of a blog post.
+    
+    Args:
+        blog_content (dict): The blog content.
+    
+    Returns:
+        str: The post's Markdown content.
+    """
+    return blog_content.get('content', '') or ''
+
+def render_html(blog_content):
+    """
+    Get the HTML body of a blog post, converting Markdown content if needed.
+    
+    Args:
+        blog_content (dict): The blog content.
+    
+    Returns:
+        str: The post's HTML content.
+    """
+    if blog_content.get('html_content'):
+        return blog_content['html_content']
+    content = blog_content.get('content', '') or ''
+    if content and not content.startswith('<'):
+        return markdown.markdown(content, extensions=['extra'])
+    return content
+
+def render_html_document(blog_content):
+    """Wrap a blog post's HTML in a standalone document."""
+    title = html.escape(blog_content.get('title', ''))
+    meta_description = html.escape(blog_content.get('meta_description', '') or '')
+    return (
+        '<!DOCTYPE html>\n<html>\n<head>\n<meta charset="utf-8">\n'
+        f'<title>{title}</title>\n<meta name="description" content="{meta_description}">\n'
+        f'</head>\n<body>\n{render_html(blog_content)}\n</body>\n</html>\n'
+    )
+
+def slugify(text, max_length=60):
+    """Turn a title into a file-name friendly slug."""
+    slug = re.sub(r'[^a-z0-9]+', '-', (text or '').lower()).strip('-')[:max_length].rstrip('-')
+    return slug or 'blog'
+
+class _ChunkBuffer:
+    """Write-only, unseekable file object that collects what zipfile writes."""
+    
+    def __init__(self):
+        self._chunks = []
+    
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+    
+    def flush(self):
+        pass
+    
+    def drain(self):
+        """Return and forget everything written so far."""
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+def stream_zip(blogs):
+    """
+    Stream blog posts as a ZIP archive.
+    
+    Each post becomes a folder with post.md, post.html and post.json.
+    zipfile writes to an unseekable buffer (so sizes go in data descriptors),
+    which is drained after every post.
+    
+    Args:
+        blogs (iterable): Stored blog records, e.g. from BlogStore.iter_blogs().
+    
+    Yields:
+        bytes: Chunks of the ZIP archive.
+    """
+    buffer = _ChunkBuffer()
+    count = 0
+    with zipfile.ZipFile(buffer, mode='w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for blog in blogs:
+            blog_content = blog['blog_content']
+            folder = f"{blog['id']}-{slugify(blog.get('title') or blog_content.get('title'))}"
+            date_time = time.localtime(blog['created_at'])[:6]
+            files = (
+                ('post.md', render_markdown(blog_content)),
+                ('post.html', render_html_document(blog_content)),
+                ('post.json', json.dumps(_export_record(blog), indent=2, ensure_ascii=False))
+            )
+            for name, data in files:
+                info = zipfile.ZipInfo(f"{folder}/{name}", date_time=date_time)
+                info.compress_type = zipfile.ZIP_DEFLATED
+                archive.writestr(info, data)
+            count += 1
+            yield buffer.drain()
+    yield buffer.drain()
+    logger.info(f"Exported {count} blogs as ZIP")
+
+def stream_ndjson(blogs):
+    """
+    Stream blog posts as newline-delimited JSON, one post per line.
+    
+    Args:
+        blogs (iterable): Stored blog records, e.g. from BlogStore.iter_blogs().
+    
+    Yields:
+        bytes: One encoded JSON line per post.
+    """
+    count = 0
+    for blog in blogs:
+        record = _export_record(blog)
+        record['markdown'] = render_markdown(blog['blog_content'])
+        record['html'] = render_html(blog['blog_content'])
+        count += 1
+        yield (json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8')
+    logger.info(f"Exported {count} blogs as NDJSON")
+
+def _export_record(blog):
+    """Get the JSON export of a stored blog."""
+    return {
+        'id': blog['id'],
+        'video_id': blog['video_id'],
+        'language': blog['language'],
+        'options': blog['options'],
+        'created_at': blog['created_at'],
+        'blog': blog['blog_content']
+    }
@@ -0,0 +1,433 @@
+"""
+LLM Backends
+
+This module provides a pluggable abstraction over OpenAI-compatible chat
+completion endpoints (DeepSeek, self-hosted models, local stubs) and a
+client that hedges slow requests to a secondary backend.
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+from circuit_breaker import get_breaker, CircuitOpenError
+from profiling import stage, submit_with_context
+
+# Load environment variables
+load_dotenv()
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_DEEPSEEK_API_URL = 'https://api.deepseek.ai/v1/chat/completions'
+
+# Upper max_tokens bound of each latency window: short edits, partial completions, full posts
+LATENCY_BUCKETS = (256, 1536)
+
+def latency_bucket(max_tokens):
+    """
+    Get the latency window a request belongs to.
+    
+    Requests with very different output budgets have very different latencies,
+    so each budget range keeps its own window.
+    
+    Args:
+        max_tokens (int): The request's output budget, or None.
+    
+    Returns:
+        str: The bucket name.
+    """
+    if max_tokens is not None:
+        for bound in LATENCY_BUCKETS:
+            if max_tokens <= bound:
+                return f'le_{bound}'
+    return 'full'
+
+class LatencyTracker:
+    """Rolling window of successful request latencies."""
+    
+    def __init__(self, window=200, min_samples=20):
+        """
+        Initialize the LatencyTracker.
+        
+        Args:
+            window (int): Number of recent samples to keep.
+            min_samples (int): Samples required before percentiles are reported.
+        """
+        self.samples = deque(maxlen=window)
+        self.min_samples = min_samples
+        self._lock = threading.Lock()
+    
+    def record(self, seconds):
+        """Record the latency of a successful request."""
+        with self._lock:
+            self.samples.append(seconds)
+    
+    def percentile(self, p):
+        """
+        Get a latency percentile over the window.
+        
+        Args:
+            p (float): Percentile between 0 and 100.
+        
+        Returns:
+            float: The latency in seconds, or None if there are too few samples.
+        """
+        with self._lock:
+            if len(self.samples) < self.min_samples:
+                return None
+            ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(round(p / 100.0 * (len(ordered) - 1))))
+        return ordered[index]
+
+class OpenAICompatibleBackend:
+    """A chat completion backend speaking the OpenAI-compatible HTTP API."""
+    
+    def __init__(self, name, api_url, api_key=None, model='deepseek-chat', timeout=60):
+        """
+        Initialize the backend.
+        
+        Args:
+            name (str): Name used in logs and metrics.
+            api_url (str): Full URL of the chat completions endpoint.
+            api_key (str, optional): Bearer token; omitted for unauthenticated local servers.
+            model (str): Model name sent with each request.
+            timeout (float): Request timeout in seconds.
+        """
+        self.name = name
+        self.api_url = api_url
+        self.api_key = api_key
+        self.model = model
+        self.timeout = timeout
+        self.latency = {}
+        self._latency_lock = threading.Lock()
+        self.breaker = get_breaker(f'llm_{name}')
+        self.usage = {'prompt_tokens': 0, 'cached_prompt_tokens': 0, 'completion_tokens': 0}
+        self._usage_lock = threading.Lock()
+        
+        self.session = requests.Session()
+        self.session.mount('https://', HTTPAdapter(pool_maxsize=16))
+        self.session.mount('http://', HTTPAdapter(pool_maxsize=16))
+    
+    def complete(self, messages, **params):
+        """
+        Send a chat completion request.
+        
+        Requests go through the backend's circuit breaker: timeouts, connection
+        errors, 5xx and 429 responses count as failures, and while the circuit
+        is open calls fail immediately with CircuitOpenError.
+        
+        Args:
+            messages (list): Chat messages.
+            **params: Additional request parameters (temperature, max_tokens, ...).
+        
+        Returns:
+            dict: The decoded API response.
+        """
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        
+        if not self.breaker.allow_request():
+            raise CircuitOpenError(self.breaker.name, self.breaker.retry_after())
+        
+        data = dict(params, model=self.model, messages=messages)
+        started = time.monotonic()
+        
+        try:
+            response = self.session.post(
+                self.api_url,
+                headers=headers,
+                data=json.dumps(data),
+                timeout=self.timeout
+            )
+            
+            response.raise_for_status()  # Raise exception for 4XX/5XX responses
+            
+            result = response.json()
+            self.latency_window(params.get('max_tokens')).record(time.monotonic() - started)
+            self.breaker.record_success()
+            self._record_usage(result)
+            return result
+        except requests.exceptions.HTTPError as e:
+            status_code = e.response.status_code
+            if status_code >= 500 or status_code == 429:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            error_message = f"API request to {self.name} failed with status code {status_code}"
+            
+            try:
+                error_data = e.response.json()
+                if 'error' in error_data:
+                    error_message += f": {error_data['error']}"
+            except ValueError:
+                error_message += f": {e.response.text}"
+            
+            logger.error(error_message)
+            raise Exception(error_message)
+        except requests.exceptions.Timeout:
+            self.breaker.record_failure()
+            logger.error(f"API request to {self.name} timed out")
+            raise requests.exceptions.Timeout(f"Request to {self.name} timed out")
+        except requests.exceptions.ConnectionError:
+            self.breaker.record_failure()
+            logger.error(f"Connection error calling {self.name}")
+            raise
+        except ValueError:
+            # Malformed JSON body: the backend answered, so it is not an availability failure
+            # (checked first: newer requests raise a JSONDecodeError that is also a RequestException)
+            self.breaker.record_success()
+            raise
+        except requests.exceptions.RequestException as e:
+            # Broken bodies, bad encodings, redirect loops, ...
+            self.breaker.record_failure()
+            logger.error(f"Request to {self.name} failed: {str(e)}")
+            raise
+        except Exception:
+            # Every call let through must report an outcome, or a half-open probe slot stays taken
+            self.breaker.record_failure()
+            raise
+    
+    def latency_window(self, max_tokens):
+        """Get the LatencyTracker for requests with the given output budget."""
+        bucket = latency_bucket(max_tokens)
+        with self._latency_lock:
+            if bucket not in self.latency:
+                self.latency[bucket] = LatencyTracker()
+            return self.latency[bucket]
+    
+    def _record_usage(self, result):
+        """Add a response's token counts, including prefix cache hits, to the backend totals."""
+        prompt_tokens, cached_tokens, completion_tokens = prompt_usage(result)
+        with self._usage_lock:
+            self.usage['prompt_tokens'] += prompt_tokens
+            self.usage['cached_prompt_tokens'] += cached_tokens
+            self.usage['completion_tokens'] += completion_tokens
+        if prompt_tokens:
+            logger.info(f"{self.name}: {cached_tokens}/{prompt_tokens} prompt tokens served from the prefix cache")
+
+def prompt_usage(response):
+    """
+    Get prompt token counts from a chat completion response.
+    
+    Understands DeepSeek's ``prompt_cache_hit_tokens`` as well as the
+    OpenAI-style ``prompt_tokens_details.cached_tokens``.
+    
+    Args:
+        response (dict): The decoded API response.
+    
+    Returns:
+        tuple: (prompt tokens, prompt tokens served from the provider's prefix cache,
+               completion tokens).
+    """
+    usage = (response.get('usage') if isinstance(response, dict) else None) or {}
+    prompt_tokens = usage.get('prompt_tokens') or 0
+    cached_tokens = usage.get('prompt_cache_hit_tokens')
+    if cached_tokens is None:
+        cached_tokens = (usage.get('prompt_tokens_details') or {}).get('cached_tokens') or 0
+    return prompt_tokens, cached_tokens, usage.get('completion_tokens') or 0
+
+def is_valid_completion(response):
+    """Check that a response contains a non-empty completion."""
+    try:
+        return bool(response['choices'][0]['message']['content'])
+    except (KeyError, IndexError, TypeError):
+        return False
+
+class HedgedLLMClient:
+    """
+    Client that sends each request to the primary backend and, if it is
+    slower than its observed latency percentile (or fails), fires the same
+    request at the next backend. The first valid answer wins.
+    """
+    
+    def __init__(self, backends, hedge_percentile=95, min_hedge_delay=2.0, default_hedge_delay=20.0,
+                 max_hedge_ratio=0.1, max_workers=16):
+        """
+        Initialize the HedgedLLMClient.
+        
+        Args:
+            backends (list): Backends in order of preference.
+            hedge_percentile (float): Primary latency percentile after which a hedge fires.
+            min_hedge_delay (float): Lower bound for the hedge delay in seconds.
+            default_hedge_delay (float): Hedge delay used until enough latency samples exist.
+            max_hedge_ratio (float): Maximum fraction of recent requests that may be hedged.
+            max_workers (int): Size of the thread pool running backend calls.
+        """
+        self.backends = list(backends)
+        self.hedge_percentile = hedge_percentile
+        self.min_hedge_delay = min_hedge_delay
+        self.default_hedge_delay = default_hedge_delay
+        self.max_hedge_ratio = max_hedge_ratio
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='llm')
+        self._recent = deque(maxlen=100)  # True for requests that were hedged
+        self._lock = threading.Lock()
+        self.stats = {'requests': 0, 'hedged': 0, 'secondary_wins': 0, 'fallbacks': 0}
+    
+    def hedge_delay(self, backend, max_tokens=None):
+        """Get how long to wait on a backend before hedging a request with the given output budget."""
+        observed = backend.latency_window(max_tokens).percentile(self.hedge_percentile)
+        if observed is None:
+            return self.default_hedge_delay
+        return max(self.min_hedge_delay, observed)
+    
+    def _hedge_allowed(self):
+        """Check the hedge budget so slow periods cannot double the request volume."""
+        with self._lock:
+            if not self._recent:
+                return True
+            return sum(self._recent) / len(self._recent) < self.max_hedge_ratio
+    
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+    
+    def complete(self, messages, **params):
+        """
+        Get a chat completion, hedging to secondary backends when needed.
+        
+        Args:
+            messages (list): Chat messages.
+            **params: Additional request parameters.
+        
+        Returns:
+            dict: The first valid API response.
+        """
+        if not self.backends:
+            raise ValueError("No LLM backend is configured. Please set the DEEPSEEK_API_KEY environment variable.")
+        
+        self._count('requests')
+        
+        # Skip backends whose circuit is open; fail fast if none is available
+        backends = []
+        for backend in self.backends:
+            if backend.breaker.is_open():
+                backend.breaker.record_rejection()
+            else:
+                backends.append(backend)
+        if not backends:
+            retry_after = min(backend.breaker.retry_after() for backend in self.backends)
+            raise CircuitOpenError(self.backends[0].breaker.name, retry_after)
+        
+        if len(backends) == 1:
+            return backends[0].complete(messages, **params)
+        
+        pending = {}
+        next_index = 0
+        first_error = None
+        hedged = False
+        hedge_considered = False
+        
+        sent = {}
+        
+        def send(backend, started):
+            sent[backend.name] = time.monotonic()
+            started.set()
+            with stage(f'llm_backend_{backend.name}'):
+                return backend.complete(messages, **params)
+        
+        def launch():
+            nonlocal next_index
+            backend = backends[next_index]
+            next_index += 1
+            started = threading.Event()
+            pending[submit_with_context(self._executor, send, backend, started)] = backend
+            return backend, started
+        
+        primary, primary_started = launch()
+        hedge_delay = self.hedge_delay(primary, params.get('max_tokens'))
+        # Time spent queued for a worker does not count towards the hedge delay
+        primary_started.wait()
+        deadline = sent[primary.name] + hedge_delay
+        
+        try:
+            while pending:
+                timeout = None
+                if next_index < len(backends) and not hedge_considered:
+                    timeout = max(0.0, deadline - time.monotonic())
+                
+                done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+                
+                if not done:
+                    # The primary is slower than its usual tail latency: fire a hedge
+                    # unless the hedge budget is exhausted, in which case keep waiting
+                    hedge_considered = True
+                    if self._hedge_allowed():
+                        backend, _ = launch()
+                        hedged = True
+                        self._count('hedged')
+                        logger.info(f"Hedging LLM request to {backend.name} after {hedge_delay:.1f}s")
+                    continue
+                
+                for future in done:
+                    backend = pending.pop(future)
+                    try:
+                        response = future.result()
+                    except Exception as e:
+                        logger.warning(f"LLM backend {backend.name} failed: {str(e)}")
+                        first_error = first_error or e
+                        continue
+                    
+                    if is_valid_completion(response):
+                        if backend is not primary:
+                            self._count('secondary_wins')
+                        return response
+                    
+                    logger.warning(f"LLM backend {backend.name} returned an empty completion")
+                    first_error = first_error or Exception(f"Empty completion from {backend.name}")
+                
+                # A backend failed: fall back to the next one immediately
+                if not pending and next_index < len(backends):
+                    backend, _ = launch()
+                    self._count('fallbacks')
+                    logger.info(f"Falling back to LLM backend {backend.name}")
+        finally:
+            with self._lock:
+                self._recent.append(hedged)
+        
+        raise first_error
+
+def build_client_from_env():
+    """
+    Build a HedgedLLMClient from environment variables.
+    
+    The primary backend uses DEEPSEEK_API_URL, DEEPSEEK_API_KEY and
+    DEEPSEEK_MODEL. An optional secondary backend uses LLM_FALLBACK_API_URL,
+    LLM_FALLBACK_API_KEY and LLM_FALLBACK_MODEL.
+    
+    Returns:
+        HedgedLLMClient: The configured client.
+    """
+    timeout = float(os.getenv('LLM_TIMEOUT', '60'))
+    backends = []
+    
+    api_key = os.getenv('DEEPSEEK_API_KEY')
+    api_url = os.getenv('DEEPSEEK_API_URL', DEFAULT_DEEPSEEK_API_URL)
+    # The hosted DeepSeek API needs a key; a custom URL may be a local, unauthenticated server
+    if api_key or api_url != DEFAULT_DEEPSEEK_API_URL:
+        backends.append(OpenAICompatibleBackend(
+            'primary', api_url, api_key, os.getenv('DEEPSEEK_MODEL', 'deepseek-chat'), timeout
+        ))
+    
+    fallback_url = os.getenv('LLM_FALLBACK_API_URL')
+    if fallback_url:
+        backends.append(OpenAICompatibleBackend(
+            'fallback', fallback_url, os.getenv('LLM_FALLBACK_API_KEY'),
+            os.getenv('LLM_FALLBACK_MODEL', os.getenv('DEEPSEEK_MODEL', 'deepseek-chat')), timeout
+        ))
+    
+    return HedgedLLMClient(
+        backends,
+        hedge_percentile=float(os.getenv('LLM_HEDGE_PERCENTILE', '95')),
+        min_hedge_delay=float(os.getenv('LLM_HEDGE_MIN_DELAY', '2')),
+        default_hedge_delay=float(os.getenv('LLM_HEDGE_DEFAULT_DELAY', '20')),
+        max_hedge_ratio=float(os.getenv('LLM_HEDGE_MAX_RATIO', '0.1'))
+    )
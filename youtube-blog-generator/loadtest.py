@@ -0,0 +1,619 @@
+"""
+Load Test Harness
+
+This module measures how many concurrent users one instance of the app can
+serve and where it saturates. It starts a local stand-in for the YouTube
+Data API, the YouTube watch and caption pages and the DeepSeek API, each with
+configurable latency and error rates, points the app at it, and drives
+extract -> generate -> result -> export sessions (with CSRF tokens) at
+stepped concurrency. For every step it reports throughput and p50/p95/p99
+latency and error rates per route.
+
+Usage:
+    python loadtest.py --steps 1,2,4,8,16 --step-duration 30
+    python loadtest.py --server waitress --llm-latency 2000:0.5 --llm-error-rate 0.02
+"""
+
+import os
+import re
+import sys
+import json
+import math
+import time
+import random
+import logging
+import argparse
+import tempfile
+import threading
+import warnings
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from xml.sax.saxutils import escape
+import requests
+from dotenv import load_dotenv
+
+try:
+    import waitress
+except ImportError:  # waitress is optional; the threaded Werkzeug server is always available
+    waitress = None
+
+# Load environment variables
+load_dotenv()
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ROUTES = ['GET /', 'POST /extract-transcript', 'POST /generate-blog', 'GET /result', 'POST /export']
+
+_WORDS = """
+video creator audience growth strategy content channel camera lighting editing story
+thumbnail title algorithm retention analytics engagement community feedback upload schedule
+microphone script research topic niche brand sponsor revenue workflow template lesson
+""".split()
+
+_CSRF_PATTERN = re.compile(r'<meta name="csrf-token" content="([^"]+)"')
+_WORD_COUNT_PATTERN = re.compile(r'approximately (\d+) words')
+
+class LatencyProfile:
+    """Latency and error distribution of one stand-in service."""
+    
+    def __init__(self, median_ms, sigma=0.0, error_rate=0.0):
+        """
+        Initialize the LatencyProfile.
+        
+        Args:
+            median_ms (float): Median response delay in milliseconds.
+            sigma (float): Spread of the log-normal delay distribution; 0 means a fixed delay.
+            error_rate (float): Fraction of requests answered with an error.
+        """
+        self.median_ms = median_ms
+        self.sigma = sigma
+        self.error_rate = error_rate
+    
+    @classmethod
+    def parse(cls, value, error_rate=0.0):
+        """Build a profile from a 'MEDIAN_MS[:SIGMA]' string."""
+        median, _, sigma = value.partition(':')
+        return cls(float(median), float(sigma or 0), error_rate)
+    
+    def delay(self, rng):
+        """Draw a response delay in seconds."""
+        if self.median_ms <= 0:
+            return 0.0
+        return self.median_ms * math.exp(rng.gauss(0, self.sigma)) / 1000.0 if self.sigma else self.median_ms / 1000.0
+    
+    def fails(self, rng):
+        """Decide whether a request should be answered with an error."""
+        return rng.random() < self.error_rate
+
+class FakeBackendServer(ThreadingHTTPServer):
+    """
+    Local stand-in for the YouTube and DeepSeek services the app calls.
+    
+    Serves the YouTube Data API under /youtube/v3, watch pages and caption
+    tracks under /watch and /timedtext (as read by youtube_transcript_api)
+    and an OpenAI-compatible chat completions endpoint under /v1, which
+    reports prompt cache hits the way DeepSeek does.
+    """
+    
+    daemon_threads = True
+    
+    def __init__(self, profiles, transcript_segments=300, truncate_rate=0.0, seed=None):
+        """
+        Initialize the FakeBackendServer on a free local port.
+        
+        Args:
+            profiles (dict): LatencyProfile per service ('youtube', 'transcript', 'llm').
+            transcript_segments (int): Caption segments per video.
+            truncate_rate (float): Fraction of completions cut off at the token limit.
+            seed (int, optional): Seed for latency, error and content randomness.
+        """
+        super().__init__(('127.0.0.1', 0), _FakeBackendHandler)
+        self.profiles = profiles
+        self.transcript_segments = transcript_segments
+        self.truncate_rate = truncate_rate
+        self.rng = random.Random(seed)
+        self.url = f"http://127.0.0.1:{self.server_address[1]}"
+        self.stats = defaultdict(lambda: {'requests': 0, 'errors': 0})
+        self._cached_prefixes = set()
+        self._lock = threading.Lock()
+        self._thread = None
+    
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name='fake-backends', daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+    
+    def admit(self, service):
+        """
+        Count a request and draw its delay and outcome.
+        
+        Returns:
+            tuple: (delay in seconds, whether to answer with an error).
+        """
+        profile = self.profiles[service]
+        with self._lock:
+            delay = profile.delay(self.rng)
+            fails = profile.fails(self.rng)
+            self.stats[service]['requests'] += 1
+            if fails:
+                self.stats[service]['errors'] += 1
+        return delay, fails
+    
+    def cached_tokens(self, system_prompt):
+        """Simulate the provider's prefix cache for a system prompt, in 64-token units."""
+        with self._lock:
+            hit = system_prompt in self._cached_prefixes
+            self._cached_prefixes.add(system_prompt)
+        return (len(system_prompt) // 4) // 64 * 64 if hit else 0
+    
+    def words(self, seed, count):
+        """Deterministic filler text for a video or post."""
+        rng = random.Random(seed)
+        return ' '.join(rng.choice(_WORDS) for _ in range(count))
+
+class _FakeBackendHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    
+    def log_message(self, format, *args):
+        pass
+    
+    def _send(self, status, body, content_type='application/json'):
+        data = (json.dumps(body) if content_type == 'application/json' else body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+    
+    def _serve(self, service, handler, *args):
+        delay, fails = self.server.admit(service)
+        time.sleep(delay)
+        if fails:
+            self._send(503, {'error': {'message': f'Injected {service} error'}})
+            return
+        handler(*args)
+    
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        
+        if url.path == '/youtube/v3/videos':
+            self._serve('youtube', self._video, query.get('id', ''))
+        elif url.path == '/youtube/v3/captions':
+            self._serve('youtube', self._captions)
+        elif url.path == '/watch':
+            self._serve('transcript', self._watch_page, query.get('v', ''))
+        elif url.path == '/timedtext':
+            self._serve('transcript', self._timed_text, query.get('v', ''))
+        else:
+            self._send(404, {'error': {'message': 'Not found'}})
+    
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if urlparse(self.path).path == '/v1/chat/completions':
+            self._serve('llm', self._completion, json.loads(body))
+        else:
+            self._send(404, {'error': {'message': 'Not found'}})
+    
+    def _video(self, video_id):
+        self._send(200, {'items': [{
+            'id': video_id,
+            'snippet': {
+                'title': f'Load test video {video_id}',
+                'channelTitle': 'Load Test Channel',
+                'publishedAt': '2024-01-01T00:00:00Z',
+                'tags': _WORDS[:5],
+                'categoryId': '27',
+                'thumbnails': {'high': {'url': f'{self.server.url}/thumbnails/{video_id}.jpg'}}
+            },
+            'contentDetails': {'duration': 'PT10M'},
+            'statistics': {'viewCount': '1000', 'likeCount': '100', 'commentCount': '10'}
+        }]})
+    
+    def _captions(self):
+        self._send(200, {'items': [{'id': 'en', 'snippet': {'language': 'en', 'name': 'English', 'trackKind': 'standard'}}]})
+    
+    def _watch_page(self, video_id):
+        captions = {
+            'playerCaptionsTracklistRenderer': {
+                'captionTracks': [{
+                    'baseUrl': f'{self.server.url}/timedtext?v={video_id}&lang=en',
+                    'name': {'simpleText': 'English'},
+                    'languageCode': 'en',
+                    'isTranslatable': True
+                }],
+                'translationLanguages': [
+                    {'languageCode': code, 'languageName': {'simpleText': name}}
+                    for code, name in (('de', 'German'), ('es', 'Spanish'), ('fr', 'French'))
+                ]
+            }
+        }
+        # Escape '&' like YouTube does, so the library's HTML unescaping leaves the URL intact
+        player = json.dumps(captions).replace('&', '\\u0026')
+        self._send(200, (
+            '<html><body><script>var ytInitialPlayerResponse = {"playabilityStatus":{"status":"OK"},'
+            f'"captions":{player},"videoDetails":{{"videoId":"{video_id}"}}}};</script></body></html>'
+        ), 'text/html; charset=utf-8')
+    
+    def _timed_text(self, video_id):
+        segments = ''.join(
+            f'<text start="{i * 4.0:.1f}" dur="4.0">{escape(self.server.words(f"{video_id}-{i}", 10))}</text>'
+            for i in range(self.server.transcript_segments)
+        )
+        self._send(200, f'<?xml version="1.0" encoding="utf-8" ?><transcript>{segments}</transcript>', 'text/xml')
+    
+    def _completion(self, payload):
+        messages = payload.get('messages', [])
+        system_prompt = next((m['content'] for m in messages if m['role'] == 'system'), '')
+        user_prompt = next((m['content'] for m in messages if m['role'] == 'user'), '')
+        match = _WORD_COUNT_PATTERN.search(user_prompt)
+        word_count = int(match.group(1)) if match else 300
+        
+        seed = hash(user_prompt)
+        sections = []
+        for i in range(4):
+            sections.append({'type': 'heading', 'level': 2, 'content': f'Part {i + 1}'})
+            sections.append({'type': 'paragraph', 'content': self.server.words(f'{seed}-{i}', word_count // 4)})
+        blog = {
+            'title': 'Load Test Blog Post',
+            'meta_description': self.server.words(seed, 20),
+            'seo_title': 'Load Test Blog Post',
+            'tags': _WORDS[:5],
+            'content': '\n\n'.join(
+                f"## {s['content']}" if s['type'] == 'heading' else s['content'] for s in sections
+            ),
+            'sections': sections,
+            'faq': [{'question': f'Question {i + 1}?', 'answer': self.server.words(f'{seed}-faq-{i}', 30)} for i in range(3)]
+        }
+        content = json.dumps(blog)
+        finish_reason = 'stop'
+        if self.server.truncate_rate and self.server.rng.random() < self.server.truncate_rate:
+            content = content[:len(content) * 3 // 4]
+            finish_reason = 'length'
+        
+        prompt_tokens = (len(system_prompt) + len(user_prompt)) // 4
+        cached_tokens = self.server.cached_tokens(system_prompt)
+        self._send(200, {
+            'id': f'loadtest-{seed & 0xffffffff:x}',
+            'object': 'chat.completion',
+            'model': payload.get('model', 'deepseek-chat'),
+            'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content}, 'finish_reason': finish_reason}],
+            'usage': {
+                'prompt_tokens': prompt_tokens,
+                'prompt_cache_hit_tokens': cached_tokens,
+                'prompt_cache_miss_tokens': prompt_tokens - cached_tokens,
+                'completion_tokens': len(content) // 4,
+                'total_tokens': prompt_tokens + len(content) // 4
+            }
+        })
+
+def configure_app_environment(backend_url, work_dir):
+    """
+    Point the app's outbound calls at the stand-in services.
+    
+    Must be called before app is imported, since it reads its settings at
+    import time. The YouTube watch page URL is not configurable through the
+    environment, so youtube_transcript_api's module setting is replaced.
+    
+    Args:
+        backend_url (str): Base URL of the FakeBackendServer.
+        work_dir (str): Directory for the test's blog store and profiles.
+    """
+    os.environ.update({
+        'YOUTUBE_API_KEY': 'loadtest',
+        'YOUTUBE_API_BASE_URL': f'{backend_url}/youtube/v3',
+        'DEEPSEEK_API_KEY': 'loadtest',
+        'DEEPSEEK_API_URL': f'{backend_url}/v1/chat/completions',
+        'LLM_FALLBACK_API_URL': '',
+        'BLOG_STORE_PATH': os.path.join(work_dir, 'blog_store.db'),
+        'PROFILE_DIR': os.path.join(work_dir, 'profiles'),
+        'WATCH_CHANNEL_IDS': ''
+    })
+    
+    from youtube_transcript_api import _transcripts
+    _transcripts.WATCH_URL = f'{backend_url}/watch?v={{video_id}}'
+
+def start_app_server(app, server='werkzeug', threads=32):
+    """
+    Serve the app on a free local port in a background thread.
+    
+    Args:
+        app (Flask): The Flask application.
+        server (str): 'werkzeug' (threaded development server) or 'waitress'.
+        threads (int): Worker threads for waitress.
+    
+    Returns:
+        tuple: (base URL, function that stops the server).
+    """
+    if server == 'waitress':
+        if waitress is None:
+            raise RuntimeError("waitress is not installed; run 'pip install waitress' or use --server werkzeug")
+        wsgi_server = waitress.create_server(app, host='127.0.0.1', port=0, threads=threads)
+        port = wsgi_server.effective_port
+        thread = threading.Thread(target=wsgi_server.run, name='app-server', daemon=True)
+        stop = wsgi_server.close
+    else:
+        from werkzeug.serving import make_server
+        wsgi_server = make_server('127.0.0.1', 0, app, threaded=True)
+        port = wsgi_server.server_port
+        thread = threading.Thread(target=wsgi_server.serve_forever, name='app-server', daemon=True)
+        stop = wsgi_server.shutdown
+    
+    thread.start()
+    return f'http://127.0.0.1:{port}', stop
+
+class SessionRecorder:
+    """Thread-safe collection of per-route request samples."""
+    
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.sessions = 0
+        self.failed_sessions = 0
+        self._lock = threading.Lock()
+    
+    def record(self, route, seconds, status):
+        with self._lock:
+            self.samples[route].append(seconds)
+            self.statuses[route][status] += 1
+    
+    def finish_session(self, ok):
+        with self._lock:
+            self.sessions += 1
+            if not ok:
+                self.failed_sessions += 1
+
+def run_session(base_url, video_id, options, recorder, export_format='html', timeout=120):
+    """
+    Drive one user session: load the page, extract, generate, view and export.
+    
+    The session stops at the first failed step, since later steps depend on it.
+    
+    Args:
+        base_url (str): Base URL of the app.
+        video_id (str): The video to extract.
+        options (dict): Blog options for /generate-blog.
+        recorder (SessionRecorder): Where request samples go.
+        export_format (str): Format requested from /export.
+        timeout (float): Per-request timeout in seconds.
+    
+    Returns:
+        bool: Whether every step succeeded.
+    """
+    http = requests.Session()
+    
+    def call(route, method, path, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = http.request(method, base_url + path, timeout=timeout, **kwargs)
+            status = response.status_code
+        except requests.exceptions.RequestException as e:
+            response, status = None, type(e).__name__
+        recorder.record(route, time.perf_counter() - started, status)
+        return response if response is not None and response.status_code < 400 else None
+    
+    try:
+        page = call('GET /', 'GET', '/')
+        match = _CSRF_PATTERN.search(page.text) if page is not None else None
+        if not match:
+            return False
+        headers = {'X-CSRFToken': match.group(1)}
+        
+        steps = (
+            ('POST /extract-transcript', 'POST', '/extract-transcript',
+             {'json': {'youtube_url': f'https://www.youtube.com/watch?v={video_id}'}, 'headers': headers}),
+            ('POST /generate-blog', 'POST', '/generate-blog', {'json': options, 'headers': headers}),
+            ('GET /result', 'GET', '/result', {'allow_redirects': False}),
+            ('POST /export', 'POST', '/export', {'json': {'format': export_format}, 'headers': headers})
+        )
+        for route, method, path, kwargs in steps:
+            if call(route, method, path, **kwargs) is None:
+                return False
+        return True
+    finally:
+        http.close()
+
+def percentile(ordered, p):
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(round(p / 100.0 * (len(ordered) - 1))))]
+
+def run_step(base_url, concurrency, duration, video_ids, seed=None):
+    """
+    Run closed-loop sessions with a fixed number of virtual users.
+    
+    Args:
+        base_url (str): Base URL of the app.
+        concurrency (int): Number of concurrent virtual users.
+        duration (float): Seconds to keep starting new sessions.
+        video_ids (list): Pool of video IDs sessions pick from.
+        seed (int, optional): Seed for the users' choices.
+    
+    Returns:
+        dict: The step's report.
+    """
+    recorder = SessionRecorder()
+    deadline = time.monotonic() + duration
+    
+    def user(index):
+        rng = random.Random(None if seed is None else seed * 1000 + index)
+        while time.monotonic() < deadline:
+            options = {
+                'length': rng.choice(['short', 'medium', 'long']),
+                'style': rng.choice(['conversational', 'professional', 'technical']),
+                'keywords': '',
+                'title': ''
+            }
+            ok = run_session(base_url, rng.choice(video_ids), options, recorder,
+                             export_format=rng.choice(['html', 'markdown', 'json']))
+            recorder.finish_session(ok)
+    
+    started = time.monotonic()
+    users = [threading.Thread(target=user, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in users:
+        thread.start()
+    for thread in users:
+        thread.join()
+    elapsed = time.monotonic() - started
+    
+    routes = {}
+    for route in ROUTES:
+        ordered = sorted(recorder.samples.get(route, []))
+        statuses = recorder.statuses.get(route, {})
+        errors = sum(count for status, count in statuses.items() if not (isinstance(status, int) and status < 400))
+        routes[route] = {
+            'requests': len(ordered),
+            'rps': round(len(ordered) / elapsed, 2),
+            'p50_ms': _ms(percentile(ordered, 50)),
+            'p95_ms': _ms(percentile(ordered, 95)),
+            'p99_ms': _ms(percentile(ordered, 99)),
+            'error_rate': round(errors / len(ordered), 4) if ordered else 0.0,
+            'statuses': {str(status): count for status, count in sorted(statuses.items(), key=str)}
+        }
+    
+    total = sum(route['requests'] for route in routes.values())
+    return {
+        'concurrency': concurrency,
+        'seconds': round(elapsed, 2),
+        'sessions': recorder.sessions,
+        'failed_sessions': recorder.failed_sessions,
+        'sessions_per_second': round(recorder.sessions / elapsed, 3),
+        'requests_per_second': round(total / elapsed, 2),
+        'routes': routes
+    }
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 1)
+
+def _usage_totals(blog_generator):
+    totals = defaultdict(int)
+    for backend in blog_generator.llm.backends:
+        for key, value in backend.usage.items():
+            totals[key] += value
+    return totals
+
+def format_step(report):
+    """Format a step's report as a text table."""
+    lines = [
+        f"Concurrency {report['concurrency']}: {report['sessions']} sessions "
+        f"({report['failed_sessions']} failed) in {report['seconds']}s, "
+        f"{report['sessions_per_second']} sessions/s, {report['requests_per_second']} req/s",
+        f"  {'route':<26} {'reqs':>6} {'req/s':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}  statuses"
+    ]
+    for route, stats in report['routes'].items():
+        cells = [f"{stats[key]:>9}" if stats[key] is not None else f"{'-':>9}" for key in ('p50_ms', 'p95_ms', 'p99_ms')]
+        statuses = ' '.join(f"{status}:{count}" for status, count in stats['statuses'].items())
+        lines.append(f"  {route:<26} {stats['requests']:>6} {stats['rps']:>7} {' '.join(cells)} "
+                     f"{stats['error_rate'] * 100:>6.1f}%  {statuses}")
+    if 'prefix_cache_hit_ratio' in report:
+        lines.append(f"  LLM prefix cache hit ratio: {report['prefix_cache_hit_ratio']:.1%} "
+                     f"of {report['prompt_tokens']} prompt tokens")
+    return '\n'.join(lines)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the blog generator against local stand-in backends.")
+    parser.add_argument('--server', choices=['werkzeug', 'waitress'], default='werkzeug',
+                        help="WSGI server to run the app with (default: werkzeug)")
+    parser.add_argument('--threads', type=int, default=32, help="Worker threads for waitress (default: 32)")
+    parser.add_argument('--steps', default='1,2,4,8,16', help="Comma-separated concurrency levels (default: 1,2,4,8,16)")
+    parser.add_argument('--step-duration', type=float, default=30, help="Seconds per step (default: 30)")
+    parser.add_argument('--videos', type=int, default=200,
+                        help="Size of the video pool; smaller pools hit the blog store more often (default: 200)")
+    parser.add_argument('--transcript-segments', type=int, default=300, help="Caption segments per video (default: 300)")
+    parser.add_argument('--youtube-latency', default='50:0.3', help="YouTube API latency as MEDIAN_MS[:SIGMA] (default: 50:0.3)")
+    parser.add_argument('--youtube-error-rate', type=float, default=0.0)
+    parser.add_argument('--transcript-latency', default='150:0.4', help="Watch page and caption latency (default: 150:0.4)")
+    parser.add_argument('--transcript-error-rate', type=float, default=0.0)
+    parser.add_argument('--llm-latency', default='3000:0.5', help="DeepSeek latency (default: 3000:0.5)")
+    parser.add_argument('--llm-error-rate', type=float, default=0.0)
+    parser.add_argument('--llm-truncate-rate', type=float, default=0.0,
+                        help="Fraction of completions cut off at the token limit (default: 0)")
+    parser.add_argument('--seed', type=int, default=None, help="Seed for reproducible runs")
+    parser.add_argument('--json', dest='json_path', help="Also write the full report to this file")
+    parser.add_argument('--verbose', action='store_true', help="Keep the app's logs and warnings")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    steps = [int(step) for step in args.steps.split(',') if step.strip()]
+    
+    backends = FakeBackendServer(
+        {
+            'youtube': LatencyProfile.parse(args.youtube_latency, args.youtube_error_rate),
+            'transcript': LatencyProfile.parse(args.transcript_latency, args.transcript_error_rate),
+            'llm': LatencyProfile.parse(args.llm_latency, args.llm_error_rate)
+        },
+        transcript_segments=args.transcript_segments,
+        truncate_rate=args.llm_truncate_rate,
+        seed=args.seed
+    )
+    backends.start()
+    
+    with tempfile.TemporaryDirectory(prefix='loadtest-') as work_dir:
+        configure_app_environment(backends.url, work_dir)
+        import app as app_module
+        
+        if not args.verbose:
+            # Per-request access logs and warnings would drown the report
+            logging.disable(logging.ERROR)
+            warnings.filterwarnings('ignore', message="The 'session' cookie is too large")
+        
+        base_url, stop_server = start_app_server(app_module.app, args.server, args.threads)
+        rng = random.Random(args.seed)
+        alphabet = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789_-'
+        video_ids = [''.join(rng.choice(alphabet) for _ in range(11)) for _ in range(args.videos)]
+        
+        print(f"App on {base_url} ({args.server}), stand-in backends on {backends.url}")
+        reports = []
+        try:
+            for concurrency in steps:
+                usage_before = _usage_totals(app_module.blog_generator)
+                report = run_step(base_url, concurrency, args.step_duration, video_ids, args.seed)
+                usage_after = _usage_totals(app_module.blog_generator)
+                
+                prompt_tokens = usage_after['prompt_tokens'] - usage_before['prompt_tokens']
+                if prompt_tokens:
+                    report['prompt_tokens'] = prompt_tokens
+                    report['prefix_cache_hit_ratio'] = round(
+                        (usage_after['cached_prompt_tokens'] - usage_before['cached_prompt_tokens']) / prompt_tokens, 4)
+                reports.append(report)
+                print(format_step(report), flush=True)
+        except KeyboardInterrupt:
+            print("Interrupted; reporting completed steps")
+        finally:
+            stop_server()
+            backends.stop()
+        
+        # Saturation: the first step where more users no longer buy proportionally more throughput
+        saturated_at = None
+        for previous, current in zip(reports, reports[1:]):
+            expected = previous['sessions_per_second'] * current['concurrency'] / previous['concurrency']
+            if current['sessions_per_second'] < 0.75 * expected:
+                saturated_at = current['concurrency']
+                break
+        
+        summary = {
+            'server': args.server,
+            'steps': reports,
+            'saturated_at': saturated_at,
+            'backends': {service: dict(stats) for service, stats in backends.stats.items()},
+            'generator': dict(app_module.blog_generator.stats)
+        }
+        print(f"\nStand-in backend calls: {json.dumps(summary['backends'])}")
+        if saturated_at:
+            print(f"Throughput stops scaling at concurrency {saturated_at}")
+        if args.json_path:
+            with open(args.json_path, 'w', encoding='utf-8') as f:
+                json.dump(summary, f, indent=2)
+    
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,58 @@
+"""
+Metrics
+
+This module collects runtime metrics from the app's components and renders
+them in the Prometheus text exposition format for the /metrics endpoint.
+"""
+
+import threading
+
+_collectors = []
+_lock = threading.Lock()
+
+def register_collector(collector):
+    """
+    Register a metrics collector.
+    
+    A collector is a callable returning a list of metric families, each a
+    tuple of (name, type, help text, samples), where samples is a list of
+    (labels dict, value) tuples.
+    
+    Args:
+        collector (callable): The collector to register.
+    
+    Returns:
+        callable: The collector, so this can be used as a decorator.
+    """
+    with _lock:
+        _collectors.append(collector)
+    return collector
+
+def _format_labels(labels):
+    """Format a labels dictionary as a Prometheus label set."""
+    if not labels:
+        return ''
+    pairs = []
+    for key, value in sorted(labels.items()):
+        escaped = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{key}="{escaped}"')
+    return '{' + ','.join(pairs) + '}'
+
+def render_metrics():
+    """
+    Render all registered metrics.
+    
+    Returns:
+        str: Metrics in the Prometheus text exposition format.
+    """
+    with _lock:
+        collectors = list(_collectors)
+    
+    lines = []
+    for collector in collectors:
+        for name, metric_type, help_text, samples in collector():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {metric_type}')
+            for labels, value in samples:
+                lines.append(f'{name}{_format_labels(labels)} {value}')
+    return '\n'.join(lines) + '\n'
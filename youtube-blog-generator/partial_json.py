@@ -0,0 +1,211 @@
+"""
+Partial JSON Parser
+
+This module parses the JSON an LLM returns even when it is slightly
+malformed or cut off at the token limit. It tolerates trailing or missing
+commas, raw control characters and Python-style literals, and on truncation
+keeps every complete value while reporting which top-level keys were cut off,
+so only those have to be requested again. Well-formed JSON is decoded with
+the standard json module; the tolerant parser only runs when that fails.
+"""
+
+import re
+import json
+
+_NUMBER = re.compile(r'-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?')
+_LITERALS = {
+    'true': True, 'false': False, 'null': None,
+    'True': True, 'False': False, 'None': None
+}
+_ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+# Surrogates left over once pairs are combined cannot be encoded as UTF-8
+_LONE_SURROGATE = re.compile('[\ud800-\udfff]')
+_DECODER = json.JSONDecoder()
+
+def _replace_lone_surrogates(value):
+    """Replace unpaired surrogates in every string of a decoded value with U+FFFD."""
+    if isinstance(value, str):
+        return _LONE_SURROGATE.sub('\ufffd', value)
+    if isinstance(value, dict):
+        return {_replace_lone_surrogates(k): _replace_lone_surrogates(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_replace_lone_surrogates(v) for v in value]
+    return value
+
+class _Parser:
+    """Recursive-descent parser that returns (value, complete) pairs instead of failing at end of input."""
+    
+    def __init__(self, text, position):
+        self.text = text
+        self.i = position
+        self.partial_keys = []
+    
+    def _skip(self, separators=''):
+        while self.i < len(self.text) and (self.text[self.i].isspace() or self.text[self.i] in separators):
+            self.i += 1
+    
+    def _at_end(self):
+        return self.i >= len(self.text)
+    
+    def value(self, depth=0):
+        self._skip()
+        if self._at_end():
+            return None, False
+        
+        char = self.text[self.i]
+        if char == '{':
+            return self.object(depth)
+        if char == '[':
+            return self.array(depth)
+        if char == '"':
+            return self.string()
+        if char == '-' or char.isdigit():
+            return self.number()
+        return self.literal()
+    
+    def object(self, depth):
+        self.i += 1
+        result = {}
+        while True:
+            # Tolerate trailing, doubled and missing commas
+            self._skip(',')
+            if self._at_end():
+                return result, False
+            if self.text[self.i] == '}':
+                self.i += 1
+                return result, True
+            if self.text[self.i] != '"':
+                raise ValueError(f"Expected a key at position {self.i}")
+            
+            key, complete = self.string()
+            if not complete:
+                return result, False
+            
+            self._skip()
+            if self._at_end():
+                return result, False
+            if self.text[self.i] != ':':
+                raise ValueError(f"Expected ':' at position {self.i}")
+            self.i += 1
+            
+            value, complete = self.value(depth + 1)
+            if not complete:
+                # Keep the partial value; the caller decides whether it is usable
+                if value is not None:
+                    result[key] = value
+                if depth == 0:
+                    self.partial_keys.append(key)
+                return result, False
+            result[key] = value
+    
+    def array(self, depth):
+        self.i += 1
+        result = []
+        while True:
+            self._skip(',')
+            if self._at_end():
+                return result, False
+            if self.text[self.i] == ']':
+                self.i += 1
+                return result, True
+            
+            value, complete = self.value(depth + 1)
+            if not complete:
+                # Drop the element that was cut off, keep the complete ones
+                return result, False
+            result.append(value)
+    
+    def string(self):
+        self.i += 1
+        chars = []
+        while self.i < len(self.text):
+            char = self.text[self.i]
+            if char == '"':
+                self.i += 1
+                return ''.join(chars), True
+            if char == '\\':
+                if self.i + 1 >= len(self.text):
+                    break
+                escape = self.text[self.i + 1]
+                if escape == 'u':
+                    digits = self.text[self.i + 2:self.i + 6]
+                    if len(digits) < 4:
+                        break
+                    try:
+                        code = int(digits, 16)
+                    except ValueError:
+                        chars.append(digits)
+                        self.i += 6
+                        continue
+                    self.i += 6
+                    # Characters outside the BMP are escaped as a UTF-16 surrogate pair
+                    if 0xD800 <= code <= 0xDBFF and self.text.startswith('\\u', self.i):
+                        try:
+                            low = int(self.text[self.i + 2:self.i + 6], 16)
+                        except ValueError:
+                            low = None
+                        if low is not None and 0xDC00 <= low <= 0xDFFF:
+                            code = 0x10000 + ((code - 0xD800) << 10) + (low - 0xDC00)
+                            self.i += 6
+                    chars.append(chr(code))
+                    continue
+                chars.append(_ESCAPES.get(escape, escape))
+                self.i += 2
+                continue
+            # Raw newlines and other control characters are kept as-is
+            chars.append(char)
+            self.i += 1
+        self.i = len(self.text)
+        return ''.join(chars), False
+    
+    def number(self):
+        match = _NUMBER.match(self.text, self.i)
+        if not match:
+            raise ValueError(f"Invalid number at position {self.i}")
+        self.i = match.end()
+        if self._at_end():
+            # The number may have been cut off mid-way
+            return None, False
+        number = match.group()
+        return (float(number) if any(c in number for c in '.eE') else int(number)), True
+    
+    def literal(self):
+        for word, value in _LITERALS.items():
+            if self.text.startswith(word, self.i):
+                self.i += len(word)
+                return value, True
+            if word.startswith(self.text[self.i:]):
+                self.i = len(self.text)
+                return None, False
+        raise ValueError(f"Unexpected character {self.text[self.i]!r} at position {self.i}")
+
+def parse_partial_json(text):
+    """
+    Parse the first JSON object in a piece of text, tolerating defects and truncation.
+    
+    Args:
+        text (str): Text containing a JSON object, possibly wrapped in prose or code fences.
+    
+    Returns:
+        tuple: A tuple containing:
+            - the parsed object (dict), or None if the text has no object
+            - whether the object was complete
+            - the top-level keys whose values were cut off (partial values are kept)
+    
+    Raises:
+        ValueError: If the text is malformed beyond what can be repaired.
+    """
+    start = text.find('{')
+    if start < 0:
+        return None, False, []
+    
+    try:
+        # Text after the object, such as a closing code fence, is ignored
+        value, _ = _DECODER.raw_decode(text, start)
+        return _replace_lone_surrogates(value), True, []
+    except ValueError:
+        pass
+    
+    parser = _Parser(text, start)
+    value, complete = parser.object(0)
+    return _replace_lone_surrogates(value), complete, parser.partial_keys
@@ -0,0 +1,308 @@
+"""
+Request Profiling
+
+This module captures opt-in profiles of individual requests. A request is
+profiled when it carries the admin profiling header or is picked by the
+sampling rate; its profile is written to a rotating local directory under
+its request ID, together with wall-clock vs. CPU time for each stage.
+"""
+
+import os
+import re
+import sys
+import hmac
+import json
+import time
+import uuid
+import random
+import cProfile
+import logging
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from flask import request, g
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+REQUEST_ID_HEADER = 'X-Request-ID'
+PROFILE_HEADER = 'X-Profile'
+PROFILE_MODE_HEADER = 'X-Profile-Mode'
+
+_REQUEST_ID_PATTERN = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+# Stage timings of the request being profiled, or None when it is not profiled
+_current_stages = ContextVar('profile_stages', default=None)
+# Nesting depth of the running stage; worker threads inherit their submitter's depth
+_stage_depth = ContextVar('profile_stage_depth', default=0)
+
+@contextmanager
+def stage(name):
+    """
+    Time a stage of the current request.
+    
+    Records wall-clock and thread CPU time when the request is being
+    profiled, and does nothing otherwise, so it is cheap to leave in place.
+    
+    Args:
+        name (str): Name of the stage.
+    """
+    stages = _current_stages.get()
+    if stages is None:
+        yield
+        return
+    
+    depth = _stage_depth.get()
+    record = {'stage': name, 'depth': depth, 'wall_ms': None, 'cpu_ms': None}
+    stages.append(record)
+    token = _stage_depth.set(depth + 1)
+    wall_start = time.perf_counter()
+    cpu_start = time.thread_time()
+    try:
+        yield
+    finally:
+        record['wall_ms'] = round((time.perf_counter() - wall_start) * 1000, 3)
+        record['cpu_ms'] = round((time.thread_time() - cpu_start) * 1000, 3)
+        _stage_depth.reset(token)
+
+def submit_with_context(executor, fn, *args, **kwargs):
+    """
+    Submit work to an executor so it runs in a copy of the caller's context.
+    
+    Worker threads do not inherit context variables, so without this the
+    stages they time would not be recorded on the request being profiled.
+    
+    Args:
+        executor (concurrent.futures.Executor): The executor to submit to.
+        fn (callable): The function to run.
+        *args: Positional arguments for fn.
+        **kwargs: Keyword arguments for fn.
+    
+    Returns:
+        concurrent.futures.Future: The submitted work.
+    """
+    # Each task gets its own copy: a context cannot be entered by two threads at once
+    return executor.submit(copy_context().run, fn, *args, **kwargs)
+
+class StackSampler:
+    """
+    Low-overhead sampling profiler for a single thread.
+    
+    A background thread periodically records the target thread's stack and
+    counts identical stacks, producing folded stacks that flame graph tools
+    can read.
+    """
+    
+    def __init__(self, thread_id, interval=0.005):
+        """
+        Initialize the StackSampler.
+        
+        Args:
+            thread_id (int): Identifier of the thread to sample.
+            interval (float): Seconds between samples.
+        """
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+    
+    def start(self):
+        self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+                frame = frame.f_back
+            self.samples[';'.join(reversed(stack))] += 1
+    
+    def folded(self):
+        """Get the samples in folded-stack format, one stack per line."""
+        return ''.join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+class RequestProfiler:
+    """Flask extension that profiles selected requests."""
+    
+    def __init__(self, app=None):
+        """
+        Initialize the extension, optionally binding it to an app.
+        
+        Args:
+            app (Flask, optional): The Flask application.
+        """
+        self.admin_token = None
+        self.sample_rate = 0.0
+        self.profile_dir = 'profiles'
+        self.max_files = 50
+        self.sample_interval = 0.005
+        self._write_lock = threading.Lock()
+        
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        """
+        Register the profiling hooks on an app.
+        
+        Settings come from PROFILE_ADMIN_TOKEN, PROFILE_SAMPLE_RATE,
+        PROFILE_DIR, PROFILE_MAX_FILES and PROFILE_SAMPLE_INTERVAL.
+        
+        Args:
+            app (Flask): The Flask application.
+        """
+        self.admin_token = os.getenv('PROFILE_ADMIN_TOKEN') or None
+        self.sample_rate = float(os.getenv('PROFILE_SAMPLE_RATE', '0'))
+        self.profile_dir = os.getenv('PROFILE_DIR', os.path.join(app.root_path, 'profiles'))
+        self.max_files = int(os.getenv('PROFILE_MAX_FILES', '50'))
+        self.sample_interval = float(os.getenv('PROFILE_SAMPLE_INTERVAL', '0.005'))
+        
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        app.teardown_request(self._teardown)
+        app.extensions['request_profiler'] = self
+    
+    def _profile_mode(self):
+        """
+        Decide whether and how to profile the current request.
+        
+        Requests with a valid admin header get a deterministic cProfile
+        profile unless they ask for 'sample'; randomly sampled requests get
+        the low-overhead stack sampler.
+        
+        Returns:
+            str: 'cprofile', 'sample' or None.
+        """
+        token = request.headers.get(PROFILE_HEADER)
+        if token and self.admin_token and hmac.compare_digest(token, self.admin_token):
+            return 'sample' if request.headers.get(PROFILE_MODE_HEADER, '').lower() == 'sample' else 'cprofile'
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return 'sample'
+        return None
+    
+    def _start(self):
+        request_id = request.headers.get(REQUEST_ID_HEADER, '')
+        if not _REQUEST_ID_PATTERN.match(request_id):
+            request_id = uuid.uuid4().hex
+        g.request_id = request_id
+        
+        mode = self._profile_mode()
+        if mode is None:
+            return
+        
+        g.profile = {
+            'mode': mode,
+            'stages': [],
+            'wall_start': time.perf_counter(),
+            'cpu_start': time.thread_time()
+        }
+        g.profile['token'] = _current_stages.set(g.profile['stages'])
+        
+        if mode == 'cprofile':
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                # Another profiler is already active in this thread
+                logger.warning("Could not enable cProfile; falling back to stack sampling")
+                mode = g.profile['mode'] = 'sample'
+            else:
+                g.profile['profiler'] = profiler
+        
+        if mode == 'sample':
+            sampler = StackSampler(threading.get_ident(), self.sample_interval)
+            sampler.start()
+            g.profile['sampler'] = sampler
+    
+    def _stop(self, profile):
+        """Stop the profilers of a request."""
+        if 'profiler' in profile:
+            profile['profiler'].disable()
+        if 'sampler' in profile:
+            profile['sampler'].stop()
+        _current_stages.reset(profile['token'])
+    
+    def _finish(self, response):
+        response.headers[REQUEST_ID_HEADER] = g.get('request_id', '')
+        
+        profile = g.pop('profile', None)
+        if profile is None:
+            return response
+        
+        self._stop(profile)
+        try:
+            self._write(profile, response.status_code)
+        except OSError as e:
+            logger.error(f"Failed to write profile for request {g.request_id}: {str(e)}")
+        return response
+    
+    def _teardown(self, exc):
+        # The request failed before after_request ran: just stop profiling
+        profile = g.pop('profile', None)
+        if profile is not None:
+            self._stop(profile)
+    
+    def _write(self, profile, status_code):
+        """Write a request's profile and stage timings, then rotate old profiles."""
+        wall_ms = (time.perf_counter() - profile['wall_start']) * 1000
+        cpu_ms = (time.thread_time() - profile['cpu_start']) * 1000
+        base = os.path.join(self.profile_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{g.request_id}")
+        
+        with self._write_lock:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            
+            if 'profiler' in profile:
+                profile_file = base + '.prof'
+                profile['profiler'].dump_stats(profile_file)
+            else:
+                profile_file = base + '.folded'
+                with open(profile_file, 'w', encoding='utf-8') as f:
+                    f.write(profile['sampler'].folded())
+            
+            summary = {
+                'request_id': g.request_id,
+                'method': request.method,
+                'path': request.path,
+                'status': status_code,
+                'mode': profile['mode'],
+                'wall_ms': round(wall_ms, 3),
+                'cpu_ms': round(cpu_ms, 3),
+                'stages': profile['stages'],
+                'profile': os.path.basename(profile_file)
+            }
+            with open(base + '.json', 'w', encoding='utf-8') as f:
+                json.dump(summary, f, indent=2)
+            
+            self._rotate()
+        
+        logger.info(f"Profiled {request.method} {request.path} ({g.request_id}): "
+                    f"{wall_ms:.1f}ms wall, {cpu_ms:.1f}ms CPU")
+    
+    def _rotate(self):
+        """Delete the oldest profiles beyond max_files requests."""
+        summaries = sorted(
+            (name for name in os.listdir(self.profile_dir) if name.endswith('.json')),
+            key=lambda name: os.path.getmtime(os.path.join(self.profile_dir, name))
+        )
+        for name in summaries[:max(0, len(summaries) - self.max_files)]:
+            stem = name[:-len('.json')]
+            for suffix in ('.json', '.prof', '.folded'):
+                try:
+                    os.remove(os.path.join(self.profile_dir, stem + suffix))
+                except FileNotFoundError:
+                    pass
@@ -0,0 +1,182 @@
+"""
+Static Assets
+
+This module adds content-hashed static URLs with far-future immutable
+caching, and serves precompressed (.br / .gz) variants of static files.
+"""
+
+import os
+import gzip
+import hashlib
+import logging
+import mimetypes
+import threading
+import click
+from flask import request, send_file
+from werkzeug.security import safe_join
+from compression import accepted_encodings, add_vary_accept_encoding, COMPRESSIBLE_MIMETYPES
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; .gz variants are always produced
+    brotli = None
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE_CONTROL = 'no-cache'
+
+PRECOMPRESSED_VARIANTS = (('br', '.br'), ('gzip', '.gz'))
+
+class StaticAssets:
+    """Flask extension for fingerprinted, precompressed static files."""
+    
+    def __init__(self, app=None):
+        """
+        Initialize the extension, optionally binding it to an app.
+        
+        Args:
+            app (Flask, optional): The Flask application.
+        """
+        self.static_folder = None
+        self.min_size = 500
+        self._hashes = {}
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        """
+        Register URL fingerprinting, precompressed serving, cache headers
+        and the ``flask precompress-static`` command on an application.
+        """
+        self.static_folder = app.static_folder
+        self.min_size = app.config.get('COMPRESS_MIN_SIZE', self.min_size)
+        
+        app.url_defaults(self._add_version)
+        app.before_request(self._serve_precompressed)
+        app.after_request(self._set_cache_headers)
+        
+        @app.cli.command('precompress-static')
+        def precompress_static_command():
+            """Write .gz (and .br, if brotli is installed) variants of static files."""
+            count = self.precompress()
+            click.echo(f"Precompressed {count} static files")
+    
+    def file_hash(self, filename):
+        """
+        Get the content hash of a static file, cached until its mtime changes.
+        
+        Args:
+            filename (str): Path relative to the static folder.
+        
+        Returns:
+            str: A short hex digest, or None if the file does not exist.
+        """
+        path = safe_join(self.static_folder, filename)
+        if not path:
+            return None
+        
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            return None
+        
+        with self._lock:
+            cached = self._hashes.get(path)
+            if cached and cached[0] == mtime:
+                return cached[1]
+        
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(65536), b''):
+                digest.update(chunk)
+        file_hash = digest.hexdigest()[:12]
+        
+        with self._lock:
+            self._hashes[path] = (mtime, file_hash)
+        return file_hash
+    
+    def _add_version(self, endpoint, values):
+        """Append the content hash to ``url_for('static', ...)`` URLs."""
+        if endpoint != 'static' or 'v' in values or 'filename' not in values:
+            return
+        file_hash = self.file_hash(values['filename'])
+        if file_hash:
+            values['v'] = file_hash
+    
+    def _serve_precompressed(self):
+        """Serve a precompressed variant of a static file if one is available."""
+        if request.endpoint != 'static':
+            return None
+        
+        filename = (request.view_args or {}).get('filename', '')
+        path = safe_join(self.static_folder, filename)
+        if not path or not os.path.isfile(path):
+            return None
+        
+        encodings = accepted_encodings(request.headers.get('Accept-Encoding', ''))
+        mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        
+        for encoding, suffix in PRECOMPRESSED_VARIANTS:
+            variant = path + suffix
+            if encoding not in encodings or not os.path.isfile(variant):
+                continue
+            # Ignore stale variants left behind after the source changed
+            if os.path.getmtime(variant) < os.path.getmtime(path):
+                continue
+            
+            response = send_file(variant, mimetype=mimetype, conditional=True)
+            response.headers['Content-Encoding'] = encoding
+            add_vary_accept_encoding(response)
+            return response
+        
+        return None
+    
+    def _set_cache_headers(self, response):
+        """Mark fingerprinted static responses as immutable."""
+        if request.endpoint != 'static' or response.status_code not in (200, 304):
+            return response
+        
+        version = request.args.get('v')
+        filename = (request.view_args or {}).get('filename', '')
+        if version and version == self.file_hash(filename):
+            response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+            response.expires = None
+        else:
+            response.headers['Cache-Control'] = REVALIDATE_CACHE_CONTROL
+        return response
+    
+    def precompress(self):
+        """
+        Write precompressed variants next to every compressible static file.
+        
+        Returns:
+            int: The number of source files that were compressed.
+        """
+        count = 0
+        for root, _, files in os.walk(self.static_folder):
+            for name in files:
+                if name.endswith(('.gz', '.br')):
+                    continue
+                path = os.path.join(root, name)
+                if mimetypes.guess_type(path)[0] not in COMPRESSIBLE_MIMETYPES:
+                    continue
+                
+                with open(path, 'rb') as f:
+                    data = f.read()
+                if len(data) < self.min_size:
+                    continue
+                
+                with open(path + '.gz', 'wb') as f:
+                    f.write(gzip.compress(data, compresslevel=9))
+                if brotli is not None:
+                    with open(path + '.br', 'wb') as f:
+                        f.write(brotli.compress(data, quality=11))
+                
+                count += 1
+                logger.info(f"Precompressed {os.path.relpath(path, self.static_folder)}")
+        
+        return count
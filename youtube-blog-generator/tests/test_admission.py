@@ -0,0 +1,82 @@
+"""
+Tests for the fair admission controller.
+"""
+
+import time
+import threading
+import pytest
+from admission import AdmissionController, AdmissionRejected
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'condition not reached'
+        time.sleep(0.001)
+
+def queue_request(controller, session_id, granted):
+    """Start a thread that waits for a slot, then wait until it is queued."""
+    queued = controller.snapshot()['queued']
+    
+    def run():
+        controller.acquire(session_id)
+        granted.append(session_id)
+    
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    wait_until(lambda: controller.snapshot()['queued'] == queued + 1)
+    return thread
+
+def test_admits_up_to_max_concurrent_immediately():
+    controller = AdmissionController(max_concurrent=2, max_queue=4, max_per_session=2)
+    controller.acquire('a')
+    controller.acquire('b')
+    assert controller.snapshot()['running'] == 2
+    assert controller.snapshot()['queued'] == 0
+
+def test_queued_sessions_are_served_round_robin():
+    controller = AdmissionController(max_concurrent=1, max_queue=8, max_per_session=4, queue_timeout=5)
+    controller.acquire('holder')
+    granted = []
+    threads = [queue_request(controller, session_id, granted) for session_id in ['a', 'a', 'a', 'b', 'c']]
+    
+    for expected in range(1, 6):
+        controller.release(granted[-1] if granted else 'holder')
+        wait_until(lambda: len(granted) == expected)
+    
+    for thread in threads:
+        thread.join()
+    # Session a queued first, but b and c do not wait behind all of its requests
+    assert granted == ['a', 'b', 'c', 'a', 'a']
+
+def test_rejects_when_session_limit_reached():
+    controller = AdmissionController(max_concurrent=4, max_queue=4, max_per_session=1)
+    controller.acquire('a')
+    with pytest.raises(AdmissionRejected) as excinfo:
+        controller.acquire('a')
+    assert excinfo.value.retry_after >= 1
+    controller.acquire('b')
+    assert controller.stats['rejected'] == 1
+
+def test_rejects_when_queue_full():
+    controller = AdmissionController(max_concurrent=1, max_queue=1, max_per_session=2, queue_timeout=5)
+    controller.acquire('holder')
+    granted = []
+    thread = queue_request(controller, 'a', granted)
+    with pytest.raises(AdmissionRejected):
+        controller.acquire('b')
+    controller.release('holder')
+    thread.join()
+    assert granted == ['a']
+
+def test_queue_timeout_withdraws_request():
+    controller = AdmissionController(max_concurrent=1, max_queue=2, max_per_session=1, queue_timeout=0.05)
+    controller.acquire('holder')
+    with pytest.raises(AdmissionRejected):
+        controller.acquire('a')
+    snapshot = controller.snapshot()
+    assert snapshot['queued'] == 0
+    assert snapshot['timed_out'] == 1
+    # The withdrawn request no longer counts against the session's limit
+    controller.release('holder')
+    controller.acquire('a')
+    assert controller.snapshot()['running'] == 1
@@ -0,0 +1,152 @@
+"""
+Tests for the Flask routes and helpers, run against a temporary blog store.
+"""
+
+import os
+import tempfile
+
+os.environ['BLOG_STORE_PATH'] = os.path.join(tempfile.mkdtemp(prefix='blog-store-test-'), 'store.db')
+
+import pytest
+import app as app_module
+from blog_store import BlogStore
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = BlogStore(str(tmp_path / 'store.db'))
+    monkeypatch.setattr(app_module, 'blog_store', store)
+    return store
+
+def test_digest_reads_a_bounded_prefix_of_long_transcripts(store, monkeypatch):
+    monkeypatch.setenv('TRANSCRIPT_DIGEST_SOURCE_CHARS', '5000')
+    store.save_transcript('vid', 'en', 'Words about rivers and bridges. ' * 2000)
+    
+    reads = []
+    get_transcript = store.get_transcript
+    
+    def recording_get_transcript(*args, **kwargs):
+        record = get_transcript(*args, **kwargs)
+        reads.append((kwargs.get('max_chars'), len(record['transcript']), record['length']))
+        return record
+    
+    digested = []
+    monkeypatch.setattr(store, 'get_transcript', recording_get_transcript)
+    monkeypatch.setattr(app_module, 'extractive_digest', lambda text, max_chars: digested.append(len(text)) or text[:max_chars])
+    
+    assert app_module.get_transcript_digest('vid', 'en')
+    assert reads == [(5000, 5000, 64000)]
+    assert digested == [5000]
+    # Built once, then served from the store
+    assert app_module.get_transcript_digest('vid', 'en')
+    assert len(reads) == 1
+
+@pytest.fixture
+def client():
+    app_module.app.config['WTF_CSRF_ENABLED'] = False
+    return app_module.app.test_client()
+
+def save_blogs(store, count, video_id='vid'):
+    return [
+        store.save_blog(video_id, 'en', {'title': f'Post {i}'}, {'title': f'Post {i}', 'content': 'text', 'tags': []})
+        for i in range(count)
+    ]
+
+def test_blog_list_pages_cover_every_blog_once(store, client):
+    blog_ids = save_blogs(store, 5)
+    
+    pages = [client.get(f'/blogs?per_page=2&page={page}').get_json() for page in [1, 2, 3, 4]]
+    
+    assert [page['total'] for page in pages] == [5, 5, 5, 5]
+    assert [len(page['items']) for page in pages] == [2, 2, 1, 0]
+    listed = [item['id'] for page in pages for item in page['items']]
+    assert sorted(listed) == blog_ids
+    created = [item['created_at'] for page in pages for item in page['items']]
+    assert created == sorted(created, reverse=True)
+
+def test_blog_list_filters_and_clamps_page_size(store, client):
+    save_blogs(store, 3, video_id='first')
+    other = save_blogs(store, 2, video_id='second')
+    
+    filtered = client.get('/blogs?video_id=second').get_json()
+    assert filtered['total'] == 2
+    assert sorted(item['id'] for item in filtered['items']) == other
+    
+    clamped = client.get('/blogs?per_page=1000&page=0').get_json()
+    assert (clamped['per_page'], clamped['page'], len(clamped['items'])) == (100, 1, 5)
+
+SECTIONED_BLOG = {
+    'title': 'Rivers',
+    'content': 'About rivers',
+    'tags': ['water'],
+    'sections': [{'type': 'paragraph', 'content': 'Intro'}, {'type': 'paragraph', 'content': 'Bridges'}]
+}
+
+@pytest.fixture
+def regeneration(store, client, monkeypatch):
+    """Store a blog, give the client a session and stub out the LLM call."""
+    blog_id = store.save_blog('vid', 'en', {'length': 'medium', 'keywords': ['rivers'], 'title': ''}, SECTIONED_BLOG)
+    with client.session_transaction() as session:
+        session['session_id'] = 'session-one'
+        session['blog_id'] = blog_id
+    
+    calls = []
+    
+    def regenerate_element(blog_content, element, digest, options, index=None):
+        calls.append((element, index, options))
+        sections = [dict(section) for section in blog_content['sections']]
+        sections[index]['content'] = 'Rewritten'
+        return {'success': True, 'blog_content': dict(blog_content, sections=sections), 'value': sections[index]}
+    
+    monkeypatch.setattr(app_module, 'get_transcript_digest', lambda *args: 'digest')
+    monkeypatch.setattr(app_module.blog_generator, 'regenerate_element', regenerate_element)
+    return blog_id, calls
+
+@pytest.mark.parametrize('body', [
+    {'element': 'section', 'index': '1'},
+    {'element': 'section', 'index': True},
+    {'element': 'section', 'index': 1.0},
+    {'element': ['section'], 'index': 1},
+])
+def test_regenerate_rejects_malformed_element_or_index(regeneration, client, body):
+    _, calls = regeneration
+    
+    response = client.post('/regenerate', json=body)
+    
+    assert response.status_code == 400
+    assert not response.get_json()['success']
+    assert calls == []
+
+def test_regenerate_rejects_out_of_range_section(store, client, monkeypatch):
+    blog_id = store.save_blog('vid', 'en', {'length': 'medium'}, SECTIONED_BLOG)
+    monkeypatch.setattr(app_module, 'get_transcript_digest', lambda *args: 'digest')
+    
+    response = client.post('/regenerate', json={'blog_id': blog_id, 'element': 'section', 'index': 5})
+    
+    assert response.status_code == 400
+    assert 'between 0 and 1' in response.get_json()['error']
+
+def test_regenerate_saves_an_edited_copy_under_the_session_owner(regeneration, store, client):
+    blog_id, calls = regeneration
+    
+    response = client.post('/regenerate', json={'element': 'section', 'index': 1, 'keywords': ['bridges', 'rivers']})
+    
+    result = response.get_json()
+    assert response.status_code == 200 and result['success']
+    edited_id = result['blog_id']
+    assert edited_id != blog_id
+    
+    edited = store.get_blog(edited_id)
+    assert edited['options']['edited_by'] == app_module.edit_owner('session-one')
+    assert edited['options']['keywords'] == ['bridges', 'rivers']
+    assert edited['blog_content']['sections'][1]['content'] == 'Rewritten'
+    assert calls[0][:2] == ('section', 1)
+    # The shared blog served to other sessions is untouched
+    original = store.get_blog(blog_id)
+    assert 'edited_by' not in original['options']
+    assert original['blog_content'] == SECTIONED_BLOG
+    with client.session_transaction() as session:
+        assert session['blog_id'] == edited_id
+    
+    # A second edit by the same session replaces its copy instead of adding another
+    again = client.post('/regenerate', json={'element': 'section', 'index': 0, 'keywords': ['bridges', 'rivers']})
+    assert again.get_json()['blog_id'] == edited_id
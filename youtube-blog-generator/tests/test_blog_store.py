@@ -0,0 +1,111 @@
+"""
+Tests for the SQLite blog store and its full-text index.
+"""
+
+import sqlite3
+import pytest
+import blog_store
+from blog_store import BlogStore
+
+OPTIONS = {'length': 'medium', 'style': 'professional', 'keywords': [], 'title': ''}
+
+def blog(title, content='', tags=()):
+    return {'title': title, 'content': content, 'tags': list(tags)}
+
+@pytest.fixture
+def store(tmp_path):
+    return BlogStore(str(tmp_path / 'store.db'))
+
+def search_ids(store, query):
+    return sorted(item['id'] for item in store.list_blogs(query=query)['items'])
+
+def test_transcript_is_indexed_once_per_video_and_language(store):
+    store.save_transcript('vid', 'en', 'the quick brown fox ' * 1000)
+    for length in ['short', 'medium', 'long']:
+        store.save_blog('vid', 'en', dict(OPTIONS, length=length), blog(f'Post {length}'))
+    
+    conn = store._connect()
+    assert [row['name'] for row in conn.execute('PRAGMA table_info(blogs_fts)')] == ['title', 'content', 'tags']
+    assert conn.execute('SELECT COUNT(*) FROM transcripts_fts').fetchone()[0] == 1
+
+def test_search_matches_blog_text_or_transcript(store):
+    store.save_transcript('a', 'en', 'a talk about sourdough starters')
+    store.save_transcript('b', 'en', 'a talk about espresso machines')
+    sourdough = store.save_blog('a', 'en', OPTIONS, blog('Baking at home', 'Flour and water', ['bread']))
+    espresso = store.save_blog('b', 'en', OPTIONS, blog('Coffee gear', 'Grinders and bread pairings'))
+    
+    assert search_ids(store, 'sourdough') == [sourdough]
+    assert search_ids(store, 'espresso') == [espresso]
+    assert search_ids(store, 'bread') == [sourdough, espresso]
+    assert search_ids(store, 'pizza') == []
+    assert [b['id'] for b in store.iter_blogs(query='sourdough')] == [sourdough]
+
+def test_replacing_a_transcript_reindexes_it(store):
+    store.save_transcript('vid', 'en', 'original words')
+    blog_id = store.save_blog('vid', 'en', OPTIONS, blog('Post'))
+    store.save_transcript('vid', 'en', 'replacement words')
+    
+    assert search_ids(store, 'original') == []
+    assert search_ids(store, 'replacement') == [blog_id]
+    assert store._connect().execute('SELECT COUNT(*) FROM transcripts_fts').fetchone()[0] == 1
+
+def test_translations_only_match_blogs_in_their_language(store):
+    store.save_transcript('vid', 'en', 'hello world')
+    store.save_transcript('vid', 'fr', 'bonjour le monde', source_language='en')
+    english = store.save_blog('vid', 'en', OPTIONS, blog('Post'))
+    french = store.save_blog('vid', 'fr', OPTIONS, blog('Article'))
+    
+    assert search_ids(store, 'hello') == [english]
+    assert search_ids(store, 'bonjour') == [french]
+
+def test_migrates_per_blog_transcript_index(tmp_path):
+    path = str(tmp_path / 'old.db')
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE transcripts (video_id TEXT NOT NULL, language TEXT NOT NULL, transcript TEXT NOT NULL,
+            video_details TEXT, created_at REAL NOT NULL, PRIMARY KEY (video_id, language));
+        CREATE TABLE blogs (id INTEGER PRIMARY KEY AUTOINCREMENT, video_id TEXT NOT NULL, language TEXT NOT NULL,
+            options_key TEXT NOT NULL, options TEXT NOT NULL, title TEXT NOT NULL, blog_content TEXT NOT NULL,
+            created_at REAL NOT NULL, UNIQUE (video_id, language, options_key));
+        CREATE VIRTUAL TABLE blogs_fts USING fts5 (title, content, tags, transcript);
+        INSERT INTO transcripts VALUES ('vid', 'en', 'volcanoes erupting', NULL, 1);
+        INSERT INTO blogs VALUES (1, 'vid', 'en', '{}', '{}', 'Geology',
+            '{"title": "Geology", "content": "Magma chambers", "tags": ["rocks", "lava"]}', 1);
+        INSERT INTO blogs_fts (rowid, title, content, tags, transcript)
+            VALUES (1, 'Geology', 'Magma chambers', 'rocks lava', 'volcanoes erupting');
+    """)
+    conn.close()
+    
+    store = BlogStore(path)
+    
+    columns = [row['name'] for row in store._connect().execute('PRAGMA table_info(blogs_fts)')]
+    assert 'transcript' not in columns
+    for query in ['volcanoes', 'magma', 'lava', 'geology']:
+        assert search_ids(store, query) == [1]
+    assert store.get_transcript('vid')['source_language'] is None
+
+def save_posts(store, count):
+    return [store.save_blog(f'vid{i}', 'en', OPTIONS, blog(f'Post {i}')) for i in range(count)]
+
+def test_iter_blogs_pages_with_a_keyset_cursor(store):
+    blog_ids = save_posts(store, 7)
+    
+    assert [b['id'] for b in store.iter_blogs(batch_size=2)] == blog_ids
+    assert [b['id'] for b in store.iter_blogs(video_id='vid3', batch_size=2)] == [blog_ids[3]]
+    assert list(store.iter_blogs(ids=[])) == []
+
+def test_iter_blogs_splits_ids_across_chunks(store, monkeypatch):
+    monkeypatch.setattr(blog_store, 'ID_CHUNK_SIZE', 3)
+    blog_ids = save_posts(store, 10)
+    # Unordered, duplicated, missing and string IDs
+    wanted = [blog_ids[9], blog_ids[0], str(blog_ids[4]), blog_ids[4], 9999] + blog_ids[5:8]
+    
+    found = [b['id'] for b in store.iter_blogs(ids=wanted, batch_size=2)]
+    
+    assert found == sorted({blog_ids[i] for i in [0, 4, 5, 6, 7, 9]})
+
+def test_iter_blogs_with_several_chunks_of_ids(store):
+    blog_ids = save_posts(store, 20)
+    ids = list(range(1, 3 * blog_store.ID_CHUNK_SIZE + 1))
+    
+    assert [b['id'] for b in store.iter_blogs(ids=ids, batch_size=7)] == blog_ids
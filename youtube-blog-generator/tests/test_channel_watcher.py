@@ -0,0 +1,101 @@
+"""
+Tests for the channel watcher's stored watermark and failure counts.
+"""
+
+import pytest
+from blog_store import BlogStore
+from channel_watcher import ChannelWatcher
+
+class FakeYouTubeAPI:
+    def __init__(self):
+        self.videos = []
+    
+    def upload(self, video_id, published_at):
+        self.videos.append({'video_id': video_id, 'title': video_id, 'published_at': published_at})
+    
+    def get_uploads_playlist_id(self, channel_id):
+        return {'success': True, 'playlist_id': f'uploads-{channel_id}'}
+    
+    def get_playlist_videos(self, playlist_id):
+        return {'success': True, 'videos': list(reversed(self.videos))}
+
+class FakeExtractor:
+    """Saves a transcript for every video except the ones listed as failing."""
+    
+    def __init__(self, store):
+        self.store = store
+        self.youtube_api = FakeYouTubeAPI()
+        self.failing = set()
+        self.requested = []
+    
+    def get_transcript(self, url):
+        video_id = url.rsplit('=', 1)[1]
+        self.requested.append(video_id)
+        if video_id in self.failing:
+            return {'success': False, 'error': 'Transcripts are disabled'}
+        self.store.save_transcript(video_id, 'en', f'transcript of {video_id}')
+        return {'success': True}
+
+@pytest.fixture
+def store(tmp_path):
+    return BlogStore(str(tmp_path / 'store.db'))
+
+@pytest.fixture
+def extractor(store):
+    return FakeExtractor(store)
+
+def poll(extractor, store, max_attempts=3):
+    """Poll with a fresh watcher, like a separate --once run."""
+    watcher = ChannelWatcher(extractor, None, store, ['channel'], max_attempts=max_attempts)
+    return watcher.poll_once()
+
+def test_first_poll_skips_existing_uploads(extractor, store):
+    extractor.youtube_api.upload('old1', '2026-01-01T00:00:00Z')
+    extractor.youtube_api.upload('old2', '2026-01-02T00:00:00Z')
+    
+    assert poll(extractor, store) == {'transcripts': 0, 'drafts': 0}
+    assert store.get_channel_watermark('channel') == '2026-01-02T00:00:00Z'
+    assert extractor.requested == []
+    
+    extractor.youtube_api.upload('new', '2026-01-03T00:00:00Z')
+    assert poll(extractor, store) == {'transcripts': 1, 'drafts': 0}
+    assert extractor.requested == ['new']
+    assert store.get_channel_watermark('channel') == '2026-01-03T00:00:00Z'
+
+def test_watermark_stays_before_a_failed_video_across_polls(extractor, store):
+    api = extractor.youtube_api
+    api.upload('old', '2026-01-01T00:00:00Z')
+    poll(extractor, store)
+    api.upload('broken', '2026-01-02T00:00:00Z')
+    api.upload('later', '2026-01-03T00:00:00Z')
+    extractor.failing.add('broken')
+    
+    poll(extractor, store)
+    assert store.get_channel_watermark('channel') == '2026-01-01T00:00:00Z'
+    
+    # The next poll retries the failed video, but not the one already fetched
+    extractor.requested.clear()
+    assert poll(extractor, store) == {'transcripts': 0, 'drafts': 0}
+    assert extractor.requested == ['broken']
+    assert store.get_channel_watermark('channel') == '2026-01-01T00:00:00Z'
+    assert store.get_watch_failures('broken') == 2
+    assert store.get_transcript('later')
+
+def test_watermark_moves_on_after_max_attempts(extractor, store):
+    api = extractor.youtube_api
+    api.upload('old', '2026-01-01T00:00:00Z')
+    poll(extractor, store)
+    api.upload('broken', '2026-01-02T00:00:00Z')
+    extractor.failing.add('broken')
+    
+    for _ in range(2):
+        poll(extractor, store, max_attempts=3)
+    assert store.get_channel_watermark('channel') == '2026-01-01T00:00:00Z'
+    
+    poll(extractor, store, max_attempts=3)
+    assert store.get_watch_failures('broken') == 3
+    assert store.get_channel_watermark('channel') == '2026-01-02T00:00:00Z'
+    
+    extractor.requested.clear()
+    poll(extractor, store, max_attempts=3)
+    assert extractor.requested == []
@@ -0,0 +1,106 @@
+"""
+Tests for the circuit breaker state machine.
+"""
+
+import pytest
+import requests
+import circuit_breaker
+from circuit_breaker import CircuitBreaker, CircuitOpenError, CLOSED, OPEN, HALF_OPEN
+from llm_backends import OpenAICompatibleBackend
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(circuit_breaker.time, 'monotonic', lambda: now[0])
+    return now
+
+def fail(breaker, times=1):
+    for _ in range(times):
+        assert breaker.allow_request()
+        breaker.record_failure()
+
+def test_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker('test', failure_threshold=3, reset_timeout=30)
+    fail(breaker, 2)
+    assert breaker.state == CLOSED
+    fail(breaker)
+    assert breaker.state == OPEN
+    assert breaker.is_open()
+    assert not breaker.allow_request()
+    assert breaker.stats['opened'] == 1
+    assert breaker.stats['rejections'] == 1
+
+def test_success_resets_failure_count(clock):
+    breaker = CircuitBreaker('test', failure_threshold=3)
+    fail(breaker, 2)
+    assert breaker.allow_request()
+    breaker.record_success()
+    fail(breaker, 2)
+    assert breaker.state == CLOSED
+
+def test_half_open_probe_success_closes(clock):
+    breaker = CircuitBreaker('test', failure_threshold=1, reset_timeout=30)
+    fail(breaker)
+    clock[0] += 10
+    assert breaker.retry_after() == pytest.approx(20)
+    clock[0] += 20
+    assert not breaker.is_open()
+    assert breaker.allow_request()
+    assert breaker.state == HALF_OPEN
+    # Only one probe at a time
+    assert not breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.allow_request()
+
+def test_half_open_probe_failure_reopens(clock):
+    breaker = CircuitBreaker('test', failure_threshold=2, reset_timeout=30)
+    fail(breaker, 2)
+    clock[0] += 30
+    fail(breaker)
+    assert breaker.state == OPEN
+    assert breaker.retry_after() == pytest.approx(30)
+    assert breaker.stats['opened'] == 2
+
+def test_call_raises_when_open(clock):
+    breaker = CircuitBreaker('test', failure_threshold=1, reset_timeout=30)
+    with pytest.raises(ZeroDivisionError):
+        breaker.call(lambda: 1 / 0)
+    with pytest.raises(CircuitOpenError) as excinfo:
+        breaker.call(lambda: 'unreachable')
+    assert excinfo.value.retry_after == pytest.approx(30)
+
+def test_call_ignores_errors_that_are_not_failures(clock):
+    breaker = CircuitBreaker('test', failure_threshold=1)
+    with pytest.raises(KeyError):
+        breaker.call(lambda: {}['missing'], is_failure=lambda e: not isinstance(e, KeyError))
+    assert breaker.state == CLOSED
+    assert breaker.call(lambda x: x * 2, 21) == 42
+
+class RaisingSession:
+    def __init__(self, error):
+        self.error = error
+    
+    def post(self, *args, **kwargs):
+        raise self.error
+
+@pytest.mark.parametrize('error', [
+    requests.exceptions.ChunkedEncodingError('connection broken'),
+    requests.exceptions.ContentDecodingError('bad gzip'),
+    requests.exceptions.TooManyRedirects('redirect loop'),
+])
+def test_backend_probe_failure_releases_half_open_slot(clock, error):
+    backend = OpenAICompatibleBackend('probe-test', 'http://llm.invalid', None, 'model')
+    backend.breaker = CircuitBreaker('llm_probe-test', failure_threshold=1, reset_timeout=30)
+    backend.session = RaisingSession(error)
+    fail(backend.breaker)
+    clock[0] += 30
+    
+    with pytest.raises(type(error)):
+        backend.complete([{'role': 'user', 'content': 'hi'}])
+    
+    # The failed probe reopened the circuit instead of holding the only probe slot
+    assert backend.breaker.state == OPEN
+    assert backend.breaker.half_open_calls == 0
+    clock[0] += 30
+    assert backend.breaker.allow_request()
@@ -0,0 +1,87 @@
+"""
+Tests for response compression and fingerprinted static assets.
+"""
+
+import gzip
+import pytest
+from flask import Flask, jsonify, url_for
+import compression
+import static_assets as static_assets_module
+from compression import ResponseCompression, accepted_encodings
+from static_assets import StaticAssets, IMMUTABLE_CACHE_CONTROL, REVALIDATE_CACHE_CONTROL
+
+STYLESHEET = 'body { color: black; }\n' * 100
+
+@pytest.fixture
+def app(tmp_path):
+    static = tmp_path / 'static'
+    static.mkdir()
+    (static / 'site.css').write_text(STYLESHEET)
+    
+    app = Flask(__name__, static_folder=str(static))
+    app.config['COMPRESS_MIN_SIZE'] = 100
+    
+    @app.route('/json/<int:size>')
+    def json_body(size):
+        return jsonify({'text': 'a' * size})
+    
+    ResponseCompression(app)
+    StaticAssets(app)
+    return app
+
+def test_accepted_encodings_skips_zero_quality():
+    assert accepted_encodings('gzip;q=0.5, br;q=0, Deflate') == {'gzip', 'deflate'}
+    assert accepted_encodings('gzip;q=bogus') == set()
+    assert accepted_encodings(None) == set()
+
+def test_large_responses_are_gzipped(app, monkeypatch):
+    monkeypatch.setattr(compression, 'brotli', None)
+    client = app.test_client()
+    
+    response = client.get('/json/1000', headers={'Accept-Encoding': 'br, gzip'})
+    
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert b'"text"' in gzip.decompress(response.data)
+
+def test_small_or_unaccepted_responses_are_left_alone(app):
+    client = app.test_client()
+    
+    small = client.get('/json/10', headers={'Accept-Encoding': 'gzip'})
+    plain = client.get('/json/1000', headers={'Accept-Encoding': 'identity'})
+    
+    for response in [small, plain]:
+        assert 'Content-Encoding' not in response.headers
+        assert 'Accept-Encoding' in response.headers['Vary']
+        assert response.get_json()['text'].startswith('a')
+
+def test_fingerprinted_static_urls_are_immutable(app):
+    client = app.test_client()
+    with app.test_request_context():
+        url = url_for('static', filename='site.css')
+    assert '?v=' in url
+    
+    fingerprinted = client.get(url)
+    unversioned = client.get('/static/site.css')
+    stale = client.get('/static/site.css?v=000000000000')
+    
+    assert fingerprinted.headers['Cache-Control'] == IMMUTABLE_CACHE_CONTROL
+    assert unversioned.headers['Cache-Control'] == REVALIDATE_CACHE_CONTROL
+    assert stale.headers['Cache-Control'] == REVALIDATE_CACHE_CONTROL
+    for response in [fingerprinted, unversioned, stale]:
+        response.close()
+
+def test_precompressed_static_variant_is_served(app, monkeypatch):
+    monkeypatch.setattr(static_assets_module, 'brotli', None)
+    static_assets = StaticAssets()
+    static_assets.static_folder = app.static_folder
+    static_assets.min_size = 100
+    assert static_assets.precompress() == 1
+    client = app.test_client()
+    
+    response = client.get('/static/site.css', headers={'Accept-Encoding': 'gzip'})
+    
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.mimetype == 'text/css'
+    assert gzip.decompress(response.data).decode() == STYLESHEET
+    response.close()
@@ -0,0 +1,81 @@
+"""
+Tests for per-budget latency windows and request hedging.
+"""
+
+import threading
+import pytest
+from circuit_breaker import CircuitBreaker
+from llm_backends import OpenAICompatibleBackend, HedgedLLMClient, latency_bucket
+
+class FakeBackend(OpenAICompatibleBackend):
+    """Backend that answers after a delay instead of calling an API."""
+    
+    def __init__(self, name, delay=0.0):
+        super().__init__(name, 'http://llm.invalid')
+        self.breaker = CircuitBreaker(f'llm_{name}')
+        self.delay = delay
+        self.release = threading.Event()
+        self.calls = []
+    
+    def complete(self, messages, **params):
+        self.calls.append(params.get('max_tokens'))
+        self.release.wait(self.delay)
+        return {'choices': [{'message': {'content': f'from {self.name}'}, 'finish_reason': 'stop'}]}
+
+def record(backend, max_tokens, seconds, count=30):
+    for _ in range(count):
+        backend.latency_window(max_tokens).record(seconds)
+
+@pytest.fixture
+def backends():
+    primary, secondary = FakeBackend('primary'), FakeBackend('secondary')
+    yield primary, secondary
+    for backend in [primary, secondary]:
+        backend.release.set()
+
+def test_latency_bucket_boundaries():
+    assert latency_bucket(1) == 'le_256'
+    assert latency_bucket(256) == 'le_256'
+    assert latency_bucket(257) == 'le_1536'
+    assert latency_bucket(1536) == 'le_1536'
+    assert latency_bucket(1537) == 'full'
+    assert latency_bucket(None) == 'full'
+
+def test_hedge_delay_uses_the_window_for_the_request_budget(backends):
+    primary, _ = backends
+    client = HedgedLLMClient(backends, min_hedge_delay=0.5, default_hedge_delay=20.0)
+    record(primary, 200, 1.0)
+    record(primary, 1000, 0.1)
+    
+    assert client.hedge_delay(primary, 100) == pytest.approx(1.0)
+    # Fast medium-budget requests are still bounded below by min_hedge_delay
+    assert client.hedge_delay(primary, 1536) == pytest.approx(0.5)
+    # Full-size requests have no samples yet, so short edits do not set their delay
+    assert client.hedge_delay(primary, 4000) == 20.0
+    assert client.hedge_delay(primary) == 20.0
+
+def test_slow_short_request_is_hedged(backends):
+    primary, secondary = backends
+    primary.delay = 10.0
+    client = HedgedLLMClient(backends, min_hedge_delay=0.05, default_hedge_delay=20.0)
+    record(primary, 200, 0.01)
+    
+    response = client.complete([{'role': 'user', 'content': 'hi'}], max_tokens=200)
+    
+    assert response['choices'][0]['message']['content'] == 'from secondary'
+    assert secondary.calls == [200]
+    assert client.stats['hedged'] == 1
+    assert client.stats['secondary_wins'] == 1
+
+def test_full_size_request_waits_for_its_own_window(backends):
+    primary, secondary = backends
+    primary.delay = 0.3
+    client = HedgedLLMClient(backends, min_hedge_delay=0.05, default_hedge_delay=20.0)
+    # Short requests are fast, but that says nothing about a full post
+    record(primary, 200, 0.01)
+    
+    response = client.complete([{'role': 'user', 'content': 'hi'}], max_tokens=4000)
+    
+    assert response['choices'][0]['message']['content'] == 'from primary'
+    assert secondary.calls == []
+    assert client.stats['hedged'] == 0
@@ -0,0 +1,57 @@
+"""
+Tests for the partial JSON parser.
+"""
+
+import pytest
+from partial_json import parse_partial_json
+
+def test_complete_json_with_surrounding_prose():
+    text = 'Here is the post:\n```json\n{"title": "T", "tags": ["a", "b"]}\n```'
+    assert parse_partial_json(text) == ({'title': 'T', 'tags': ['a', 'b']}, True, [])
+
+def test_escaped_emoji_is_combined_from_surrogate_pair():
+    value, complete, _ = parse_partial_json('{"title": "Launch day \\ud83d\\ude80"}')
+    assert complete
+    assert value['title'] == 'Launch day \U0001F680'
+    value['title'].encode('utf-8')
+
+def test_escaped_emoji_in_repaired_json():
+    # The trailing comma forces the tolerant parser
+    value, complete, _ = parse_partial_json('{"title": "Launch \\ud83d\\ude80", "content": "x\ny",}')
+    assert complete
+    assert value == {'title': 'Launch \U0001F680', 'content': 'x\ny'}
+
+def test_escaped_emoji_in_truncated_json():
+    value, complete, partial_keys = parse_partial_json('{"title": "Go \\ud83d\\ude80", "content": "Par')
+    assert not complete
+    assert value == {'title': 'Go \U0001F680', 'content': 'Par'}
+    assert partial_keys == ['content']
+
+@pytest.mark.parametrize('text', [
+    '{"title": "broken \\ud83d here"}',
+    '{"title": "broken \\ude80 here",}',
+    '{"title": "cut \\ud83d',
+])
+def test_lone_surrogates_are_replaced(text):
+    value, _, _ = parse_partial_json(text)
+    assert '\ufffd' in value['title']
+    value['title'].encode('utf-8')
+
+def test_truncation_keeps_complete_values():
+    text = '{"title": "T", "sections": [{"heading": "A"}, {"heading": "B"'
+    value, complete, partial_keys = parse_partial_json(text)
+    assert not complete
+    assert value == {'title': 'T', 'sections': [{'heading': 'A'}]}
+    assert partial_keys == ['sections']
+
+def test_python_literals_and_missing_commas():
+    value, complete, _ = parse_partial_json('{"a": True "b": None, "c": [1 2.5]}')
+    assert complete
+    assert value == {'a': True, 'b': None, 'c': [1, 2.5]}
+
+def test_no_object():
+    assert parse_partial_json('no json here') == (None, False, [])
+
+def test_unrepairable_text_raises():
+    with pytest.raises(ValueError):
+        parse_partial_json('{"a" 1}')
@@ -0,0 +1,55 @@
+"""
+Tests for request stage timing.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import profiling
+from profiling import stage, submit_with_context
+
+def run_profiled(fn):
+    stages = []
+    token = profiling._current_stages.set(stages)
+    try:
+        fn()
+    finally:
+        profiling._current_stages.reset(token)
+    return {record['stage']: record['depth'] for record in stages}
+
+def test_stages_are_not_recorded_without_a_profile():
+    with stage('ignored'):
+        pass
+    assert profiling._current_stages.get() is None
+
+def test_nested_stage_depths():
+    def request():
+        with stage('outer'):
+            with stage('inner'):
+                pass
+        with stage('sibling'):
+            pass
+    
+    assert run_profiled(request) == {'outer': 0, 'inner': 1, 'sibling': 0}
+
+def test_concurrent_worker_stages_nest_under_their_own_parent():
+    both_running = threading.Barrier(2, timeout=5)
+    
+    def worker(name):
+        with stage(name):
+            # Both workers' stages are open at the same time
+            both_running.wait()
+            with stage(f'{name}_step'):
+                pass
+    
+    def request():
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            with stage('fan_out'):
+                futures = [submit_with_context(executor, worker, name) for name in ['first', 'second']]
+                for future in futures:
+                    future.result()
+    
+    assert run_profiled(request) == {
+        'fan_out': 0,
+        'first': 1, 'first_step': 2,
+        'second': 1, 'second_step': 2
+    }
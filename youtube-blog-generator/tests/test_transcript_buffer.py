@@ -0,0 +1,50 @@
+"""
+Tests for the spill-to-disk transcript buffer.
+"""
+
+import pytest
+from transcript_buffer import TranscriptBuffer
+
+def test_small_text_stays_in_memory():
+    with TranscriptBuffer(memory_budget=1024) as buffer:
+        buffer.append('hello')
+        buffer.append('')
+        buffer.append('world')
+        assert not buffer.spilled
+        assert buffer.text() == 'hello world'
+        assert len(buffer) == buffer.chars == 11
+        assert buffer.size == 11
+
+def test_spills_past_memory_budget():
+    segments = [f'segment {i} café \U0001F680' for i in range(200)]
+    with TranscriptBuffer(memory_budget=256) as buffer:
+        for segment in segments:
+            buffer.append(segment)
+        assert buffer.spilled
+        expected = ' '.join(segments)
+        assert buffer.text() == expected
+        assert buffer.chars == len(expected)
+        assert buffer.size == len(expected.encode('utf-8'))
+        with buffer.view() as view:
+            assert bytes(view) == expected.encode('utf-8')
+
+@pytest.mark.parametrize('memory_budget', [16, 1024 * 1024])
+def test_head_does_not_split_characters(memory_budget):
+    with TranscriptBuffer(memory_budget=memory_budget) as buffer:
+        for _ in range(20):
+            buffer.append('é\U0001F680x')
+        assert buffer.head(5) == 'é\U0001F680x é'
+        assert buffer.head(1000) == buffer.text()
+
+def test_append_after_spilled_read_fails():
+    with TranscriptBuffer(memory_budget=8) as buffer:
+        buffer.append('more than eight bytes')
+        buffer.head(3)
+        with pytest.raises(ValueError):
+            buffer.append('again')
+
+def test_empty_buffer():
+    with TranscriptBuffer(memory_budget=8) as buffer:
+        assert buffer.text() == ''
+        assert buffer.head(10) == ''
+        assert not buffer.spilled
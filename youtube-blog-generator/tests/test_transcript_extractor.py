@@ -0,0 +1,59 @@
+"""
+Tests for the multi-language transcript fan-out.
+"""
+
+import pytest
+import transcript_extractor
+from transcript_buffer import TranscriptBuffer
+from transcript_extractor import TranscriptExtractor
+
+class FakeTranscript:
+    def __init__(self, language_code):
+        self.language_code = language_code
+
+@pytest.fixture
+def extractor(monkeypatch):
+    extractor = TranscriptExtractor()
+    monkeypatch.setattr(transcript_extractor.YouTubeTranscriptApi, 'list_transcripts', lambda video_id: object())
+    monkeypatch.setattr(extractor, '_select_variant', lambda transcripts, language: (FakeTranscript(language), None))
+    yield extractor
+    extractor.fanout_executor.shutdown(wait=True)
+
+def spilled_buffers(extractor, monkeypatch):
+    """Make every fetch return a buffer that has spilled to a temporary file."""
+    buffers = []
+    
+    def read_transcript(transcript):
+        buffer = TranscriptBuffer(memory_budget=16)
+        buffer.append(f'{transcript.language_code} transcript text that is longer than the budget')
+        buffers.append(buffer)
+        return buffer
+    
+    monkeypatch.setattr(extractor, '_read_transcript', read_transcript)
+    return buffers
+
+def test_fetched_buffers_are_closed(extractor, monkeypatch):
+    buffers = spilled_buffers(extractor, monkeypatch)
+    
+    result = extractor.get_transcripts('https://www.youtube.com/watch?v=dQw4w9WgXcQ', ['en', 'fr', 'de'])
+    
+    assert result['success']
+    assert result['transcripts']['fr']['preview'].startswith('fr transcript')
+    assert len(buffers) == 3
+    assert all(buffer.spilled and buffer._file.closed for buffer in buffers)
+
+def test_buffers_are_closed_when_storing_a_variant_fails(extractor, monkeypatch):
+    buffers = spilled_buffers(extractor, monkeypatch)
+    
+    def failing_store(*args):
+        raise RuntimeError('disk full')
+    
+    monkeypatch.setattr(extractor, '_store_buffer', failing_store)
+    
+    result = extractor.get_transcripts('https://www.youtube.com/watch?v=dQw4w9WgXcQ', ['en', 'fr', 'de'])
+    
+    assert not result['success']
+    extractor.fanout_executor.shutdown(wait=True)
+    # Fetches that had not started are cancelled; every buffer that was created is closed
+    assert buffers
+    assert all(buffer._file.closed for buffer in buffers)
@@ -0,0 +1,127 @@
+"""
+Transcript Buffer
+
+This module holds transcript text with a hard memory budget. Text is
+appended segment by segment as captions are streamed in; once it exceeds
+the budget it is spilled to a temporary file. Previews and other slices
+are read through memory views (mmap for spilled text), so a multi-hour
+transcript is never copied as a whole while it is being processed.
+"""
+
+import io
+import os
+import mmap
+import codecs
+import logging
+import tempfile
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Bytes of transcript text kept in memory per request before spilling to disk
+DEFAULT_MEMORY_BUDGET = 1024 * 1024
+
+class TranscriptBuffer:
+    """Append-only UTF-8 text buffer that spills to a temporary file past its memory budget."""
+    
+    def __init__(self, memory_budget=None):
+        """
+        Initialize the TranscriptBuffer.
+        
+        Args:
+            memory_budget (int, optional): Bytes kept in memory before spilling to disk.
+                                           Defaults to TRANSCRIPT_MEMORY_BUDGET.
+        """
+        if memory_budget is None:
+            memory_budget = int(os.getenv('TRANSCRIPT_MEMORY_BUDGET', str(DEFAULT_MEMORY_BUDGET)))
+        self.memory_budget = memory_budget
+        self.chars = 0
+        self.size = 0
+        self.spilled = False
+        self._file = io.BytesIO()
+        self._mmap = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+    
+    def __len__(self):
+        return self.chars
+    
+    def append(self, text):
+        """
+        Append text, separated from the previous text by a single space.
+        
+        Args:
+            text (str): The text to append; empty text is ignored.
+        """
+        if not text:
+            return
+        if self._mmap is not None:
+            raise ValueError("Cannot append to a TranscriptBuffer after it has been read")
+        
+        data = (' ' + text if self.chars else text).encode('utf-8')
+        if not self.spilled and self.size + len(data) > self.memory_budget:
+            self._spill()
+        self._file.write(data)
+        self.size += len(data)
+        self.chars += len(text) + (1 if self.chars else 0)
+    
+    def _spill(self):
+        """Move the text written so far from memory to a temporary file."""
+        spill_file = tempfile.TemporaryFile(prefix='transcript-')
+        spill_file.write(self._file.getbuffer())
+        self._file.close()
+        self._file = spill_file
+        self.spilled = True
+        logger.info(f"Transcript exceeded {self.memory_budget} bytes; spilled to a temporary file")
+    
+    def view(self):
+        """
+        Get a read-only view of the UTF-8 encoded text without copying it.
+        
+        Returns:
+            memoryview: The encoded text. Release it before closing the buffer.
+        """
+        if not self.size:
+            return memoryview(b'')
+        if not self.spilled:
+            return self._file.getbuffer().toreadonly()
+        if self._mmap is None:
+            self._file.flush()
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return memoryview(self._mmap)
+    
+    def head(self, max_chars):
+        """
+        Get the first characters of the text, decoding only that slice.
+        
+        Args:
+            max_chars (int): Maximum number of characters.
+        
+        Returns:
+            str: The beginning of the text.
+        """
+        # A character is at most four bytes in UTF-8
+        with self.view() as view:
+            with view[:max_chars * 4] as window:
+                return codecs.decode(window, 'utf-8', 'ignore')[:max_chars]
+    
+    def text(self):
+        """Get the whole text as a string; avoid this for long transcripts."""
+        with self.view() as view:
+            return codecs.decode(view, 'utf-8')
+    
+    def close(self):
+        """Release the memory or temporary file holding the text."""
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
@@ -6,20 +6,76 @@ using the youtube_transcript_api library and YouTube Data API.
 """
 
 from youtube_transcript_api import YouTubeTranscriptApi, TranscriptsDisabled, NoTranscriptFound
+from youtube_transcript_api import TooManyRequests, YouTubeRequestFailed
 import re
+import os
+import html
 import logging
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from xml.etree import ElementTree
 from youtube_api_client import YouTubeAPIClient
+from circuit_breaker import get_breaker, CircuitOpenError
+from profiling import stage, submit_with_context
+from transcript_buffer import TranscriptBuffer
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Characters of the transcript returned as a preview
+TRANSCRIPT_PREVIEW_CHARS = 500
+
+_WHITESPACE = re.compile(r'\s+')
+_NOISE_MARKERS = re.compile(r'\[(music|applause|laughter|inaudible|background noise)\]', re.IGNORECASE)
+_HTML_TAGS = re.compile(r'<[^>]*>')
+
+def clean_segment_text(text):
+    """
+    Clean the text of one transcript segment.
+    
+    Removes non-speech markers such as [Music] and collapses whitespace.
+    
+    Args:
+        text (str): The segment text.
+    
+    Returns:
+        str: The cleaned text, possibly empty.
+    """
+    return _WHITESPACE.sub(' ', _NOISE_MARKERS.sub('', text)).strip()
+
+def is_transcript_service_failure(error):
+    """
+    Decide whether a transcript error means the transcript service itself is unhealthy.
+    
+    Video-specific errors (transcripts disabled, no transcript, unavailable video)
+    do not count against the circuit breaker.
+    """
+    return isinstance(error, (TooManyRequests, YouTubeRequestFailed, requests.exceptions.RequestException))
+
+def _close_fetched_buffer(future):
+    """Close the TranscriptBuffer of a finished fetch whose result is discarded."""
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
 class TranscriptExtractor:
     """Class to handle YouTube transcript extraction and processing."""
     
-    def __init__(self):
-        """Initialize the TranscriptExtractor."""
+    def __init__(self, store=None):
+        """
+        Initialize the TranscriptExtractor.
+        
+        Args:
+            store (BlogStore, optional): Persistent store used to serve previously
+                                         extracted transcripts and to save new ones.
+        """
         self.youtube_api = YouTubeAPIClient()
+        self.store = store
+        self.transcript_breaker = get_breaker('youtube_transcript')
+        self.fanout_executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv('TRANSCRIPT_FANOUT_WORKERS', '4')),
+            thread_name_prefix='transcript'
+        )
     
     def extract_video_id(self, youtube_url):
         """
@@ -27,7 +83,7 @@ class TranscriptExtractor:
         
         Args:
             youtube_url (str): The YouTube video URL.
-            
+        
         Returns:
             str: The YouTube video ID.
         """
@@ -70,7 +126,10 @@ class TranscriptExtractor:
         Returns:
             dict: A dictionary containing:
                 - 'success' (bool): Whether the extraction was successful
-                - 'transcript' (str): The extracted transcript text if successful
+                - 'preview' (str): The first TRANSCRIPT_PREVIEW_CHARS characters of the transcript
+                - 'length' (int): The length of the transcript in characters
+                - 'stored' (bool): Whether the transcript is in the store, where it should be read from
+                - 'transcript' (str): The full transcript, only if it could not be stored
                 - 'error' (str): Error message if not successful
                 - 'video_id' (str): The YouTube video ID
                 - 'language' (str): The language code of the transcript
@@ -88,13 +147,34 @@ class TranscriptExtractor:
                 }
             
             # Extract video ID
-            video_id = self.extract_video_id(youtube_url)
+            with stage('extract_video_id'):
+                video_id = self.extract_video_id(youtube_url)
             logger.info(f"Extracting transcript for video ID: {video_id}")
             
+            # Serve previously extracted transcripts from the store
+            if self.store:
+                with stage('store_lookup'):
+                    cached = self.store.get_transcript(video_id, language, max_chars=TRANSCRIPT_PREVIEW_CHARS)
+                if cached:
+                    logger.info(f"Serving stored transcript for video ID: {video_id}")
+                    result = {
+                        'success': True,
+                        'preview': cached['transcript'],
+                        'length': cached['length'],
+                        'stored': True,
+                        'video_id': video_id,
+                        'language': cached['language'],
+                        'cached': True
+                    }
+                    if cached['video_details']:
+                        result['video_details'] = cached['video_details']
+                    return result
+            
             # Get video details from YouTube API if available
             video_details = None
             if self.youtube_api.youtube:
-                video_details_result = self.youtube_api.get_video_details(video_id)
+                with stage('video_details'):
+                    video_details_result = self.youtube_api.get_video_details(video_id)
                 if video_details_result['success']:
                     video_details = video_details_result
                     logger.info(f"Retrieved video details for: {video_details['title']}")
@@ -102,7 +182,8 @@ class TranscriptExtractor:
             # Check for available caption tracks using YouTube API
             caption_tracks = None
             if self.youtube_api.youtube:
-                caption_result = self.youtube_api.get_caption_tracks(video_id)
+                with stage('caption_tracks'):
+                    caption_result = self.youtube_api.get_caption_tracks(video_id)
                 if caption_result['success'] and caption_result['caption_tracks']:
                     caption_tracks = caption_result['caption_tracks']
                     logger.info(f"Found {len(caption_tracks)} caption tracks")
@@ -113,51 +194,47 @@ class TranscriptExtractor:
                         if language not in available_languages:
                             logger.warning(f"Requested language '{language}' not found in available captions: {available_languages}")
             
-            # Get available transcript list using youtube_transcript_api
-            transcript_list = YouTubeTranscriptApi.list_transcripts(video_id)
-            
-            # Try to get the transcript in the specified language
-            if language:
-                try:
-                    transcript = transcript_list.find_transcript([language])
-                    logger.info(f"Found transcript in requested language: {language}")
-                except NoTranscriptFound:
-                    logger.warning(f"No transcript found in language: {language}. Trying default language.")
-                    # If specified language not found, try to get any available transcript
-                    transcript = transcript_list.find_transcript([])
-            else:
-                # Get the default transcript (usually in the video's original language)
-                transcript = transcript_list.find_transcript([])
-                logger.info(f"Using default transcript in language: {transcript.language_code}")
+            # Stream and clean the transcript through the circuit breaker so an outage fails fast
+            with stage('fetch_transcript'):
+                transcript, buffer = self.transcript_breaker.call(
+                    self._fetch_transcript_data, video_id, language,
+                    is_failure=is_transcript_service_failure
+                )
             
-            # Fetch the transcript data
-            transcript_data = transcript.fetch()
-            
-            # Process the transcript into a single text
-            full_transcript = self.process_transcript(transcript_data)
-            
-            # Check if transcript is empty after processing
-            if not full_transcript.strip():
-                logger.warning(f"Transcript for video {video_id} is empty after processing")
-                return {
-                    'success': False,
-                    'error': 'The extracted transcript is empty after processing.',
-                    'video_id': video_id
+            with buffer:
+                # Check if transcript is empty after processing
+                if not buffer.chars:
+                    logger.warning(f"Transcript for video {video_id} is empty after processing")
+                    return {
+                        'success': False,
+                        'error': 'The extracted transcript is empty after processing.',
+                        'video_id': video_id
+                    }
+                
+                result = {
+                    'success': True,
+                    'video_id': video_id,
+                    'language': transcript.language_code
                 }
+                
+                # Add video details if available
+                if video_details:
+                    result['video_details'] = video_details
+                
+                # Persist the transcript so later requests for this video are served from the store
+                with stage('store_save'):
+                    result.update(self._store_buffer(video_id, transcript.language_code, buffer, video_details))
             
-            result = {
-                'success': True,
-                'transcript': full_transcript,
+            return result
+        
+        except CircuitOpenError as e:
+            logger.warning(f"Transcript fetch rejected for video {video_id}: {str(e)}")
+            return {
+                'success': False,
+                'error': 'YouTube transcripts are temporarily unavailable. Please try again shortly.',
                 'video_id': video_id,
-                'language': transcript.language_code
+                'retry_after': e.retry_after
             }
-            
-            # Add video details if available
-            if video_details:
-                result['video_details'] = video_details
-            
-            return result
-            
         except TranscriptsDisabled:
             logger.error(f"Transcripts are disabled for video: {video_id}")
             return {
@@ -187,13 +264,322 @@ class TranscriptExtractor:
                 'video_id': video_id if video_id else None
             }
     
+    def get_transcripts(self, youtube_url, languages):
+        """
+        Get transcripts of a YouTube video in several languages at once.
+        
+        The video's transcript list and details are fetched once and shared by
+        all languages. Languages without a transcript of their own are
+        translated from one that supports it, and the transcripts are fetched
+        concurrently on a bounded pool.
+        
+        Args:
+            youtube_url (str): The YouTube video URL.
+            languages (list): Language codes (e.g. ['en', 'es', 'de']).
+        
+        Returns:
+            dict: A dictionary containing:
+                - 'success' (bool): Whether at least one language was extracted
+                - 'video_id' (str): The YouTube video ID
+                - 'video_details' (dict): Video details if available
+                - 'transcripts' (dict): Per language, a result like get_transcript's,
+                  plus 'translated' (bool)
+                - 'error' (str): Error message if not successful
+        """
+        video_id = None
+        
+        try:
+            if not youtube_url or not isinstance(youtube_url, str):
+                return {
+                    'success': False,
+                    'error': 'Invalid YouTube URL: URL must be a non-empty string.',
+                    'video_id': None
+                }
+            
+            languages = list(dict.fromkeys(l.strip() for l in languages or [] if l and l.strip()))
+            if not languages:
+                return {
+                    'success': False,
+                    'error': 'At least one language is required.',
+                    'video_id': None
+                }
+            
+            with stage('extract_video_id'):
+                video_id = self.extract_video_id(youtube_url)
+            logger.info(f"Extracting transcripts for video ID {video_id} in: {', '.join(languages)}")
+            
+            variants = {}
+            video_details = None
+            missing = []
+            
+            # Serve the languages that are already in the store
+            for language in languages:
+                cached = self.store.get_transcript(video_id, language, max_chars=TRANSCRIPT_PREVIEW_CHARS) if self.store else None
+                if cached:
+                    variants[language] = {
+                        'success': True,
+                        'preview': cached['transcript'],
+                        'length': cached['length'],
+                        'stored': True,
+                        'language': language,
+                        'translated': cached['source_language'] is not None,
+                        'cached': True
+                    }
+                    video_details = video_details or cached['video_details']
+                else:
+                    missing.append(language)
+            
+            if missing:
+                # Video details are shared by every language
+                if not video_details and self.youtube_api.youtube:
+                    with stage('video_details'):
+                        video_details_result = self.youtube_api.get_video_details(video_id)
+                    if video_details_result['success']:
+                        video_details = video_details_result
+                
+                # List the transcripts once for all languages
+                with stage('list_transcripts'):
+                    transcript_list = self.transcript_breaker.call(
+                        YouTubeTranscriptApi.list_transcripts, video_id,
+                        is_failure=is_transcript_service_failure
+                    )
+                
+                futures = {}
+                finished = set()
+                try:
+                    for language in missing:
+                        try:
+                            transcript, source_language = self._select_variant(transcript_list, language)
+                        except NoTranscriptFound:
+                            variants[language] = {
+                                'success': False,
+                                'error': f'No transcript found or translatable for language: {language}.'
+                            }
+                            continue
+                        future = submit_with_context(
+                            self.fanout_executor, self.transcript_breaker.call, self._read_transcript, transcript,
+                            is_failure=is_transcript_service_failure
+                        )
+                        futures[language] = (future, source_language)
+                    
+                    with stage('fetch_transcripts'):
+                        for language, (future, source_language) in futures.items():
+                            finished.add(language)
+                            variants[language] = self._finish_variant(
+                                video_id, language, future, source_language, video_details
+                            )
+                finally:
+                    # After an error, release the buffers (and spill files) of fetches nobody will read
+                    for language, (future, _) in futures.items():
+                        if language not in finished and not future.cancel():
+                            future.add_done_callback(_close_fetched_buffer)
+            
+            result = {
+                'success': any(v['success'] for v in variants.values()),
+                'video_id': video_id,
+                'transcripts': {language: variants[language] for language in languages}
+            }
+            if video_details:
+                result['video_details'] = video_details
+            if not result['success']:
+                result['error'] = 'No transcript could be extracted in any of the requested languages.'
+                retry_after = [v['retry_after'] for v in variants.values() if v.get('retry_after') is not None]
+                if retry_after:
+                    result['retry_after'] = min(retry_after)
+            return result
+        
+        except CircuitOpenError as e:
+            logger.warning(f"Transcript fetch rejected for video {video_id}: {str(e)}")
+            return {
+                'success': False,
+                'error': 'YouTube transcripts are temporarily unavailable. Please try again shortly.',
+                'video_id': video_id,
+                'retry_after': e.retry_after
+            }
+        except TranscriptsDisabled:
+            logger.error(f"Transcripts are disabled for video: {video_id}")
+            return {
+                'success': False,
+                'error': 'Transcripts are disabled for this video.',
+                'video_id': video_id
+            }
+        except ValueError as e:
+            logger.error(f"Value error: {str(e)}")
+            return {
+                'success': False,
+                'error': str(e),
+                'video_id': None
+            }
+        except Exception as e:
+            logger.error(f"Error extracting transcripts: {str(e)}", exc_info=True)
+            return {
+                'success': False,
+                'error': f'An error occurred: {str(e)}',
+                'video_id': video_id if video_id else None
+            }
+    
+    def _select_variant(self, transcript_list, language):
+        """
+        Pick the transcript for a language, translating one if needed.
+        
+        Args:
+            transcript_list (TranscriptList): The video's available transcripts.
+            language (str): The wanted language code.
+        
+        Returns:
+            tuple: The transcript object and, for a translation, the language code it is
+                   translated from (None otherwise).
+        
+        Raises:
+            NoTranscriptFound: If the language is neither available nor translatable.
+        """
+        try:
+            return transcript_list.find_transcript([language]), None
+        except NoTranscriptFound:
+            pass
+        
+        # Manually created transcripts come first, so they are preferred as the source
+        for transcript in transcript_list:
+            if transcript.is_translatable and any(
+                    l['language_code'] == language for l in transcript.translation_languages):
+                logger.info(f"Translating {transcript.language_code} transcript to {language}")
+                return transcript.translate(language), transcript.language_code
+        
+        raise NoTranscriptFound(transcript_list.video_id, [language], transcript_list)
+    
+    def _finish_variant(self, video_id, language, future, source_language, video_details):
+        """
+        Wait for one language's transcript fetch, then store it.
+        
+        Args:
+            video_id (str): The YouTube video ID.
+            language (str): The language code.
+            future (Future): The pending fetch.
+            source_language (str): Language the transcript is translated from, or None for an original.
+            video_details (dict): Shared video details to store with the transcript.
+        
+        Returns:
+            dict: The per-language result.
+        """
+        try:
+            buffer = future.result()
+        except CircuitOpenError as e:
+            return {
+                'success': False,
+                'error': 'YouTube transcripts are temporarily unavailable. Please try again shortly.',
+                'retry_after': e.retry_after
+            }
+        except Exception as e:
+            logger.error(f"Error fetching {language} transcript for video {video_id}: {str(e)}")
+            return {
+                'success': False,
+                'error': f'An error occurred: {str(e)}'
+            }
+        
+        with buffer:
+            if not buffer.chars:
+                return {
+                    'success': False,
+                    'error': 'The extracted transcript is empty after processing.'
+                }
+            
+            result = {
+                'success': True,
+                'language': language,
+                'translated': source_language is not None
+            }
+            result.update(self._store_buffer(video_id, language, buffer, video_details, source_language))
+        return result
+    
+    def _store_buffer(self, video_id, language, buffer, video_details, source_language=None):
+        """
+        Save a fetched transcript to the store and describe it for a result.
+        
+        Args:
+            video_id (str): The YouTube video ID.
+            language (str): The language code.
+            buffer (TranscriptBuffer): The cleaned transcript.
+            video_details (dict): Video details to store with the transcript.
+            source_language (str, optional): Language a translation was made from.
+        
+        Returns:
+            dict: 'preview', 'length' and 'stored', plus the full 'transcript'
+                  if it could not be stored.
+        """
+        stored = False
+        if self.store:
+            try:
+                self.store.save_transcript(video_id, language, buffer, video_details, source_language)
+                stored = True
+            except Exception as e:
+                logger.error(f"Failed to store {language} transcript for video {video_id}: {str(e)}")
+        
+        result = {
+            'preview': buffer.head(TRANSCRIPT_PREVIEW_CHARS),
+            'length': buffer.chars,
+            'stored': stored
+        }
+        if not stored:
+            result['transcript'] = buffer.text()
+        return result
+    
+    def _fetch_transcript_data(self, video_id, language=None):
+        """
+        List the available transcripts of a video and fetch the best match.
+        
+        Args:
+            video_id (str): The YouTube video ID.
+            language (str, optional): Preferred language code.
+        
+        Returns:
+            tuple: The selected transcript object and a TranscriptBuffer with its cleaned text.
+        """
+        # Get available transcript list using youtube_transcript_api
+        transcript_list = YouTubeTranscriptApi.list_transcripts(video_id)
+        
+        # Try to get the transcript in the specified language
+        if language:
+            try:
+                transcript = transcript_list.find_transcript([language])
+                logger.info(f"Found transcript in requested language: {language}")
+            except NoTranscriptFound:
+                logger.warning(f"No transcript found in language: {language}. Trying default language.")
+                # If specified language not found, try to get any available transcript
+                transcript = self._default_transcript(transcript_list)
+        else:
+            # Get the default transcript (usually in the video's original language)
+            transcript = self._default_transcript(transcript_list)
+            logger.info(f"Using default transcript in language: {transcript.language_code}")
+        
+        # Stream the transcript data
+        return transcript, self._read_transcript(transcript)
+    
+    @staticmethod
+    def _default_transcript(transcript_list):
+        """
+        Get the default transcript of a video: the first manually created one, else the first generated one.
+        
+        Args:
+            transcript_list (TranscriptList): The video's available transcripts.
+        
+        Returns:
+            Transcript: The default transcript.
+        
+        Raises:
+            NoTranscriptFound: If the video has no transcripts at all.
+        """
+        # find_transcript([]) never matches anything, so pick the first transcript directly
+        for transcript in transcript_list:
+            return transcript
+        raise NoTranscriptFound(transcript_list.video_id, [], transcript_list)
+    
     def process_transcript(self, transcript_data):
         """
         Process the transcript data into a clean, readable text.
         
         Args:
             transcript_data (list): List of transcript segments from YouTubeTranscriptApi.
-            
+        
         Returns:
             str: Processed transcript text.
         """
@@ -202,18 +588,70 @@ class TranscriptExtractor:
             return ""
         
         try:
-            # Combine all transcript segments into a single text
-            transcript_text = ' '.join([segment.get('text', '') for segment in transcript_data])
-            
-            # Clean up the text
-            # Remove multiple spaces
-            transcript_text = re.sub(r'\s+', ' ', transcript_text)
-            
-            # Remove any special characters or formatting that might be present
-            # Only remove square brackets content that doesn't contain important information
-            transcript_text = re.sub(r'\[(music|applause|laughter|inaudible|background noise)\]', '', transcript_text, flags=re.IGNORECASE)
-            
-            return transcript_text.strip()
+            # Clean each segment, then combine the non-empty ones into a single text
+            return ' '.join(filter(None, (clean_segment_text(segment.get('text', '')) for segment in transcript_data)))
         except Exception as e:
             logger.error(f"Error processing transcript: {str(e)}", exc_info=True)
             return ""
+    
+    def _read_transcript(self, transcript):
+        """
+        Stream a transcript into a TranscriptBuffer, cleaning it segment by segment.
+        
+        Args:
+            transcript (Transcript): The transcript to fetch.
+        
+        Returns:
+            TranscriptBuffer: The cleaned transcript text; the caller closes it.
+        """
+        buffer = TranscriptBuffer()
+        try:
+            for text in self._stream_segments(transcript):
+                buffer.append(clean_segment_text(text))
+        except Exception:
+            buffer.close()
+            raise
+        return buffer
+    
+    def _stream_segments(self, transcript):
+        """
+        Fetch the segments of a transcript one at a time.
+        
+        youtube_transcript_api only returns the fully parsed segment list, so the
+        caption XML is fetched with the library's own session and parsed
+        incrementally, keeping only the current segment in memory.
+        
+        Args:
+            transcript (Transcript): The transcript to fetch.
+        
+        Yields:
+            str: The text of each segment.
+        """
+        url = getattr(transcript, '_url', None)
+        http_client = getattr(transcript, '_http_client', None)
+        if not url or http_client is None:
+            # Unknown library version: fall back to the parsed list
+            for segment in transcript.fetch():
+                yield segment.get('text', '')
+            return
+        
+        with http_client.get(url, stream=True) as response:
+            try:
+                response.raise_for_status()
+            except requests.exceptions.HTTPError as e:
+                raise YouTubeRequestFailed(transcript.video_id, e)
+            
+            parser = ElementTree.XMLPullParser(events=('start', 'end'))
+            root = None
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                parser.feed(chunk)
+                for event, element in parser.read_events():
+                    if root is None:
+                        root = element
+                    elif event == 'end' and element.tag == 'text' and element.text is not None:
+                        # Same cleanup as the library: unescape, then strip formatting tags
+                        yield _HTML_TAGS.sub('', html.unescape(element.text))
+                if root is not None:
+                    # Drop the segments already read
+                    root.clear()
+            parser.close()
@@ -3,13 +3,21 @@ YouTube API Client
 
 This module handles interactions with the YouTube Data API v3
 for retrieving video information and captions.
+
+Requests go through a small pooled HTTP client instead of the
+discovery-based Google client: every call sends a ``fields`` partial-response
+mask, asks for gzip, and revalidates previously seen responses with their
+ETag so unchanged resources come back as an empty ``304 Not Modified``.
 """
 
 import os
 import logging
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
+import threading
+from collections import OrderedDict
+import requests
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
+from circuit_breaker import get_breaker, CircuitOpenError
 
 # Load environment variables
 load_dotenv()
@@ -18,23 +26,131 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Partial-response masks for the endpoints we use
+VIDEO_DETAILS_FIELDS = (
+    'items(id,snippet(title,channelTitle,publishedAt,tags,categoryId,thumbnails/high/url),'
+    'contentDetails/duration,statistics(viewCount,likeCount,commentCount))'
+)
+VIDEO_ID_FIELDS = 'items/id'
+CAPTION_TRACKS_FIELDS = 'items(id,snippet(language,name,trackKind))'
+UPLOADS_PLAYLIST_FIELDS = 'items(id,contentDetails/relatedPlaylists/uploads)'
+PLAYLIST_ITEMS_FIELDS = 'items(snippet(publishedAt,title,resourceId/videoId))'
+
+class YouTubeAPIError(Exception):
+    """Raised when the YouTube Data API returns an error response."""
+    
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
 class YouTubeAPIClient:
     """Class to handle YouTube API interactions."""
     
     def __init__(self):
         """Initialize the YouTube API client with API key."""
         self.api_key = os.getenv('YOUTUBE_API_KEY')
+        self.base_url = os.getenv('YOUTUBE_API_BASE_URL', 'https://www.googleapis.com/youtube/v3').rstrip('/')
+        self.timeout = float(os.getenv('YOUTUBE_API_TIMEOUT', '10'))
+        self.etag_cache_size = int(os.getenv('YOUTUBE_ETAG_CACHE_SIZE', '512'))
+        self._etag_cache = OrderedDict()
+        self._etag_lock = threading.Lock()
+        self.breaker = get_breaker('youtube_data_api')
         
         if not self.api_key:
             logger.warning("YOUTUBE_API_KEY not found in environment variables.")
             self.youtube = None
         else:
+            self.youtube = self._create_session()
+            logger.info("YouTube API client initialized successfully")
+    
+    def _create_session(self):
+        """
+        Create a pooled HTTP session for the YouTube Data API.
+        
+        Returns:
+            requests.Session: Session with keep-alive connection pooling and gzip enabled.
+        """
+        pool_size = int(os.getenv('YOUTUBE_API_POOL_SIZE', '10'))
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers.update({
+            'Accept': 'application/json',
+            'Accept-Encoding': 'gzip',
+            # Google APIs only compress responses for clients that advertise gzip in the User-Agent
+            'User-Agent': 'youtube-blog-generator/1.0 (gzip)'
+        })
+        return session
+    
+    def _get(self, resource, params, fields):
+        """
+        Perform a GET request against a YouTube Data API resource.
+        
+        Previously seen responses are revalidated with ``If-None-Match`` and
+        served from the local ETag cache when the API answers ``304``.
+        Calls go through the ``youtube_data_api`` circuit breaker; network
+        errors, 5xx and 429 responses count as failures.
+        
+        Args:
+            resource (str): The API resource path (e.g. 'videos').
+            params (dict): Query parameters for the request.
+            fields (str): Partial-response field mask.
+        
+        Returns:
+            dict: The decoded JSON response.
+        """
+        query = dict(params, fields=fields, key=self.api_key)
+        cache_key = (resource, tuple(sorted((k, str(v)) for k, v in params.items())), fields)
+        
+        with self._etag_lock:
+            cached = self._etag_cache.get(cache_key)
+        
+        headers = {}
+        if cached:
+            headers['If-None-Match'] = cached[0]
+        
+        if not self.breaker.allow_request():
+            raise CircuitOpenError(self.breaker.name, self.breaker.retry_after())
+        
+        try:
+            response = self.youtube.get(
+                f"{self.base_url}/{resource}",
+                params=query,
+                headers=headers,
+                timeout=self.timeout
+            )
+        except requests.exceptions.RequestException:
+            self.breaker.record_failure()
+            raise
+        
+        if response.status_code >= 500 or response.status_code == 429:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        
+        if response.status_code == 304 and cached:
+            with self._etag_lock:
+                self._etag_cache.move_to_end(cache_key)
+            return cached[1]
+        
+        if response.status_code >= 400:
             try:
-                self.youtube = build('youtube', 'v3', developerKey=self.api_key)
-                logger.info("YouTube API client initialized successfully")
-            except Exception as e:
-                logger.error(f"Failed to initialize YouTube API client: {str(e)}", exc_info=True)
-                self.youtube = None
+                message = response.json().get('error', {}).get('message', response.text)
+            except ValueError:
+                message = response.text
+            raise YouTubeAPIError(f"HTTP {response.status_code}: {message}", response.status_code)
+        
+        data = response.json()
+        etag = response.headers.get('ETag') or data.get('etag')
+        if etag:
+            with self._etag_lock:
+                self._etag_cache[cache_key] = (etag, data)
+                self._etag_cache.move_to_end(cache_key)
+                while len(self._etag_cache) > self.etag_cache_size:
+                    self._etag_cache.popitem(last=False)
+        
+        return data
     
     def get_video_details(self, video_id):
         """
@@ -42,7 +158,7 @@ class YouTubeAPIClient:
         
         Args:
             video_id (str): The YouTube video ID.
-            
+        
         Returns:
             dict: A dictionary containing video details or error information.
         """
@@ -54,10 +170,10 @@ class YouTubeAPIClient:
         
         try:
             # Call the API to get video details
-            response = self.youtube.videos().list(
-                part='snippet,contentDetails,statistics',
-                id=video_id
-            ).execute()
+            response = self._get('videos', {
+                'part': 'snippet,contentDetails,statistics',
+                'id': video_id
+            }, VIDEO_DETAILS_FIELDS)
             
             # Check if video exists
             if not response.get('items'):
@@ -68,25 +184,32 @@ class YouTubeAPIClient:
             
             # Extract relevant information
             video_info = response['items'][0]
-            snippet = video_info['snippet']
+            snippet = video_info.get('snippet', {})
+            content_details = video_info.get('contentDetails', {})
+            statistics = video_info.get('statistics', {})
             
             return {
                 'success': True,
                 'video_id': video_id,
                 'title': snippet.get('title', ''),
-                'description': snippet.get('description', ''),
                 'channel_title': snippet.get('channelTitle', ''),
                 'published_at': snippet.get('publishedAt', ''),
                 'tags': snippet.get('tags', []),
                 'category_id': snippet.get('categoryId', ''),
-                'duration': video_info['contentDetails'].get('duration', ''),
-                'view_count': video_info['statistics'].get('viewCount', '0'),
-                'like_count': video_info['statistics'].get('likeCount', '0'),
-                'comment_count': video_info['statistics'].get('commentCount', '0'),
+                'duration': content_details.get('duration', ''),
+                'view_count': statistics.get('viewCount', '0'),
+                'like_count': statistics.get('likeCount', '0'),
+                'comment_count': statistics.get('commentCount', '0'),
                 'thumbnail_url': snippet.get('thumbnails', {}).get('high', {}).get('url', '')
             }
-            
-        except HttpError as e:
+        
+        except CircuitOpenError as e:
+            logger.warning(f"Skipping video details: {str(e)}")
+            return {
+                'success': False,
+                'error': 'YouTube Data API is temporarily unavailable.'
+            }
+        except YouTubeAPIError as e:
             error_message = f"YouTube API HTTP error: {str(e)}"
             logger.error(error_message)
             return {
@@ -107,7 +230,7 @@ class YouTubeAPIClient:
         
         Args:
             video_id (str): The YouTube video ID.
-            
+        
         Returns:
             dict: A dictionary containing caption track information or error details.
         """
@@ -119,10 +242,10 @@ class YouTubeAPIClient:
         
         try:
             # Call the API to get caption tracks
-            response = self.youtube.captions().list(
-                part='snippet',
-                videoId=video_id
-            ).execute()
+            response = self._get('captions', {
+                'part': 'snippet',
+                'videoId': video_id
+            }, CAPTION_TRACKS_FIELDS)
             
             caption_tracks = []
             for item in response.get('items', []):
@@ -138,8 +261,14 @@ class YouTubeAPIClient:
                 'video_id': video_id,
                 'caption_tracks': caption_tracks
             }
-            
-        except HttpError as e:
+        
+        except CircuitOpenError as e:
+            logger.warning(f"Skipping caption tracks: {str(e)}")
+            return {
+                'success': False,
+                'error': 'YouTube Data API is temporarily unavailable.'
+            }
+        except YouTubeAPIError as e:
             error_message = f"YouTube API HTTP error: {str(e)}"
             logger.error(error_message)
             return {
@@ -154,13 +283,136 @@ class YouTubeAPIClient:
                 'error': error_message
             }
     
+    def get_uploads_playlist_id(self, channel_id):
+        """
+        Get the ID of a channel's uploads playlist.
+        
+        Args:
+            channel_id (str): The YouTube channel ID.
+        
+        Returns:
+            dict: A dictionary containing the playlist ID or error information.
+        """
+        if not self.youtube:
+            return {
+                'success': False,
+                'error': 'YouTube API client not initialized. Please check your API key.'
+            }
+        
+        try:
+            response = self._get('channels', {
+                'part': 'contentDetails',
+                'id': channel_id
+            }, UPLOADS_PLAYLIST_FIELDS)
+            
+            if not response.get('items'):
+                return {
+                    'success': False,
+                    'error': f'Channel with ID {channel_id} not found.'
+                }
+            
+            return {
+                'success': True,
+                'channel_id': channel_id,
+                'playlist_id': response['items'][0]['contentDetails']['relatedPlaylists']['uploads']
+            }
+        
+        except CircuitOpenError as e:
+            logger.warning(f"Skipping uploads playlist lookup: {str(e)}")
+            return {
+                'success': False,
+                'error': 'YouTube Data API is temporarily unavailable.'
+            }
+        except YouTubeAPIError as e:
+            error_message = f"YouTube API HTTP error: {str(e)}"
+            logger.error(error_message)
+            return {
+                'success': False,
+                'error': error_message
+            }
+        except Exception as e:
+            error_message = f"Error retrieving uploads playlist: {str(e)}"
+            logger.error(error_message, exc_info=True)
+            return {
+                'success': False,
+                'error': error_message
+            }
+    
+    def get_playlist_videos(self, playlist_id, max_results=50):
+        """
+        Get the most recent videos of a playlist.
+        
+        The first page is revalidated with its ETag, so polling a playlist
+        that has not changed costs an empty ``304 Not Modified``.
+        
+        Args:
+            playlist_id (str): The playlist ID (e.g. a channel's uploads playlist).
+            max_results (int): Number of videos to return (at most 50).
+        
+        Returns:
+            dict: A dictionary containing the videos or error information.
+        """
+        if not self.youtube:
+            return {
+                'success': False,
+                'error': 'YouTube API client not initialized. Please check your API key.'
+            }
+        
+        try:
+            response = self._get('playlistItems', {
+                'part': 'snippet',
+                'playlistId': playlist_id,
+                'maxResults': min(50, max_results)
+            }, PLAYLIST_ITEMS_FIELDS)
+            
+            videos = []
+            for item in response.get('items', []):
+                snippet = item.get('snippet', {})
+                video_id = snippet.get('resourceId', {}).get('videoId')
+                if video_id:
+                    videos.append({
+                        'video_id': video_id,
+                        'title': snippet.get('title', ''),
+                        'published_at': snippet.get('publishedAt', '')
+                    })
+            
+            return {
+                'success': True,
+                'playlist_id': playlist_id,
+                'videos': videos
+            }
+        
+        except CircuitOpenError as e:
+            logger.warning(f"Skipping playlist videos: {str(e)}")
+            return {
+                'success': False,
+                'error': 'YouTube Data API is temporarily unavailable.'
+            }
+        except YouTubeAPIError as e:
+            error_message = f"YouTube API HTTP error: {str(e)}"
+            logger.error(error_message)
+            return {
+                'success': False,
+                'error': error_message
+            }
+        except Exception as e:
+            error_message = f"Error retrieving playlist videos: {str(e)}"
+            logger.error(error_message, exc_info=True)
+            return {
+                'success': False,
+                'error': error_message
+            }
+    
     def is_valid_video_id(self, video_id):
         """
         Check if a video ID is valid by attempting to retrieve its details.
         
+        While the YouTube Data API is unreachable the ID cannot be verified,
+        so it is assumed valid and the transcript fetch decides instead.
+        
         Args:
             video_id (str): The YouTube video ID to validate.
-            
+        
         Returns:
             bool: True if the video ID is valid, False otherwise.
         """
@@ -168,13 +420,20 @@ class YouTubeAPIClient:
             return False
         
         try:
-            response = self.youtube.videos().list(
-                part='id',
-                id=video_id
-            ).execute()
+            response = self._get('videos', {
+                'part': 'id',
+                'id': video_id
+            }, VIDEO_ID_FIELDS)
             
             return bool(response.get('items'))
-            
+        
+        except (CircuitOpenError, requests.exceptions.RequestException) as e:
+            logger.warning(f"Could not validate video ID {video_id}: {str(e)}")
+            return True
+        except YouTubeAPIError as e:
+            if e.status_code >= 500 or e.status_code == 429:
+                logger.warning(f"Could not validate video ID {video_id}: {str(e)}")
+                return True
+            return False
         except:
             return False
-